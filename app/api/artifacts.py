@@ -1,7 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 from uuid import UUID
+from app.blob_store import BlobTooLargeError, EmptyBlobError, get_blob_store
 from app.db.functions import fn_register_artifact
+from app.settings import settings
 
 router = APIRouter(prefix="/v1/artifacts", tags=["artifacts"])
 
@@ -26,3 +28,50 @@ async def register_artifact(payload: ArtifactRegisterIn):
         payload.sha256,
     )
     return {"artifact_id": str(artifact_id)}
+
+
+@router.post("/upload")
+async def upload_artifact(
+    request: Request,
+    intake_id: UUID = Query(...),
+    artifact_type: str = Query(..., description="resume, dl, faa, rtr, image, other"),
+    file_name: str | None = Query(None),
+):
+    """
+    Upload the file bytes as the raw request body (Content-Type = the file's
+    mime type) and register the artifact in the same request.
+
+    The body is streamed into the blob store and hashed on the way, so the
+    caller does not compute sha256 and the worker reads the stored blob
+    instead of downloading the file again.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.BLOB_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"upload exceeds {settings.BLOB_MAX_UPLOAD_BYTES} bytes")
+
+    try:
+        blob = await get_blob_store().write_stream(request.stream(), settings.BLOB_MAX_UPLOAD_BYTES)
+    except BlobTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except EmptyBlobError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    mime_type = (request.headers.get("content-type") or "").split(";")[0].strip() or None
+    if mime_type == "application/octet-stream":
+        mime_type = None
+
+    artifact_id = await fn_register_artifact(
+        intake_id,
+        artifact_type,
+        file_name,
+        mime_type,
+        blob.uri,
+        blob.sha256,
+    )
+    return {
+        "artifact_id": str(artifact_id),
+        "sha256": blob.sha256,
+        "size": blob.size,
+        "storage_uri": blob.uri,
+        "duplicate": blob.existed,
+    }
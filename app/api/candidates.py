@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from uuid import UUID
+from app.db.functions import fn_match_candidates
+from app.embeddings import get_backend, vector_literal
+
+
+router = APIRouter(prefix="/v1/candidates", tags=["candidates"])
+
+
+class CandidateMatchIn(BaseModel):
+    query_text: str | None = Field(None, description="embedded with the configured EMBEDDING_BACKEND")
+    query_vector: list[float] | None = Field(None, description="used as-is instead of query_text")
+    limit: int = Field(20, ge=1, le=200)
+    embedding_type: str = "candidate_profile"
+    center_lat: float | None = Field(None, ge=-90, le=90)
+    center_lon: float | None = Field(None, ge=-180, le=180)
+    radius_km: float | None = Field(None, gt=0)
+    statuses: list[str] | None = Field(None, description="e.g. active")
+    availability: list[str] | None = Field(None, description="availability_status values")
+    ef_search: int = Field(100, ge=10, le=1000, description="HNSW candidate list size (recall vs latency)")
+    overfetch: int = Field(4, ge=1, le=50, description="filtered searches fetch limit x overfetch nearest rows")
+    exact_max_rows: int = Field(5000, ge=0, description="rank exactly when filters leave at most this many")
+
+
+class CandidateMatchOut(BaseModel):
+    candidate_id: UUID
+    full_name: str | None
+    status: str
+    availability_status: str
+    timezone: str | None
+    distance_km: float | None
+    similarity: float
+
+
+@router.post("/match")
+async def match_candidates(payload: CandidateMatchIn):
+    """
+    Top-k candidates by embedding similarity to the query, restricted to
+    the given statuses / availability / radius, best match first.
+    """
+    if (payload.query_text is None) == (payload.query_vector is None):
+        raise HTTPException(status_code=422, detail="exactly one of query_text or query_vector is required")
+    if payload.radius_km is not None and (payload.center_lat is None or payload.center_lon is None):
+        raise HTTPException(status_code=422, detail="radius_km requires center_lat and center_lon")
+
+    t0 = time.perf_counter()
+    vector = payload.query_vector
+    if vector is None:
+        backend = get_backend()
+        vector = (await asyncio.to_thread(backend.embed, [payload.query_text]))[0]
+    t1 = time.perf_counter()
+
+    rows = await fn_match_candidates(
+        vector_literal(vector),
+        limit=payload.limit,
+        embedding_type=payload.embedding_type,
+        center_lat=payload.center_lat,
+        center_lon=payload.center_lon,
+        radius_m=payload.radius_km * 1000 if payload.radius_km is not None else None,
+        statuses=payload.statuses,
+        availability=payload.availability,
+        ef_search=payload.ef_search,
+        overfetch=payload.overfetch,
+        exact_max_rows=payload.exact_max_rows,
+    )
+    t2 = time.perf_counter()
+
+    return {
+        "took_ms": round((t2 - t0) * 1000, 1),
+        "embed_ms": round((t1 - t0) * 1000, 1),
+        "search_ms": round((t2 - t1) * 1000, 1),
+        "search_method": rows[0]["search_method"] if rows else None,
+        "candidates": [
+            CandidateMatchOut(
+                candidate_id=r["candidate_id"],
+                full_name=r["full_name"],
+                status=r["status"],
+                availability_status=r["availability_status"],
+                timezone=r["timezone"],
+                distance_km=r["distance_m"] / 1000 if r["distance_m"] is not None else None,
+                similarity=r["similarity"],
+            )
+            for r in rows
+        ],
+    }
@@ -1,8 +1,8 @@
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Any
 from uuid import UUID
-from app.db.functions import fn_ingest_intake
+from app.db.functions import fn_ingest_intake, fn_ingest_intakes_with_artifacts_batch
 from datetime import datetime
 
 
@@ -20,6 +20,23 @@ class IntakeIn(BaseModel):
     raw_payload: dict[str, Any] = {}
 
 
+class AttachmentIn(BaseModel):
+    artifact_type: str = Field(..., description="resume, dl, faa, rtr, image, other")
+    file_name: str | None = None
+    mime_type: str | None = None
+    storage_uri: str | None = None
+    sha256: str = Field(..., description="hex sha256 of file bytes")
+    external_file_id: str | None = Field(None, description="echoed back so n8n can move the file")
+
+
+class IntakeWithAttachmentsIn(IntakeIn):
+    attachments: list[AttachmentIn] = []
+
+
+class IntakeBatchIn(BaseModel):
+    intakes: list[IntakeWithAttachmentsIn] = Field(..., min_length=1, max_length=1000)
+
+
 @router.post("/ingest")
 async def ingest_intake(payload: IntakeIn):
     intake_id: UUID = await fn_ingest_intake(
@@ -34,3 +51,39 @@ async def ingest_intake(payload: IntakeIn):
     )
 
     return {"intake_id": str(intake_id)}
+
+
+@router.post("/ingest/batch")
+async def ingest_intakes_batch(payload: IntakeBatchIn):
+    """
+    Ingest many intakes and register all their attachments in one stored
+    function call (one transaction). Results come back in request order.
+    """
+    intakes: list[dict[str, Any]] = []
+    attachments: list[dict[str, Any]] = []
+    for n, it in enumerate(payload.intakes, start=1):
+        intakes.append(it.model_dump(exclude={"attachments"}))
+        for att in it.attachments:
+            attachments.append({"intake_ordinal": n, **att.model_dump()})
+
+    rows = await fn_ingest_intakes_with_artifacts_batch(intakes, attachments)
+
+    out: list[dict[str, Any]] = [
+        {"intake_id": None, "source_message_id": it.source_message_id, "artifacts": []}
+        for it in payload.intakes
+    ]
+    for r in rows:
+        item = out[r["intake_ordinal"] - 1]
+        item["intake_id"] = str(r["intake_id"])
+        if r["attachment_ordinal"] is None:
+            continue
+        att = attachments[r["attachment_ordinal"] - 1]
+        item["artifacts"].append(
+            {
+                "artifact_id": str(r["artifact_id"]),
+                "file_name": att["file_name"],
+                "external_file_id": att["external_file_id"],
+            }
+        )
+
+    return {"intakes": out}
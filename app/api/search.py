@@ -0,0 +1,59 @@
+import html
+import time
+
+from fastapi import APIRouter, Query
+from app.db.functions import fn_search_artifacts
+
+
+router = APIRouter(prefix="/v1/search", tags=["search"])
+
+# delivery.fn_search_artifacts marks headline matches with these (and strips
+# them from the text), so the rest of the text can be escaped here
+HEADLINE_START = "\ue000"
+HEADLINE_STOP = "\ue001"
+
+
+def headline_html(headline: str | None) -> str | None:
+    if headline is None:
+        return None
+    return html.escape(headline).replace(HEADLINE_START, "<b>").replace(HEADLINE_STOP, "</b>")
+
+
+@router.get("")
+async def search_artifacts(
+    q: str = Query(..., min_length=1, max_length=500, description='e.g. A&P IA "Gulfstream G650" -helicopter'),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    artifact_type: list[str] | None = Query(None, description="repeat to allow several types"),
+):
+    """
+    Full-text search over extracted artifact text, best match first.
+    Headlines are HTML-escaped text with matches marked by <b>...</b>.
+    """
+    t0 = time.perf_counter()
+    # One extra row tells whether another page exists
+    rows = await fn_search_artifacts(q, limit + 1, offset, artifact_type)
+    took_ms = round((time.perf_counter() - t0) * 1000, 1)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "query": q,
+        "took_ms": took_ms,
+        "offset": offset,
+        "limit": limit,
+        "has_more": has_more,
+        "next_offset": offset + limit if has_more else None,
+        "results": [
+            {
+                "artifact_id": str(r["artifact_id"]),
+                "intake_id": str(r["intake_id"]),
+                "artifact_type": r["artifact_type"],
+                "file_name": r["file_name"],
+                "updated_at": r["updated_at"],
+                "rank": r["rank"],
+                "headline": headline_html(r["headline"]),
+            }
+            for r in rows
+        ],
+    }
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+
+BLOB_SCHEME = "blob://"
+
+# Buffered before each write so the event loop hands the disk a few large
+# writes instead of one per network chunk
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+class BlobTooLargeError(ValueError):
+    pass
+
+
+class EmptyBlobError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    sha256: str
+    size: int
+    uri: str
+    existed: bool  # same bytes were already in the store
+
+
+def is_blob_uri(uri: str | None) -> bool:
+    return bool(uri) and uri.startswith(BLOB_SCHEME)
+
+
+def blob_uri(sha256: str) -> str:
+    return f"{BLOB_SCHEME}{sha256}"
+
+
+def sha_from_uri(uri: str) -> str:
+    sha = uri[len(BLOB_SCHEME):].strip().lower()
+    if len(sha) != 64 or any(c not in "0123456789abcdef" for c in sha):
+        raise ValueError(f"invalid blob uri: {uri}")
+    return sha
+
+
+class LocalBlobStore:
+    """
+    Content-addressed file store: <root>/<sha[:2]>/<sha[2:4]>/<sha>.
+
+    Local stand-in for object storage. Blobs are written to a temp file under
+    <root>/.tmp while being hashed, fsynced, then renamed into place, so a
+    blob path either does not exist or holds the complete bytes. Identical
+    uploads end up as one file.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+        self._tmp_dir = os.path.join(self.root, ".tmp")
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def path_for_uri(self, uri: str) -> str:
+        return self.path_for(sha_from_uri(uri))
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path_for(sha256))
+
+    async def write_stream(self, chunks: AsyncIterator[bytes], max_bytes: int) -> StoredBlob:
+        """Consume `chunks` once: hash, size-cap and store them."""
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(prefix="upload-", dir=self._tmp_dir, delete=False)
+        hasher = hashlib.sha256()
+        size = 0
+        buf = bytearray()
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_bytes:
+                    raise BlobTooLargeError(f"Upload exceeds max size of {max_bytes} bytes")
+                hasher.update(chunk)
+                buf += chunk
+                if len(buf) >= WRITE_BUFFER_BYTES:
+                    await asyncio.to_thread(tmp.write, bytes(buf))
+                    buf.clear()
+            if size == 0:
+                raise EmptyBlobError("empty upload")
+            if buf:
+                await asyncio.to_thread(tmp.write, bytes(buf))
+            await asyncio.to_thread(_flush_and_close, tmp)
+
+            sha = hasher.hexdigest()
+            existed = await asyncio.to_thread(self._commit, tmp.name, sha)
+        except BaseException:
+            tmp.close()
+            _unlink(tmp.name)
+            raise
+
+        return StoredBlob(sha256=sha, size=size, uri=blob_uri(sha), existed=existed)
+
+    def store_file(self, path: str, max_bytes: int) -> StoredBlob:
+        """
+        Blocking counterpart of write_stream for a local file (bulk import):
+        one read that hashes and copies, then the same commit.
+        """
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(prefix="import-", dir=self._tmp_dir, delete=False)
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with open(path, "rb") as src:
+                while chunk := src.read(WRITE_BUFFER_BYTES):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise BlobTooLargeError(f"File exceeds max size of {max_bytes} bytes")
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+            if size == 0:
+                raise EmptyBlobError("empty file")
+            _flush_and_close(tmp)
+
+            sha = hasher.hexdigest()
+            existed = self._commit(tmp.name, sha)
+        except BaseException:
+            tmp.close()
+            _unlink(tmp.name)
+            raise
+
+        return StoredBlob(sha256=sha, size=size, uri=blob_uri(sha), existed=existed)
+
+    def _commit(self, tmp_path: str, sha256: str) -> bool:
+        final = self.path_for(sha256)
+        if os.path.exists(final):
+            _unlink(tmp_path)
+            return True
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(tmp_path, final)
+        return False
+
+
+def _flush_and_close(f) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+_store: LocalBlobStore | None = None
+
+
+def get_blob_store() -> LocalBlobStore:
+    global _store
+    if _store is None:
+        # Imported here so the parse path (worker.extractors.extract and the
+        # benchmarks built on it) can load this module without a DATABASE_URL
+        from app.settings import settings
+
+        _store = LocalBlobStore(settings.BLOB_STORE_DIR)
+    return _store
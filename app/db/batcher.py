@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Group commit for concurrent single-row calls.
+
+    submit() parks the caller on a future. Items that arrive within
+    `window_ms` of the first one (or until `max_size` is reached) are sent
+    together through one `flush` call, which must return one result per item
+    in the same order. Each caller then gets its own result.
+
+    If a batch call fails and a `single` fallback is given, the items are
+    retried one by one, so one bad row only fails its own caller.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[list[T]], Awaitable[list[R]]],
+        single: Callable[[T], Awaitable[R]] | None = None,
+        window_ms: float = 5.0,
+        max_size: int = 200,
+    ) -> None:
+        self.name = name
+        self._flush = flush
+        self._single = single
+        self._window = window_ms / 1000.0
+        self._max_size = max(1, max_size)
+
+        self._pending: list[tuple[T, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        self._pending.append((item, fut))
+
+        if len(self._pending) >= self._max_size:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush_pending)
+
+        return await fut
+
+    def _flush_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = await self._flush(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name}: batch returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            if self._single is None or len(batch) == 1:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                return
+            logger.warning(f"microbatch_failed name={self.name} size={len(batch)} error={e} retrying_individually")
+            await asyncio.gather(*(self._run_single(item, fut) for item, fut in batch))
+            return
+
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    async def _run_single(self, item: T, fut: asyncio.Future) -> None:
+        try:
+            result = await self._single(item)  # type: ignore[misc]
+        except Exception as e:
+            if not fut.done():
+                fut.set_exception(e)
+            return
+        if not fut.done():
+            fut.set_result(result)
+
+    async def drain(self) -> None:
+        """Flush anything pending and wait for in-flight batches (shutdown)."""
+        self._flush_pending()
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
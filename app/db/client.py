@@ -1,4 +1,8 @@
+import time
+from contextlib import asynccontextmanager
+
 import asyncpg
+from app.metrics import DB_POOL_WAIT_SECONDS, DB_QUERY_SECONDS, query_label
 from app.settings import settings
 
 
@@ -18,22 +22,31 @@ class Db:
             await self.pool.close()
             self.pool = None
 
-    async def fetchval(self, sql: str, *args):
+    @asynccontextmanager
+    async def _acquire(self, sql: str):
+        # Pool wait and query time are recorded separately so pool exhaustion
+        # is distinguishable from slow functions.
         if not self.pool:
             raise RuntimeError("DB not started")
+        t0 = time.perf_counter()
         async with self.pool.acquire() as conn:
+            t1 = time.perf_counter()
+            DB_POOL_WAIT_SECONDS.observe(t1 - t0)
+            try:
+                yield conn
+            finally:
+                DB_QUERY_SECONDS.labels(query=query_label(sql)).observe(time.perf_counter() - t1)
+
+    async def fetchval(self, sql: str, *args):
+        async with self._acquire(sql) as conn:
             return await conn.fetchval(sql, *args)
 
     async def execute(self, sql: str, *args):
-        if not self.pool:
-            raise RuntimeError("DB not started")
-        async with self.pool.acquire() as conn:
+        async with self._acquire(sql) as conn:
             return await conn.execute(sql, *args)
 
     async def fetch(self, sql: str, *args):
-        if not self.pool:
-            raise RuntimeError("DB not started")
-        async with self.pool.acquire() as conn:
+        async with self._acquire(sql) as conn:
             return await conn.fetch(sql, *args)
 
 
@@ -1,6 +1,8 @@
 from typing import Any
 from uuid import UUID
+from app.db.batcher import MicroBatcher
 from app.db.client import db
+from app.settings import settings
 from datetime import datetime
 import json
 
@@ -16,21 +18,90 @@ async def fn_ingest_intake(
     body_html: str | None,
     raw_payload: dict[str, Any],
 ) -> UUID:
+    args = {
+        "source": source,
+        "source_message_id": source_message_id,
+        "received_at": received_at,
+        "recruiter_email": recruiter_email,
+        "subject": subject,
+        "body_text": body_text,
+        "body_html": body_html,
+        "raw_payload": raw_payload,
+    }
+    if settings.DB_MICROBATCH_ENABLED:
+        return await _ingest_batcher.submit(args)
+    return await _ingest_intake_one(args)
+
+async def _ingest_intake_one(args: dict[str, Any]) -> UUID:
     return await db.fetchval(
         """
         select delivery.fn_ingest_intake(
             $1,$2,$3,$4,$5,$6,$7,$8::jsonb
         )
         """,
-        source,
-        source_message_id,
-        received_at,
-        recruiter_email,
-        subject,
-        body_text,
-        body_html,
-        json.dumps(raw_payload),
+        args["source"],
+        args["source_message_id"],
+        args["received_at"],
+        args["recruiter_email"],
+        args["subject"],
+        args["body_text"],
+        args["body_html"],
+        json.dumps(args["raw_payload"]),
+    )
+
+async def fn_ingest_intakes_batch(intakes: list[dict[str, Any]]) -> list[UUID]:
+    """One intake_id per input dict (fn_ingest_intake parameters), in input order."""
+    rows = await db.fetch(
+        """
+        select * from delivery.fn_ingest_intakes_batch(
+            $1::text[],$2::text[],$3::timestamptz[],$4::text[],$5::text[],$6::text[],$7::text[],$8::jsonb[]
+        )
+        """,
+        [i["source"] for i in intakes],
+        [i["source_message_id"] for i in intakes],
+        [i.get("received_at") for i in intakes],
+        [i.get("recruiter_email") for i in intakes],
+        [i.get("subject") for i in intakes],
+        [i.get("body_text") for i in intakes],
+        [i.get("body_html") for i in intakes],
+        [json.dumps(i.get("raw_payload") or {}) for i in intakes],
+    )
+    return [r["intake_id"] for r in rows]
+
+async def fn_ingest_intakes_with_artifacts_batch(
+    intakes: list[dict[str, Any]],
+    attachments: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """
+    intakes: dicts with the fn_ingest_intake parameters.
+    attachments: dicts with the fn_register_artifact parameters, except
+    intake_id is replaced by intake_ordinal (1-based position in intakes).
+    Returns one row per (intake, attachment), intakes without attachments
+    included with attachment_ordinal/artifact_id None.
+    """
+    rows = await db.fetch(
+        """
+        select * from delivery.fn_ingest_intakes_with_artifacts_batch(
+            $1::text[],$2::text[],$3::timestamptz[],$4::text[],$5::text[],$6::text[],$7::text[],$8::jsonb[],
+            $9::int[],$10::text[],$11::text[],$12::text[],$13::text[],$14::text[]
+        )
+        """,
+        [i["source"] for i in intakes],
+        [i["source_message_id"] for i in intakes],
+        [i.get("received_at") for i in intakes],
+        [i.get("recruiter_email") for i in intakes],
+        [i.get("subject") for i in intakes],
+        [i.get("body_text") for i in intakes],
+        [i.get("body_html") for i in intakes],
+        [json.dumps(i.get("raw_payload") or {}) for i in intakes],
+        [a["intake_ordinal"] for a in attachments],
+        [a["artifact_type"] for a in attachments],
+        [a.get("file_name") for a in attachments],
+        [a.get("mime_type") for a in attachments],
+        [a.get("storage_uri") for a in attachments],
+        [a.get("sha256") for a in attachments],
     )
+    return [dict(r) for r in rows]
 
 async def fn_register_artifact(
     intake_id: UUID,
@@ -40,6 +111,19 @@ async def fn_register_artifact(
     storage_uri: str | None,
     sha256: str,
 ) -> UUID:
+    args = {
+        "intake_id": intake_id,
+        "artifact_type": artifact_type,
+        "file_name": file_name,
+        "mime_type": mime_type,
+        "storage_uri": storage_uri,
+        "sha256": sha256,
+    }
+    if settings.DB_MICROBATCH_ENABLED:
+        return await _register_batcher.submit(args)
+    return await _register_artifact_one(args)
+
+async def _register_artifact_one(args: dict[str, Any]) -> UUID:
     return await db.fetchval(
         """
         select delivery.fn_register_artifact(
@@ -51,13 +135,51 @@ async def fn_register_artifact(
             $6::text
         )
         """,
-        intake_id,
-        artifact_type,
-        file_name,
-        mime_type,
-        storage_uri,
-        sha256,
+        args["intake_id"],
+        args["artifact_type"],
+        args["file_name"],
+        args["mime_type"],
+        args["storage_uri"],
+        args["sha256"],
+    )
+
+async def fn_register_artifacts_batch(artifacts: list[dict[str, Any]]) -> list[UUID]:
+    """One artifact_id per input dict (fn_register_artifact parameters), in input order."""
+    rows = await db.fetch(
+        """
+        select * from delivery.fn_register_artifacts_batch(
+            $1::uuid[],$2::text[],$3::text[],$4::text[],$5::text[],$6::text[]
+        )
+        """,
+        [a["intake_id"] for a in artifacts],
+        [a["artifact_type"] for a in artifacts],
+        [a.get("file_name") for a in artifacts],
+        [a.get("mime_type") for a in artifacts],
+        [a.get("storage_uri") for a in artifacts],
+        [a.get("sha256") for a in artifacts],
     )
+    return [r["artifact_id"] for r in rows]
+
+# Opt-in group commit (DB_MICROBATCH_ENABLED): concurrent ingest/register
+# calls within a few ms share one multi-row function call and one connection.
+_ingest_batcher = MicroBatcher(
+    "ingest_intake",
+    fn_ingest_intakes_batch,
+    _ingest_intake_one,
+    window_ms=settings.DB_MICROBATCH_WINDOW_MS,
+    max_size=settings.DB_MICROBATCH_MAX_SIZE,
+)
+_register_batcher = MicroBatcher(
+    "register_artifact",
+    fn_register_artifacts_batch,
+    _register_artifact_one,
+    window_ms=settings.DB_MICROBATCH_WINDOW_MS,
+    max_size=settings.DB_MICROBATCH_MAX_SIZE,
+)
+
+async def drain_microbatchers() -> None:
+    await _ingest_batcher.drain()
+    await _register_batcher.drain()
 
 async def fn_list_registered_artifacts_live(limit: int) -> list[dict[str, Any]]:
     rows = await db.fetch(
@@ -73,27 +195,359 @@ async def fn_list_registered_artifacts_backfill(limit: int) -> list[dict[str, An
     )
     return [dict(r) for r in rows]
 
-async def fn_claim_artifact_for_extraction(artifact_id: UUID) -> bool:
+async def fn_claim_artifact_for_extraction(
+    artifact_id: UUID,
+    worker_id: str | None = None,
+    lease_seconds: int = 300,
+) -> bool:
     v = await db.fetchval(
-        "select delivery.fn_claim_artifact_for_extraction($1::uuid)",
+        "select delivery.fn_claim_artifact_for_extraction($1::uuid,$2::text,$3::int)",
         artifact_id,
+        worker_id,
+        lease_seconds,
     )
     return bool(v)
 
-async def fn_finalize_artifact_extraction(artifact_id: UUID, extracted_text: str, extracted_json: dict[str, Any]) -> None:
-    await db.execute(
-        "select delivery.fn_finalize_artifact_extraction($1::uuid,$2::text,$3::jsonb)",
+async def fn_claim_artifacts_by_ids(
+    artifact_ids: list[UUID],
+    worker_id: str | None = None,
+    lease_seconds: int = 300,
+) -> list[dict[str, Any]]:
+    """Claims the listed artifacts still registered (or already held by worker_id); the rest are left out."""
+    rows = await db.fetch(
+        "select * from delivery.fn_claim_artifacts_by_ids($1::uuid[],$2::text,$3::int)",
+        artifact_ids,
+        worker_id,
+        lease_seconds,
+    )
+    return [dict(r) for r in rows]
+
+async def fn_claim_registered_artifacts(
+    lane: str,
+    limit: int,
+    worker_id: str | None = None,
+    lease_seconds: int = 300,
+) -> list[dict[str, Any]]:
+    rows = await db.fetch(
+        "select * from delivery.fn_claim_registered_artifacts($1::text,$2::int,$3::text,$4::int)",
+        lane,
+        limit,
+        worker_id,
+        lease_seconds,
+    )
+    return [dict(r) for r in rows]
+
+async def fn_heartbeat_artifacts(worker_id: str, artifact_ids: list[UUID], lease_seconds: int = 300) -> list[UUID]:
+    """Returns the ids whose lease was extended (still claimed by worker_id)."""
+    rows = await db.fetch(
+        "select * from delivery.fn_heartbeat_artifacts($1::text,$2::uuid[],$3::int)",
+        worker_id,
+        artifact_ids,
+        lease_seconds,
+    )
+    return [r["artifact_id"] for r in rows]
+
+async def fn_reclaim_expired_artifact_leases(limit: int = 500, max_attempts: int = 5) -> int:
+    v = await db.fetchval(
+        "select delivery.fn_reclaim_expired_artifact_leases($1::int,$2::int)",
+        limit,
+        max_attempts,
+    )
+    return int(v or 0)
+
+async def fn_finalize_artifact_extraction(
+    artifact_id: UUID,
+    extracted_text: str,
+    extracted_json: dict[str, Any],
+    worker_id: str | None,
+) -> bool:
+    """False when the claim is no longer held by worker_id; nothing was written."""
+    v = await db.fetchval(
+        "select delivery.fn_finalize_artifact_extraction($1::uuid,$2::text,$3::jsonb,$4::text)",
         artifact_id,
         extracted_text,
         json.dumps(extracted_json),
+        worker_id,
     )
+    return bool(v)
 
-async def fn_fail_artifact(artifact_id: UUID, error: str) -> None:
-    await db.execute(
-        "select delivery.fn_fail_artifact($1::uuid,$2::text)",
+async def fn_finalize_artifacts_batch(artifacts: list[dict[str, Any]], worker_id: str | None) -> int:
+    """
+    fn_finalize_artifact_extraction for many artifacts in one call; dicts
+    with artifact_id, extracted_text and extracted_json. Returns how many
+    were written (claims no longer held by worker_id are skipped).
+    """
+    if not artifacts:
+        return 0
+    v = await db.fetchval(
+        "select delivery.fn_finalize_artifacts_batch($1::uuid[],$2::text[],$3::jsonb[],$4::text)",
+        [a["artifact_id"] for a in artifacts],
+        [a["extracted_text"] for a in artifacts],
+        [json.dumps(a["extracted_json"]) for a in artifacts],
+        worker_id,
+    )
+    return int(v or 0)
+
+async def fn_finalize_artifact_from_cache(artifact_id: UUID, sha256: str, worker_id: str | None) -> UUID | None:
+    """The source artifact_id, or None on a cache miss or when the claim is no longer held by worker_id."""
+    return await db.fetchval(
+        "select delivery.fn_finalize_artifact_from_cache($1::uuid,$2::text,$3::text)",
+        artifact_id,
+        sha256,
+        worker_id,
+    )
+
+async def fn_fail_artifact(artifact_id: UUID, error: str, worker_id: str | None) -> bool:
+    """False when the claim is no longer held by worker_id; nothing was written."""
+    v = await db.fetchval(
+        "select delivery.fn_fail_artifact($1::uuid,$2::text,$3::text)",
         artifact_id,
         error,
+        worker_id,
+    )
+    return bool(v)
+
+async def fn_fail_artifacts_batch(errors: dict[UUID, str], worker_id: str | None) -> int:
+    """fn_fail_artifact for many artifacts in one call. Returns how many were written."""
+    if not errors:
+        return 0
+    ids = list(errors)
+    v = await db.fetchval(
+        "select delivery.fn_fail_artifacts_batch($1::uuid[],$2::text[],$3::text)",
+        ids,
+        [errors[i] for i in ids],
+        worker_id,
+    )
+    return int(v or 0)
+
+async def fn_retry_artifact(
+    artifact_id: UUID,
+    error: str,
+    worker_id: str | None,
+    max_attempts: int = 5,
+    base_delay_seconds: int = 30,
+    max_delay_seconds: int = 3600,
+    min_delay_seconds: int | None = None,
+) -> str | None:
+    """
+    Reschedule after a transient failure. Returns 'registered', or 'failed' at
+    the attempt cap; None when the claim is no longer held by worker_id.
+    """
+    return await db.fetchval(
+        "select delivery.fn_retry_artifact($1::uuid,$2::text,$3::text,$4::int,$5::int,$6::int,$7::int)",
+        artifact_id,
+        error,
+        worker_id,
+        max_attempts,
+        base_delay_seconds,
+        max_delay_seconds,
+        min_delay_seconds,
+    )
+
+async def fn_resolve_concept_code(concept_type: str, raw_text: str) -> str | None:
+    return await db.fetchval(
+        "select core.fn_resolve_concept_code($1::text,$2::text)",
+        concept_type,
+        raw_text,
+    )
+
+async def fn_resolve_concept_codes(pairs: list[tuple[str, str]]) -> list[str | None]:
+    """canonical_code (or None) per (concept_type, raw_text) pair, in input order."""
+    rows = await db.fetch(
+        "select * from core.fn_resolve_concept_codes($1::text[],$2::text[])",
+        [t for t, _ in pairs],
+        [r for _, r in pairs],
+    )
+    return [r["canonical_code"] for r in rows]
+
+async def fn_list_concept_aliases_since(since: datetime | None) -> list[dict[str, Any]]:
+    rows = await db.fetch(
+        "select * from core.fn_list_concept_aliases_since($1::timestamptz)",
+        since,
+    )
+    return [dict(r) for r in rows]
+
+async def fn_get_embedding_hashes(entity_type: str, entity_ids: list[UUID], embedding_type: str) -> dict[UUID, str]:
+    """entity_id -> content_hash for the entities that already have an embedding."""
+    rows = await db.fetch(
+        "select * from core.fn_get_embedding_hashes($1::text,$2::uuid[],$3::text)",
+        entity_type,
+        entity_ids,
+        embedding_type,
+    )
+    return {r["entity_id"]: r["content_hash"] for r in rows}
+
+async def fn_upsert_embeddings_batch(
+    entity_type: str,
+    embedding_type: str,
+    rows: list[dict[str, Any]],
+) -> int:
+    """
+    rows: {entity_id, content_hash, source_text, embedding (pgvector text,
+    e.g. '[0.1,0.2]')}. Returns rows written (unchanged hashes are skipped).
+    """
+    v = await db.fetchval(
+        "select core.fn_upsert_embeddings_batch($1::text,$2::text,$3::uuid[],$4::text[],$5::text[],$6::text[])",
+        entity_type,
+        embedding_type,
+        [r["entity_id"] for r in rows],
+        [r["content_hash"] for r in rows],
+        [r.get("source_text") for r in rows],
+        [r["embedding"] for r in rows],
+    )
+    return int(v or 0)
+
+async def fn_list_candidates_for_embedding(
+    after_candidate_id: UUID | None,
+    limit: int = 500,
+    updated_since: datetime | None = None,
+) -> list[dict[str, Any]]:
+    rows = await db.fetch(
+        "select * from delivery.fn_list_candidates_for_embedding($1::uuid,$2::int,$3::timestamptz)",
+        after_candidate_id,
+        limit,
+        updated_since,
+    )
+    return [{**dict(r), "facts": json.loads(r["facts"]) if r["facts"] else {}} for r in rows]
+
+async def fn_upsert_candidate(
+    phone_e164: str | None,
+    email: str | None,
+    full_name: str | None,
+    timezone: str | None,
+    facts_patch: dict[str, Any] | None,
+) -> UUID:
+    return await db.fetchval(
+        "select delivery.fn_upsert_candidate($1::text,$2::text,$3::text,$4::text,null,$5::jsonb)",
+        phone_e164,
+        email,
+        full_name,
+        timezone,
+        json.dumps(facts_patch or {}),
+    )
+
+async def fn_upsert_candidates_batch(candidates: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    candidates: {phone_e164, email, full_name, timezone, home_lat, home_lon,
+    facts_patch}, all optional. Returns {ordinal, candidate_id, created} per
+    input, in input order; the same candidates as fn_upsert_candidate called
+    once per input, in order.
+    """
+    rows = await db.fetch(
+        """
+        select * from delivery.fn_upsert_candidates_batch(
+            $1::text[],$2::text[],$3::text[],$4::text[],$5::float8[],$6::float8[],$7::jsonb[]
+        )
+        """,
+        [c.get("phone_e164") for c in candidates],
+        [c.get("email") for c in candidates],
+        [c.get("full_name") for c in candidates],
+        [c.get("timezone") for c in candidates],
+        [c.get("home_lat") for c in candidates],
+        [c.get("home_lon") for c in candidates],
+        [json.dumps(c.get("facts_patch") or {}) for c in candidates],
+    )
+    return [dict(r) for r in rows]
+
+async def fn_link_intake_candidate(
+    intake_id: UUID,
+    candidate_id: UUID,
+    match_type: str,
+    confidence: float | None = None,
+) -> None:
+    await db.execute(
+        "select delivery.fn_link_intake_candidate($1::uuid,$2::uuid,$3::text,$4::numeric)",
+        intake_id,
+        candidate_id,
+        match_type,
+        confidence,
+    )
+
+async def fn_link_intake_candidates_batch(links: list[dict[str, Any]]) -> int:
+    """links: {intake_id, candidate_id, match_type, confidence}. Returns rows written."""
+    v = await db.fetchval(
+        "select delivery.fn_link_intake_candidates_batch($1::uuid[],$2::uuid[],$3::text[],$4::numeric[])",
+        [l["intake_id"] for l in links],
+        [l["candidate_id"] for l in links],
+        [l["match_type"] for l in links],
+        [l.get("confidence") for l in links],
+    )
+    return int(v or 0)
+
+async def fn_match_candidates(
+    query_embedding: str,
+    limit: int = 20,
+    embedding_type: str = "candidate_profile",
+    center_lat: float | None = None,
+    center_lon: float | None = None,
+    radius_m: float | None = None,
+    statuses: list[str] | None = None,
+    availability: list[str] | None = None,
+    ef_search: int = 100,
+    overfetch: int = 4,
+    exact_max_rows: int = 5000,
+) -> list[dict[str, Any]]:
+    """query_embedding in pgvector text form. Rows come back best match first."""
+    rows = await db.fetch(
+        """
+        select * from delivery.fn_match_candidates(
+            $1::text,$2::int,$3::text,$4::float8,$5::float8,$6::float8,$7::text[],$8::text[],$9::int,$10::int,$11::int
+        )
+        """,
+        query_embedding,
+        limit,
+        embedding_type,
+        center_lat,
+        center_lon,
+        radius_m,
+        statuses,
+        availability,
+        ef_search,
+        overfetch,
+        exact_max_rows,
+    )
+    return [dict(r) for r in rows]
+
+async def fn_search_artifacts(
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    artifact_types: list[str] | None = None,
+) -> list[dict[str, Any]]:
+    """Best match first; each row carries rank and a highlighted headline."""
+    rows = await db.fetch(
+        "select * from delivery.fn_search_artifacts($1::text,$2::int,$3::int,$4::text[])",
+        query,
+        limit,
+        offset,
+        artifact_types,
+    )
+    return [dict(r) for r in rows]
+
+async def fn_list_artifacts_for_classification(
+    after_artifact_id: UUID | None,
+    limit: int = 1000,
+    max_chars: int = 50000,
+) -> list[dict[str, Any]]:
+    rows = await db.fetch(
+        "select * from delivery.fn_list_artifacts_for_classification($1::uuid,$2::int,$3::int)",
+        after_artifact_id,
+        limit,
+        max_chars,
+    )
+    return [dict(r) for r in rows]
+
+async def fn_set_artifact_classifications_batch(classifications: dict[UUID, dict[str, Any]]) -> int:
+    """Merge classification fields into extracted_json, one call for the batch."""
+    if not classifications:
+        return 0
+    ids = list(classifications)
+    v = await db.fetchval(
+        "select delivery.fn_set_artifact_classifications_batch($1::uuid[],$2::jsonb[])",
+        ids,
+        [json.dumps(classifications[i]) for i in ids],
     )
+    return int(v or 0)
 
 async def fetch(self, sql: str, *args):
         if not self.pool:
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+from typing import Protocol
+
+from app.settings import settings
+
+
+class EmbeddingBackend(Protocol):
+    """Local embedding model: a batch of texts in, one vector per text out."""
+
+    name: str
+    dim: int
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        ...
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddingBackend:
+    """
+    Deterministic feature-hashing embedding: each token and token bigram adds
+    +/-1 to a bucket picked by blake2b, then the vector is L2-normalised.
+
+    No model and no dependencies; shared vocabulary gives cosine similarity,
+    which is enough for tests and for running the pipeline without a model.
+    """
+
+    def __init__(self, dim: int = 384) -> None:
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> list[str]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        out: list[list[float]] = []
+        for text in texts:
+            vec = [0.0] * self.dim
+            for feature in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                vec[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+            norm = math.sqrt(sum(v * v for v in vec))
+            out.append([v / norm for v in vec] if norm else vec)
+        return out
+
+
+class SentenceTransformerBackend:
+    """sentence-transformers model, loaded once per process."""
+
+    def __init__(self, model_name: str) -> None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_BACKEND=sentence_transformers requires the sentence-transformers package"
+            ) from e
+
+        self._model = SentenceTransformer(model_name)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+        self.name = model_name
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        vectors = self._model.encode(texts, batch_size=len(texts) or 1, normalize_embeddings=True)
+        return [v.tolist() for v in vectors]
+
+
+_backend: EmbeddingBackend | None = None
+
+
+def get_backend() -> EmbeddingBackend:
+    global _backend
+    if _backend is None:
+        kind = settings.EMBEDDING_BACKEND.lower()
+        if kind == "hashing":
+            _backend = HashingEmbeddingBackend(settings.EMBEDDING_DIM)
+        elif kind == "sentence_transformers":
+            if not settings.EMBEDDING_MODEL:
+                raise RuntimeError("EMBEDDING_MODEL is required for EMBEDDING_BACKEND=sentence_transformers")
+            _backend = SentenceTransformerBackend(settings.EMBEDDING_MODEL)
+        else:
+            raise RuntimeError(f"Unknown EMBEDDING_BACKEND: {settings.EMBEDDING_BACKEND}")
+    return _backend
+
+
+def content_hash(backend: EmbeddingBackend, text: str) -> str:
+    # The backend name is part of the hash so switching models re-embeds
+    return hashlib.sha256(f"{backend.name}\n{text}".encode("utf-8")).hexdigest()
+
+
+def vector_literal(vector: list[float]) -> str:
+    """pgvector text form, for passing vectors as text[]."""
+    return "[" + ",".join(f"{v:.7g}" for v in vector) + "]"
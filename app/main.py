@@ -1,7 +1,13 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request, Response
 from app.db.client import db
+from app.db.functions import drain_microbatchers
 from app.api.intakes import router as intake_router
 from app.api.artifacts import router as artifacts_router
+from app.api.candidates import router as candidates_router
+from app.api.search import router as search_router
+from app.metrics import HTTP_REQUEST_SECONDS, render_latest
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -11,6 +17,26 @@ app = FastAPI(title="CBL Aero Intake API", version="0.1.0")
 
 app.include_router(intake_router)
 app.include_router(artifacts_router)
+app.include_router(candidates_router)
+app.include_router(search_router)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template, not raw path, to keep label cardinality bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        ).observe(time.perf_counter() - t0)
 
 
 @app.on_event("startup")
@@ -20,6 +46,7 @@ async def startup():
 
 @app.on_event("shutdown")
 async def shutdown():
+    await drain_microbatchers()
     await db.stop()
 
 
@@ -32,3 +59,9 @@ async def health():
 async def health_db():
     v = await db.fetchval("select 1")
     return {"db": "ok", "value": v}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,133 @@
+import re
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+
+# Shared by the API and the worker; each process exposes its own registry
+# (API: GET /metrics, worker: WORKER_METRICS_PORT).
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# API
+HTTP_REQUEST_SECONDS = Histogram(
+    "cbl_http_request_seconds",
+    "API request latency",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+# Db pool
+DB_POOL_WAIT_SECONDS = Histogram(
+    "cbl_db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=_LATENCY_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "cbl_db_query_seconds",
+    "Stored function call latency, by function",
+    ["query"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+# Worker stages: claim, download, parse, normalize, finalize, retry, fail, cache, embed, embed_write
+WORKER_STAGE_SECONDS = Histogram(
+    "cbl_worker_stage_seconds",
+    "Worker stage latency",
+    ["stage", "lane"],
+    buckets=_LATENCY_BUCKETS,
+)
+WORKER_STAGE_TOTAL = Counter(
+    "cbl_worker_stage_total",
+    "Worker stage outcomes",
+    ["stage", "lane", "outcome"],
+)
+WORKER_INFLIGHT = Gauge(
+    "cbl_worker_inflight_artifacts",
+    "Artifacts claimed and not yet finalized/failed, by lane",
+    ["lane"],
+)
+DOWNLOAD_SECONDS = Histogram(
+    "cbl_download_seconds",
+    "Artifact download latency",
+    ["source", "host"],
+    buckets=_LATENCY_BUCKETS,
+)
+DOWNLOAD_BYTES = Counter(
+    "cbl_download_bytes_total",
+    "Artifact bytes downloaded",
+    ["source", "host"],
+)
+DOWNLOAD_CACHE_TOTAL = Counter(
+    "cbl_download_cache_total",
+    "Worker download cache results (hit, revalidated, miss, coalesced)",
+    ["result"],
+)
+HOST_CONCURRENCY_LIMIT = Gauge(
+    "cbl_host_concurrency_limit",
+    "Adaptive per-host download concurrency limit",
+    ["host"],
+)
+HOST_LIMITER_WAIT_SECONDS = Histogram(
+    "cbl_host_limiter_wait_seconds",
+    "Time a download waited for its host's rate/concurrency limiter",
+    ["host"],
+    buckets=_LATENCY_BUCKETS,
+)
+HOST_THROTTLED_TOTAL = Counter(
+    "cbl_host_throttled_total",
+    "429/503 responses by host",
+    ["host", "status"],
+)
+PARSE_SECONDS = Histogram(
+    "cbl_parse_seconds",
+    "Text extraction latency inside the parser process",
+    ["parser", "format"],
+    buckets=_LATENCY_BUCKETS,
+)
+CLASSIFICATIONS_TOTAL = Counter(
+    "cbl_classifications_total",
+    "Rule-based artifact classifications (needs_review = low confidence, LLM fallback candidate)",
+    ["artifact_type", "needs_review"],
+)
+STRUCTURED_MISSING_TOTAL = Counter(
+    "cbl_structured_missing_total",
+    "Expected structured fields the rules did not find (LLM fallback candidates)",
+    ["artifact_type", "field"],
+)
+EXTRACTION_CACHE_TOTAL = Counter(
+    "cbl_extraction_cache_total",
+    "sha256 extraction cache lookups",
+    ["lane", "result"],
+)
+EMBEDDINGS_TOTAL = Counter(
+    "cbl_embeddings_total",
+    "Embedding stage outcomes per entity (unchanged = content_hash matched, skipped)",
+    ["embedding_type", "outcome"],
+)
+
+_FN_RE = re.compile(r"\b(core|delivery)\.(fn_\w+)")
+
+
+def query_label(sql: str) -> str:
+    m = _FN_RE.search(sql)
+    return f"{m.group(1)}.{m.group(2)}" if m else "other"
+
+
+def render_latest() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+@contextmanager
+def observe_stage(stage: str, lane: str) -> Iterator[None]:
+    """Time a worker stage and count its outcome (ok / error)."""
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        WORKER_STAGE_SECONDS.labels(stage=stage, lane=lane).observe(time.perf_counter() - t0)
+        WORKER_STAGE_TOTAL.labels(stage=stage, lane=lane, outcome=outcome).inc()
@@ -3,6 +3,27 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Session-mode connection for LISTEN (transaction poolers drop notifications).
+    # Falls back to DATABASE_URL.
+    DATABASE_LISTEN_URL: str | None = None
+
+    # Group commit for /v1/intakes/ingest and /v1/artifacts/register
+    DB_MICROBATCH_ENABLED: bool = False
+    DB_MICROBATCH_WINDOW_MS: float = 5.0
+    DB_MICROBATCH_MAX_SIZE: int = 200
+
+    # Embeddings (worker backfill and query-time embedding). "hashing" is a
+    # deterministic, dependency-free backend; "sentence_transformers" needs
+    # the sentence-transformers package and EMBEDDING_MODEL.
+    EMBEDDING_BACKEND: str = "hashing"
+    EMBEDDING_MODEL: str | None = None
+    EMBEDDING_DIM: int = 384
+    EMBEDDING_BATCH_SIZE: int = 64
+
+    # Content-addressed store for POST /v1/artifacts/upload (blob://<sha256>);
+    # the worker reads blobs from the same directory
+    BLOB_STORE_DIR: str = "./blobs"
+    BLOB_MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,142 @@
+"""
+Classifier benchmark: worker/extractors/classify.py over synthetic extracted
+text, one document shape per artifact type plus an invoice for "other".
+
+Reports documents/s, MB/s and per-document latency percentiles per shape,
+and projects how long a corpus of --corpus-docs documents takes on one core.
+
+    python -m bench.bench_classify
+    python -m bench.bench_classify --save-baseline classify_base.json
+    python -m bench.bench_classify --baseline classify_base.json   # exit 1 on regression
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from bench.bench_extract import _percentile, compare
+from bench.corpus import _sentence
+
+
+HEADERS = {
+    "resume": (
+        "JANE DOE\njane.doe@example.com\nProfessional Summary\nWork Experience\n"
+        "2016 - Present  Lead A&P Mechanic\nResponsibilities\nSkills\nEducation\n"
+    ),
+    "drivers_license": (
+        "TEXAS DRIVER LICENSE\nDL No. 12345678\nCLASS C\nDOB 04/05/1986\nEXP 04/05/2029\n"
+        "SEX F HGT 5-06 EYES: BRN\nRSTR NONE\n"
+    ),
+    "faa_certificate": (
+        "FEDERAL AVIATION ADMINISTRATION\nAIRMAN CERTIFICATE\nThis certifies that JANE DOE has been "
+        "found to be properly qualified\nCertificate No. 3456789\nRATINGS: AIRFRAME AND POWERPLANT\n"
+        "Date of issue 02/03/2012\nFAA Form 8060-4\n"
+    ),
+    "intake_form": (
+        "Candidate Intake Form\nPlease print clearly\nApplicant Name: ______\nPosition applied for: ______\n"
+        "Emergency contact ______\nSignature: ______\n"
+    ),
+    "other": "INVOICE 20931\nBill to: Hangar Services LLC\nNet 30\n",
+}
+
+# Filler for "other": the aviation vocabulary in bench.corpus.WORDS pairs up
+# into certificate phrases by chance over a few hundred lines
+OTHER_WORDS = (
+    "invoice quantity unit price subtotal tax total due shipping handling order "
+    "purchase net terms remit payment account balance credit memo parts supply"
+).split()
+
+# Filler lines after the header; (lines, label)
+SIZES = ((40, "short"), (400, "long"))
+
+
+def build_docs(seed: int = 1234) -> dict[str, str]:
+    rng = random.Random(seed)
+    docs = {}
+    for kind, header in HEADERS.items():
+        for lines, label in SIZES:
+            if kind == "other":
+                filler = (" ".join(rng.choice(OTHER_WORDS) for _ in range(12)) for _ in range(lines))
+            else:
+                filler = (_sentence(rng) for _ in range(lines))
+            docs[f"{kind}/{label}"] = header + "\n".join(filler)
+    return docs
+
+
+def run(iterations: int) -> dict[str, dict[str, Any]]:
+    from worker.extractors.classify import classify_text
+
+    results: dict[str, dict[str, Any]] = {}
+    for case, text in build_docs().items():
+        detected = classify_text(text).artifact_type  # warm-up, not measured
+        latencies: list[float] = []
+        t_start = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            classify_text(text)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - t_start
+
+        results[case] = {
+            "n": iterations,
+            "errors": 0,
+            "detected": detected,
+            "files_per_s": round(iterations / elapsed, 2),
+            "mb_per_s": round(iterations * len(text.encode("utf-8")) / elapsed / 1e6, 2),
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+            "chars": len(text),
+        }
+        res = results[case]
+        print(
+            f"{case:24s} -> {detected:16s} {res['files_per_s']:>10.1f} docs/s {res['mb_per_s']:>7.2f} MB/s "
+            f"p50={res['p50_ms']:>7.3f}ms p95={res['p95_ms']:>7.3f}ms chars={res['chars']}",
+            flush=True,
+        )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--iterations", type=int, default=500)
+    ap.add_argument("--corpus-docs", type=int, default=300_000, help="corpus size for the projection")
+    ap.add_argument("--json", help="write results as JSON to this file")
+    ap.add_argument("--save-baseline", help="write results as the new baseline")
+    ap.add_argument("--baseline", help="compare against this baseline; exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    args = ap.parse_args(argv)
+
+    results = run(args.iterations)
+
+    mean_ms = statistics.fmean(r["mean_ms"] for r in results.values())
+    print(f"\nprojected: {args.corpus_docs} docs in {args.corpus_docs * mean_ms / 1000 / 60:.1f} min on one core")
+
+    mismatched = [case for case, r in results.items() if r["detected"] != case.split("/")[0]]
+    if mismatched:
+        print(f"misclassified: {', '.join(mismatched)}", file=sys.stderr)
+
+    for out in (args.json, args.save_baseline):
+        if out:
+            Path(out).write_text(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.baseline:
+        problems = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:", file=sys.stderr)
+            for p in problems:
+                print(f"  {p}", file=sys.stderr)
+            return 1
+        print("\nno regressions against baseline")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
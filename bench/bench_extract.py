@@ -0,0 +1,202 @@
+"""
+Extraction benchmarks over the synthetic corpus (bench/corpus.py), served
+by a local HTTP / fake Graph stand-in (bench/fileserver.py).
+
+Groups, each run per corpus file kind:
+
+    sniff           sniff_format on the first bytes
+    parse           extract_text_from_body (pypdf / python-docx / text)
+    download_http   download_body against the local file server
+    download_graph  download_sharepoint_body against the fake Graph endpoint
+    end_to_end      extract_text_from_url (download + parse + classify)
+
+Every (group, kind) case runs in a fresh spawned process so its peak RSS
+is its own. Reports throughput, per-file latency percentiles and peak RSS.
+
+    python -m bench.bench_extract                          # report
+    python -m bench.bench_extract --save-baseline base.json
+    python -m bench.bench_extract --baseline base.json     # exit 1 on regression
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from bench.corpus import build_corpus
+from bench.fileserver import LocalFileServer
+
+
+GROUPS = ("sniff", "parse", "download_http", "download_graph", "end_to_end")
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _chunks(data: bytes, size: int = 64 * 1024):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def _run_case(group: str, name: str, corpus_dir: str, base_url: str, iterations: int) -> dict[str, Any]:
+    """Runs inside a spawned child process."""
+    # Repeated downloads of one URL would be cache hits; measure the transfer
+    os.environ.setdefault("WORKER_DOWNLOAD_CACHE_MAX_BYTES", "0")
+    from worker.extractors import extract
+    from worker.utils import graph_download
+    from worker.utils.spool import spool_chunks
+
+    path = Path(corpus_dir) / name
+    data = path.read_bytes()
+    url = f"{base_url}/files/{name}"
+
+    if group == "download_graph":
+        # Point the Graph path at the stand-in; no AAD round trip
+        graph_download.GRAPH_BASE = f"{base_url}/v1.0"
+        graph_download.get_graph_access_token = lambda: "bench-token"
+        url = f"https://bench.sharepoint.com/personal/{name}"
+
+    def once() -> None:
+        if group == "sniff":
+            extract.sniff_format(data[:4096])
+        elif group == "parse":
+            body = spool_chunks(_chunks(data), reject_html=False)
+            try:
+                extract.extract_text_from_body(body, {}, url)
+            finally:
+                body.cleanup()
+        elif group == "download_http":
+            body, _ = extract.download_body(url)
+            body.cleanup()
+        elif group == "download_graph":
+            body, _ = graph_download.download_sharepoint_body(url)
+            body.cleanup()
+        elif group == "end_to_end":
+            extract.extract_text_from_url(url)
+        else:
+            raise ValueError(group)
+
+    # Warm-up (imports, pooled connections) is not measured
+    errors = 0
+    try:
+        once()
+    except Exception:
+        pass
+
+    latencies: list[float] = []
+    t_start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            once()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - t_start
+
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "n": iterations,
+        "errors": errors,
+        "files_per_s": round(iterations / elapsed, 2) if elapsed else 0.0,
+        # sniff only reads the head, so bytes/s would be meaningless there
+        "mb_per_s": round(iterations * len(data) / elapsed / 1e6, 2) if elapsed and group != "sniff" else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_kb / 1024, 1),
+        "bytes": len(data),
+    }
+
+
+def run(corpus_dir: str, groups: list[str], iterations: int, sniff_iterations: int) -> dict[str, dict[str, Any]]:
+    manifest = build_corpus(corpus_dir)
+    ctx = mp.get_context("spawn")
+    results: dict[str, dict[str, Any]] = {}
+
+    with LocalFileServer(corpus_dir) as server:
+        for group in groups:
+            for name, kind in manifest.items():
+                if group == "parse" and kind == "html_error":
+                    continue
+                n = sniff_iterations if group == "sniff" else iterations
+                with ctx.Pool(1) as pool:
+                    res = pool.apply(_run_case, (group, name, corpus_dir, server.base_url, n))
+                results[f"{group}/{kind}"] = res
+                print(
+                    f"{group + '/' + kind:32s} n={res['n']:<5d} err={res['errors']:<3d} "
+                    f"{res['files_per_s']:>10.2f} files/s {res['mb_per_s']:>9.2f} MB/s "
+                    f"p50={res['p50_ms']:>9.3f}ms p95={res['p95_ms']:>9.3f}ms p99={res['p99_ms']:>9.3f}ms "
+                    f"rss={res['peak_rss_mb']:>7.1f}MB",
+                    flush=True,
+                )
+    return results
+
+
+def compare(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], tolerance: float) -> list[str]:
+    """Regressions: p50 slower or throughput lower than baseline by more than `tolerance`."""
+    problems: list[str] = []
+    for case, base in baseline.items():
+        cur = results.get(case)
+        if cur is None:
+            continue
+        if base.get("p50_ms") and cur["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            problems.append(f"{case}: p50 {cur['p50_ms']}ms vs baseline {base['p50_ms']}ms")
+        if base.get("files_per_s") and cur["files_per_s"] < base["files_per_s"] * (1 - tolerance):
+            problems.append(f"{case}: {cur['files_per_s']} files/s vs baseline {base['files_per_s']} files/s")
+        if cur["errors"] > base.get("errors", 0):
+            problems.append(f"{case}: {cur['errors']} errors vs baseline {base.get('errors', 0)}")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", default=os.getenv("BENCH_CORPUS_DIR", "/tmp/cbl-bench-corpus"))
+    ap.add_argument("--groups", default=",".join(GROUPS), help="comma separated subset of: " + ", ".join(GROUPS))
+    ap.add_argument("--iterations", type=int, default=10)
+    ap.add_argument("--sniff-iterations", type=int, default=2000)
+    ap.add_argument("--json", help="write results as JSON to this file")
+    ap.add_argument("--save-baseline", help="write results as the new baseline")
+    ap.add_argument("--baseline", help="compare against this baseline; exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    args = ap.parse_args(argv)
+
+    groups = [g.strip() for g in args.groups.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        ap.error(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    results = run(args.corpus, groups, args.iterations, args.sniff_iterations)
+
+    for out in (args.json, args.save_baseline):
+        if out:
+            Path(out).write_text(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.baseline:
+        problems = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:", file=sys.stderr)
+            for p in problems:
+                print(f"  {p}", file=sys.stderr)
+            return 1
+        print("\nno regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Structured field benchmark: worker/extractors/structured.py over a synthetic
+corpus with planted values, --docs documents per artifact type in varied
+formats (phone and date styles, label spellings, filler length).
+
+Reports documents/s, MB/s and per-document latency percentiles per type,
+field recall against the planted values, and the share of documents with a
+missing expected field (the ones the LLM fallback would see). Fixed
+REGRESSIONS inputs are checked first; any failure also exits 1.
+
+    python -m bench.bench_structured
+    python -m bench.bench_structured --save-baseline structured_base.json
+    python -m bench.bench_structured --baseline structured_base.json   # exit 1 on regression
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from bench.bench_extract import _percentile, compare
+from bench.corpus import WORDS
+
+
+FIRST = "Jane John Maria Luis Wei Aisha Robert Emily Carlos Priya Daniel Grace".split()
+LAST = "Doe Smith Garcia Nguyen Okafor Patel Johnson Brown Rivera Kim Schmidt Lopez".split()
+CITIES = (("Wichita", "KS"), ("Savannah", "GA"), ("Dallas", "TX"), ("Phoenix", "AZ"), ("Miami", "FL"),
+          ("Fort Worth", "TX"), ("Long Beach", "CA"), ("Seattle", "WA"))
+STATES = (("TEXAS", "TX"), ("GEORGIA", "GA"), ("KANSAS", "KS"), ("NEW YORK", "NY"), ("NORTH CAROLINA", "NC"))
+MONTHS = "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split()
+
+# (text in the document, expected canonical value)
+CERTS = (("A&P", {"A&P"}), ("A&P/IA", {"A&P", "IA"}), ("Airframe and Powerplant", {"A&P"}),
+         ("NDT Level II", {"NDT Level 2"}), ("FCC GROL", {"FCC GROL"}), ("Commercial Pilot", {"Commercial Pilot"}))
+AIRCRAFT = (("Boeing 737-800", "B737"), ("A320", "A320"), ("Gulfstream G650", "G650"), ("CRJ-700", "CRJ700"),
+            ("Citation X", "Citation X"), ("King Air 350", "King Air 350"), ("E175", "E175"))
+# (text, expected role, certifications named inside the role phrase). A
+# resume whose role carries certifications gets no separate certification
+# line, so losing them to the role match shows up as a recall drop.
+ROLES = (("Lead A&P Mechanic", "Aircraft Mechanic", {"A&P"}), ("A&P Mechanic", "Aircraft Mechanic", {"A&P"}),
+         ("A&P/IA Inspector", "Quality Inspector", {"A&P", "IA"}),
+         ("Avionics Technician", "Avionics Technician", set()),
+         ("QC Inspector", "Quality Inspector", set()), ("Aircraft Maintenance Technician", "Aircraft Mechanic", set()))
+
+# Fixed inputs for bugs seen in the field: (text, artifact type, expected
+# fields; sets must be contained in the values found, None means absent)
+REGRESSIONS: tuple[tuple[str, str, dict[str, Any]], ...] = (
+    ("Licensed A&P mechanic, IA since 2010", "resume", {"roles": {"Aircraft Mechanic"}, "certifications": {"A&P"}}),
+    ("John Smith\nA&P Mechanic at Delta", "resume", {"roles": {"Aircraft Mechanic"}, "certifications": {"A&P"}}),
+    ("Airframe & Powerplant mechanic", "resume", {"roles": {"Aircraft Mechanic"}, "certifications": {"A&P"}}),
+    ("Contact: captain@airline.com", "resume", {"roles": None, "email": "captain@airline.com"}),
+    ("Completed a 300-hour inspection on a 220V line", "resume", {"aircraft": None}),
+)
+
+
+def _phone(rng: random.Random) -> tuple[str, str]:
+    a, b, c = rng.randint(201, 989), rng.randint(200, 999), rng.randint(0, 9999)
+    text = rng.choice((
+        f"({a}) {b}-{c:04d}", f"{a}-{b}-{c:04d}", f"{a}.{b}.{c:04d}", f"+1 {a} {b} {c:04d}",
+        f"1-{a}-{b}-{c:04d}", f"{a}-{b}-{c:04d} x{rng.randint(1, 999)}",
+    ))
+    return text, f"+1{a}{b}{c:04d}"
+
+
+def _date(rng: random.Random, years: tuple[int, int]) -> tuple[str, str]:
+    y, m, d = rng.randint(*years), rng.randint(1, 12), rng.randint(1, 28)
+    text = rng.choice((f"{m:02d}/{d:02d}/{y}", f"{m}-{d}-{y}", f"{MONTHS[m - 1]} {d}, {y}"))
+    return text, f"{y:04d}-{m:02d}-{d:02d}"
+
+
+# The corpus vocabulary without the words the extractor looks for, so a
+# planted value is the only place a field can be found
+FILLER_WORDS = tuple(
+    w for w in WORDS if w not in {"A&P", "IA", "NDT", "Gulfstream", "G650", "Boeing", "737", "Airbus", "A320"}
+)
+
+
+def _filler(rng: random.Random, lines: int) -> str:
+    return "\n".join(" ".join(rng.choice(FILLER_WORDS) for _ in range(12)) for _ in range(lines))
+
+
+def _resume(rng: random.Random, lines: int) -> tuple[str, dict[str, Any]]:
+    first, last = rng.choice(FIRST), rng.choice(LAST)
+    phone, phone_e164 = _phone(rng)
+    city, st = rng.choice(CITIES)
+    email = f"{first}.{last}{rng.randint(1, 99)}@example.com"
+    role_text, role, certs = rng.choice(ROLES)
+    summary = ""
+    if not certs:
+        cert_text, certs = rng.choice(CERTS)
+        summary = f"{cert_text} certified technician.\n"
+    planes = rng.sample(AIRCRAFT, 2)
+    text = (
+        f"{first} {last}\n{email} | {phone}\n{city}, {st} {rng.randint(10000, 99999)}\n"
+        f"Professional Summary\n{summary}Work Experience\n"
+        f"2016 - Present  {role_text}\nMaintained {planes[0][0]} and {planes[1][0]} fleets.\n"
+        + _filler(rng, lines)
+    )
+    return text, {
+        "name": f"{first} {last}",
+        "email": email.lower(),
+        "phone": phone_e164,
+        "location": f"{city}, {st}",
+        "roles": {role},
+        "certifications": certs,
+        "aircraft": {p for _, p in planes},
+    }
+
+
+def _faa_certificate(rng: random.Random, lines: int) -> tuple[str, dict[str, Any]]:
+    first, last = rng.choice(FIRST), rng.choice(LAST)
+    number = str(rng.randint(1_000_000, 9_999_999))
+    issued, issued_iso = _date(rng, (1990, 2024))
+    label = rng.choice(("Certificate No.", "Cert. No.", "CERTIFICATE NUMBER", "Cert #"))
+    rating = rng.choice(("AIRFRAME AND POWERPLANT", "AIRFRAME", "COMMERCIAL PILOT AIRPLANE SINGLE ENGINE LAND"))
+    text = (
+        f"FEDERAL AVIATION ADMINISTRATION\nAIRMAN CERTIFICATE\nThis certifies that {first.upper()} {last.upper()}\n"
+        f"has been found to be properly qualified\n{label} {number}\nRATINGS: {rating}\n"
+        f"{rng.choice(('Date of issue', 'DATE ISSUED:', 'Issued'))} {issued}\nFAA Form 8060-4\n"
+        + _filler(rng, lines)
+    )
+    return text, {"name": f"{first} {last}", "certificate_number": number, "rating": rating, "issue_date": issued_iso}
+
+
+def _drivers_license(rng: random.Random, lines: int) -> tuple[str, dict[str, Any]]:
+    state, code = rng.choice(STATES)
+    number = rng.choice((str(rng.randint(10_000_000, 99_999_999)), f"D{rng.randint(1_000_000, 9_999_999)}"))
+    dob, dob_iso = _date(rng, (1960, 2000))
+    exp, exp_iso = _date(rng, (2025, 2032))
+    label = rng.choice(("DL No.", "DL", "LIC#", "License Number:"))
+    text = (
+        f"{state} DRIVER LICENSE\n{label} {number}\nCLASS C\nDOB {dob}\n"
+        f"{rng.choice(('EXP', 'Expires', 'EXPIRATION DATE:'))} {exp}\nSEX F HGT 5-06 EYES: BRN\n"
+        + _filler(rng, lines // 10)
+    )
+    return text, {"license_number": number, "state": code, "dob": dob_iso, "expiration": exp_iso}
+
+
+BUILDERS = {"resume": _resume, "faa_certificate": _faa_certificate, "drivers_license": _drivers_license}
+
+
+def build_corpus(docs: int, seed: int = 1234) -> dict[str, list[tuple[str, dict[str, Any]]]]:
+    rng = random.Random(seed)
+    return {
+        kind: [build(rng, rng.choice((20, 80, 300))) for _ in range(docs)]
+        for kind, build in BUILDERS.items()
+    }
+
+
+def _found(result: dict[str, Any], field: str, expected: Any) -> bool:
+    got = result["fields"].get(field)
+    if got is None or expected is None:
+        return got is expected
+    if isinstance(expected, set):
+        return expected <= {g["value"] for g in got}
+    return got["value"] == expected
+
+
+def check_regressions() -> list[str]:
+    from worker.extractors.structured import extract_structured
+
+    failures = []
+    for text, kind, expected in REGRESSIONS:
+        out = extract_structured(text, kind)
+        for field, value in expected.items():
+            if not _found(out, field, value):
+                failures.append(f"{text!r}: {field} expected {value!r}, got {out['fields'].get(field)!r}")
+    return failures
+
+
+def run(docs: int, iterations: int) -> dict[str, dict[str, Any]]:
+    from worker.extractors.structured import extract_structured
+
+    results: dict[str, dict[str, Any]] = {}
+    for kind, corpus in build_corpus(docs).items():
+        hits: Counter[str] = Counter()
+        misses: Counter[str] = Counter()
+        with_missing = 0
+        for text, planted in corpus:  # correctness pass, also the warm-up
+            out = extract_structured(text, kind)
+            with_missing += bool(out["missing"])
+            for field, expected in planted.items():
+                (hits if _found(out, field, expected) else misses)[field] += 1
+
+        latencies: list[float] = []
+        t_start = time.perf_counter()
+        for _ in range(iterations):
+            for text, _ in corpus:
+                t0 = time.perf_counter()
+                extract_structured(text, kind)
+                latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - t_start
+
+        n = len(latencies)
+        total_bytes = iterations * sum(len(t.encode("utf-8")) for t, _ in corpus)
+        planted_total = sum(hits.values()) + sum(misses.values())
+        results[kind] = {
+            "n": n,
+            "errors": 0,
+            "files_per_s": round(n / elapsed, 2),
+            "mb_per_s": round(total_bytes / elapsed / 1e6, 2),
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+            "recall": round(sum(hits.values()) / planted_total, 4) if planted_total else 1.0,
+            "fallback_share": round(with_missing / len(corpus), 4),
+            "field_misses": dict(misses),
+        }
+        res = results[kind]
+        print(
+            f"{kind:16s} {res['files_per_s']:>10.1f} docs/s {res['mb_per_s']:>7.2f} MB/s "
+            f"p50={res['p50_ms']:>7.3f}ms p95={res['p95_ms']:>7.3f}ms "
+            f"recall={res['recall']:.3f} fallback={res['fallback_share']:.1%}",
+            flush=True,
+        )
+        if misses:
+            print(f"{'':16s} misses: {', '.join(f'{f}={c}' for f, c in misses.most_common())}")
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--docs", type=int, default=300, help="documents per artifact type")
+    ap.add_argument("--iterations", type=int, default=5, help="timed passes over the corpus")
+    ap.add_argument("--min-recall", type=float, default=0.95, help="exit 1 below this field recall")
+    ap.add_argument("--corpus-docs", type=int, default=300_000, help="corpus size for the projection")
+    ap.add_argument("--json", help="write results as JSON to this file")
+    ap.add_argument("--save-baseline", help="write results as the new baseline")
+    ap.add_argument("--baseline", help="compare against this baseline; exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    args = ap.parse_args(argv)
+
+    failures = check_regressions()
+    for f in failures:
+        print(f"regression case failed: {f}", file=sys.stderr)
+
+    results = run(max(1, args.docs), max(1, args.iterations))
+
+    mean_ms = statistics.fmean(r["mean_ms"] for r in results.values())
+    print(f"\nprojected: {args.corpus_docs} docs in {args.corpus_docs * mean_ms / 1000 / 60:.1f} min on one core")
+
+    low = [kind for kind, r in results.items() if r["recall"] < args.min_recall]
+    if low:
+        print(f"recall below {args.min_recall}: {', '.join(low)}", file=sys.stderr)
+
+    for out in (args.json, args.save_baseline):
+        if out:
+            Path(out).write_text(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.baseline:
+        problems = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:", file=sys.stderr)
+            for p in problems:
+                print(f"  {p}", file=sys.stderr)
+            return 1
+        print("\nno regressions against baseline")
+    return 1 if low or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
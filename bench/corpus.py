@@ -0,0 +1,154 @@
+"""
+Synthetic extraction corpus for the benchmarks.
+
+Deterministic (seeded), so two runs on the same machine are comparable:
+
+    python -m bench.corpus --out /tmp/cbl-bench-corpus
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import random
+from pathlib import Path
+
+from docx import Document
+
+
+WORDS = (
+    "aircraft mechanic A&P IA inspection Gulfstream G650 Boeing 737 Airbus A320 "
+    "avionics powerplant airframe FAA certificate repair station maintenance "
+    "troubleshooting hydraulics landing gear composite structures sheet metal "
+    "Part 145 Part 135 line maintenance heavy check borescope NDT torque "
+    "Wichita Savannah Dallas Phoenix Miami available immediately relocation"
+).split()
+
+
+def _sentence(rng: random.Random, n: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _pdf_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(rng: random.Random, pages: int, lines_per_page: int = 40, image_bytes: int = 0) -> bytes:
+    """
+    Minimal hand-written PDF: one Helvetica text stream per page, plus an
+    optional uncompressed grayscale image on the first page to stand in for
+    a scanned document.
+    """
+    objs: list[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objs.append(obj)
+        return len(objs)
+
+    catalog = add(b"")  # placeholders, filled in below
+    pages_obj = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    image = None
+    if image_bytes:
+        side = max(1, int(image_bytes ** 0.5))
+        data = rng.randbytes(side * side)
+        image = add(
+            f"<< /Type /XObject /Subtype /Image /Width {side} /Height {side} "
+            f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Length {len(data)} >>\nstream\n".encode()
+            + data
+            + b"\nendstream"
+        )
+
+    kids: list[int] = []
+    for p in range(pages):
+        ops = ["BT /F1 10 Tf 50 760 Td 12 TL"]
+        for _ in range(lines_per_page):
+            ops.append(f"({_pdf_escape(_sentence(rng))}) '")
+        ops.append("ET")
+        if image and p == 0:
+            ops.append("q 200 0 0 200 300 300 cm /Im1 Do Q")
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+        xobj = f" /XObject << /Im1 {image} 0 R >>" if image and p == 0 else ""
+        kids.append(
+            add(
+                f"<< /Type /Page /Parent {pages_obj} 0 R /MediaBox [0 0 612 792] "
+                f"/Contents {content} 0 R /Resources << /Font << /F1 {font} 0 R >>{xobj} >> >>".encode()
+            )
+        )
+
+    objs[catalog - 1] = f"<< /Type /Catalog /Pages {pages_obj} 0 R >>".encode()
+    objs[pages_obj - 1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>".encode()
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for n, obj in enumerate(objs, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % n + obj + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, catalog, xref))
+    return out.getvalue()
+
+
+def make_docx(rng: random.Random, paragraphs: int) -> bytes:
+    doc = Document()
+    doc.add_heading("Resume", level=1)
+    for _ in range(paragraphs):
+        doc.add_paragraph(_sentence(rng, 20))
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def make_text(rng: random.Random, lines: int) -> bytes:
+    return "\n".join(_sentence(rng) for _ in range(lines)).encode("utf-8")
+
+
+def make_html_error(rng: random.Random) -> bytes:
+    # What Drive/SharePoint return for a permissions or viewer page
+    body = "".join(f"<p>{_sentence(rng)}</p>" for _ in range(50))
+    return f"<!DOCTYPE html><html><head><title>Sign in</title></head><body>{body}</body></html>".encode()
+
+
+# name -> (kind, builder)
+SPEC = {
+    "pdf_small.pdf": ("pdf_small", lambda r: make_pdf(r, pages=2)),
+    "pdf_large.pdf": ("pdf_large", lambda r: make_pdf(r, pages=10, image_bytes=20 * 1024 * 1024)),
+    "pdf_many_pages.pdf": ("pdf_many_pages", lambda r: make_pdf(r, pages=400, lines_per_page=30)),
+    "docx_small.docx": ("docx_small", lambda r: make_docx(r, paragraphs=40)),
+    "docx_large.docx": ("docx_large", lambda r: make_docx(r, paragraphs=4000)),
+    "text.txt": ("text", lambda r: make_text(r, lines=500)),
+    "html_error.html": ("html_error", make_html_error),
+}
+
+
+def build_corpus(out_dir: str | os.PathLike, seed: int = 1234) -> dict[str, str]:
+    """Write the corpus (skipping files that already exist). Returns {file name: kind}."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest: dict[str, str] = {}
+    for name, (kind, build) in SPEC.items():
+        path = out / name
+        if not path.exists():
+            path.write_bytes(build(random.Random(f"{seed}:{name}")))
+        manifest[name] = kind
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Generate the synthetic benchmark corpus")
+    ap.add_argument("--out", default="/tmp/cbl-bench-corpus")
+    ap.add_argument("--seed", type=int, default=1234)
+    args = ap.parse_args()
+    for name, kind in build_corpus(args.out, args.seed).items():
+        print(f"{kind:16s} {os.path.getsize(os.path.join(args.out, name)):>12,d}  {name}")
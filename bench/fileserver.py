@@ -0,0 +1,91 @@
+"""
+Local stand-ins for the download paths used by the worker:
+
+- plain HTTP: GET /files/<name> serves the corpus file
+- fake Graph: GET /v1.0/shares/u!<base64 url>/driveItem/content decodes the
+  share id back into the sharing URL and serves the file named by its path
+
+Content types mirror what real hosts send (application/pdf, docx, text/html
+for the error pages) so the HTML rejection path is exercised as well.
+"""
+from __future__ import annotations
+
+import base64
+import mimetypes
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    root: Path
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        # Headers and body are separate writes; without this, Nagle plus
+        # delayed ACK adds ~40 ms to every small keep-alive response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args) -> None:  # keep benchmark output clean
+        pass
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if path.startswith("/files/"):
+            self._send_file(unquote(path[len("/files/"):]))
+        elif path.startswith("/v1.0/shares/") and path.endswith("/driveItem/content"):
+            share_id = path[len("/v1.0/shares/"):-len("/driveItem/content")]
+            if not share_id.startswith("u!"):
+                self.send_error(400, "bad share id")
+                return
+            encoded = share_id[2:]
+            share_url = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8")
+            self._send_file(Path(urlparse(share_url).path).name)
+        else:
+            self.send_error(404)
+
+    def _send_file(self, name: str) -> None:
+        path = (self.root / name).resolve()
+        if self.root not in path.parents or not path.is_file():
+            self.send_error(404)
+            return
+        data = path.read_bytes()
+        ctype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class LocalFileServer:
+    """Threaded HTTP server on 127.0.0.1 serving `root`; use as a context manager."""
+
+    def __init__(self, root: str | Path, port: int = 0) -> None:
+        handler = type("Handler", (_Handler,), {"root": Path(root).resolve()})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def file_url(self, name: str) -> str:
+        return f"{self.base_url}/files/{name}"
+
+    @property
+    def graph_base(self) -> str:
+        return f"{self.base_url}/v1.0"
+
+    def __enter__(self) -> "LocalFileServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -90,6 +90,7 @@ CREATE TABLE core.concept_aliases (
 	CONSTRAINT concept_aliases_concept_id_fkey FOREIGN KEY (concept_id) REFERENCES core.concepts(concept_id)
 );
 CREATE INDEX idx_concept_aliases_concept ON core.concept_aliases USING btree (concept_id);
+CREATE INDEX idx_concept_aliases_type_lower_text ON core.concept_aliases USING btree (concept_type, lower(alias_text));
 CREATE INDEX idx_concept_aliases_type_text ON core.concept_aliases USING btree (concept_type, alias_text);
 
 -- Table Triggers
@@ -101,6 +102,41 @@ update
 
 
 
+-- DROP FUNCTION core.fn_get_embedding_hashes(text, _uuid, text);
+
+CREATE OR REPLACE FUNCTION core.fn_get_embedding_hashes(p_entity_type text, p_entity_ids uuid[], p_embedding_type text)
+ RETURNS TABLE(entity_id uuid, content_hash text)
+ LANGUAGE sql
+ STABLE
+AS $function$
+  -- Existing content hashes for a batch of entities (primary key lookups),
+  -- so callers can skip re-embedding unchanged text
+  SELECT e.entity_id, e.content_hash
+  FROM core.embeddings e
+  WHERE e.entity_type = p_entity_type
+    AND e.embedding_type = p_embedding_type
+    AND e.entity_id = ANY(p_entity_ids);
+$function$
+;
+
+-- DROP FUNCTION core.fn_list_concept_aliases_since(timestamptz);
+
+CREATE OR REPLACE FUNCTION core.fn_list_concept_aliases_since(p_since timestamp with time zone DEFAULT NULL::timestamp with time zone)
+ RETURNS TABLE(concept_type text, alias_text text, canonical_code text, updated_at timestamp with time zone)
+ LANGUAGE sql
+ STABLE
+AS $function$
+  -- Bulk load for worker-side alias caches: everything when p_since is NULL,
+  -- otherwise aliases whose alias or concept row changed after p_since
+  SELECT a.concept_type, a.alias_text, c.canonical_code, GREATEST(a.updated_at, c.updated_at) AS updated_at
+  FROM core.concept_aliases a
+  JOIN core.concepts c ON c.concept_id = a.concept_id
+  WHERE p_since IS NULL
+     OR a.updated_at > p_since
+     OR c.updated_at > p_since;
+$function$
+;
+
 -- DROP FUNCTION core.fn_queue_normalization_suggestion(text, text, text, numeric, jsonb);
 
 CREATE OR REPLACE FUNCTION core.fn_queue_normalization_suggestion(p_concept_type text, p_raw_text text, p_proposed_code text, p_confidence numeric, p_evidence jsonb)
@@ -138,6 +174,29 @@ AS $function$
 $function$
 ;
 
+-- DROP FUNCTION core.fn_resolve_concept_codes(_text, _text);
+
+CREATE OR REPLACE FUNCTION core.fn_resolve_concept_codes(p_concept_types text[], p_raw_texts text[])
+ RETURNS TABLE(ordinal integer, concept_type text, raw_text text, canonical_code text)
+ LANGUAGE sql
+ STABLE
+AS $function$
+  -- Set-based fn_resolve_concept_code: one row per input pair, in input
+  -- order, canonical_code NULL when unresolved
+  SELECT v.ord::int, v.concept_type, v.raw_text, r.canonical_code
+  FROM unnest(p_concept_types, p_raw_texts) WITH ORDINALITY AS v(concept_type, raw_text, ord)
+  LEFT JOIN LATERAL (
+    SELECT c.canonical_code
+    FROM core.concept_aliases a
+    JOIN core.concepts c ON c.concept_id = a.concept_id
+    WHERE a.concept_type = v.concept_type
+      AND lower(a.alias_text) = lower(trim(v.raw_text))
+    LIMIT 1
+  ) r ON true
+  ORDER BY v.ord;
+$function$
+;
+
 -- DROP FUNCTION core.fn_upsert_embedding(text, uuid, text, text, text, extensions.vector);
 
 CREATE OR REPLACE FUNCTION core.fn_upsert_embedding(p_entity_type text, p_entity_id uuid, p_embedding_type text, p_content_hash text, p_source_text text, p_embedding vector)
@@ -152,7 +211,40 @@ BEGIN
     content_hash = EXCLUDED.content_hash,
     source_text  = EXCLUDED.source_text,
     embedding    = EXCLUDED.embedding,
-    updated_at   = now();
+    updated_at   = now()
+  WHERE core.embeddings.content_hash IS DISTINCT FROM EXCLUDED.content_hash;
+END;
+$function$
+;
+
+-- DROP FUNCTION core.fn_upsert_embeddings_batch(text, text, _uuid, _text, _text, _text);
+
+CREATE OR REPLACE FUNCTION core.fn_upsert_embeddings_batch(p_entity_type text, p_embedding_type text, p_entity_ids uuid[], p_content_hashes text[], p_source_texts text[], p_embeddings text[])
+ RETURNS integer
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  v_count int;
+BEGIN
+  -- Multi-row fn_upsert_embedding. Vectors arrive in pgvector text form
+  -- ('[0.1,0.2,...]'); the last entry wins when an entity repeats. Rows whose
+  -- content_hash is unchanged are not rewritten. Returns rows written.
+  INSERT INTO core.embeddings(entity_type, entity_id, embedding_type, content_hash, source_text, embedding)
+  SELECT DISTINCT ON (v.entity_id)
+    p_entity_type, v.entity_id, p_embedding_type, v.content_hash, v.source_text, v.embedding::extensions.vector
+  FROM unnest(p_entity_ids, p_content_hashes, p_source_texts, p_embeddings)
+       WITH ORDINALITY AS v(entity_id, content_hash, source_text, embedding, ord)
+  ORDER BY v.entity_id, v.ord DESC
+  ON CONFLICT (entity_type, entity_id, embedding_type)
+  DO UPDATE SET
+    content_hash = EXCLUDED.content_hash,
+    source_text  = EXCLUDED.source_text,
+    embedding    = EXCLUDED.embedding,
+    updated_at   = now()
+  WHERE core.embeddings.content_hash IS DISTINCT FROM EXCLUDED.content_hash;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
 END;
 $function$
 ;
@@ -196,7 +288,7 @@ CREATE TABLE delivery.candidates (
 	CONSTRAINT candidates_phone_e164_key UNIQUE (phone_e164),
 	CONSTRAINT candidates_pkey PRIMARY KEY (candidate_id)
 );
-CREATE INDEX idx_candidates_email ON delivery.candidates USING btree (email);
+CREATE INDEX idx_candidates_email_lower ON delivery.candidates USING btree (lower(email));
 CREATE INDEX idx_candidates_facts_gin ON delivery.candidates USING gin (facts);
 CREATE INDEX idx_candidates_home_geo ON delivery.candidates USING gist (home_geo);
 CREATE INDEX idx_candidates_status_avail ON delivery.candidates USING btree (status, availability_status);
@@ -309,15 +401,30 @@ CREATE TABLE delivery.artifacts (
 	"error" text NULL,
 	created_at timestamptz DEFAULT now() NOT NULL,
 	updated_at timestamptz DEFAULT now() NOT NULL,
+	claimed_by text NULL,
+	lease_expires_at timestamptz NULL,
+	attempts int4 DEFAULT 0 NOT NULL,
+	next_attempt_at timestamptz NULL,
+	extracted_tsv tsvector NULL,
 	CONSTRAINT artifacts_pkey PRIMARY KEY (artifact_id),
 	CONSTRAINT artifacts_intake_id_fkey FOREIGN KEY (intake_id) REFERENCES delivery.candidate_intakes(intake_id)
 );
+CREATE INDEX idx_artifacts_extracted_tsv ON delivery.artifacts USING gin (extracted_tsv) WHERE (status = 'extracted'::text);
+CREATE INDEX idx_artifacts_extracting_lease ON delivery.artifacts USING btree (lease_expires_at) WHERE (status = 'extracting'::text);
 CREATE INDEX idx_artifacts_intake ON delivery.artifacts USING btree (intake_id);
+CREATE INDEX idx_artifacts_registered_created ON delivery.artifacts USING btree (created_at) WHERE (status = 'registered'::text);
 CREATE INDEX idx_artifacts_sha ON delivery.artifacts USING btree (sha256);
 CREATE UNIQUE INDEX uniq_artifacts_intake_sha ON delivery.artifacts USING btree (intake_id, sha256);
 
 -- Table Triggers
 
+create trigger trg_artifacts_extracted_tsv before
+insert
+    or
+update
+    of extracted_text on
+    delivery.artifacts for each row execute function delivery.set_extracted_tsv();
+
 create trigger trg_artifacts_updated before
 update
     on
@@ -325,9 +432,13 @@ update
 
 
 
--- DROP FUNCTION delivery.fn_claim_artifact_for_extraction(uuid);
+-- DROP FUNCTION delivery.fn_claim_artifact_for_extraction(uuid, text, int4);
+-- Replaces the (uuid) signature. CREATE OR REPLACE adds an overload beside
+-- it, and calls that omit the new arguments then fail as "not unique"; drop
+-- it first:
+-- DROP FUNCTION IF EXISTS delivery.fn_claim_artifact_for_extraction(uuid);
 
-CREATE OR REPLACE FUNCTION delivery.fn_claim_artifact_for_extraction(p_artifact_id uuid)
+CREATE OR REPLACE FUNCTION delivery.fn_claim_artifact_for_extraction(p_artifact_id uuid, p_worker_id text DEFAULT NULL::text, p_lease_seconds integer DEFAULT 300)
  RETURNS boolean
  LANGUAGE plpgsql
 AS $function$
@@ -335,7 +446,13 @@ DECLARE
   v_updated int;
 BEGIN
   UPDATE delivery.artifacts
-  SET status = 'extracting', error = NULL, updated_at = now()
+  SET
+    status = 'extracting',
+    error = NULL,
+    updated_at = now(),
+    claimed_by = p_worker_id,
+    lease_expires_at = now() + make_interval(secs => p_lease_seconds),
+    attempts = attempts + 1
   WHERE artifact_id = p_artifact_id
     AND status = 'registered';
 
@@ -345,6 +462,78 @@ END;
 $function$
 ;
 
+-- DROP FUNCTION delivery.fn_claim_artifacts_by_ids(_uuid, text, int4);
+
+CREATE OR REPLACE FUNCTION delivery.fn_claim_artifacts_by_ids(p_artifact_ids uuid[], p_worker_id text DEFAULT NULL::text, p_lease_seconds integer DEFAULT 300)
+ RETURNS TABLE(artifact_id uuid, storage_uri text, mime_type text, file_name text, artifact_type text, sha256 text)
+ LANGUAGE sql
+AS $function$
+  -- Set-based fn_claim_artifact_for_extraction: claims the listed artifacts
+  -- that are still registered and due, or already claimed by p_worker_id (a
+  -- resumed run). Ids claimed by others, extracted or failed are left alone
+  -- and missing from the result.
+  WITH picked AS (
+    SELECT a.artifact_id
+    FROM delivery.artifacts a
+    WHERE a.artifact_id = ANY(p_artifact_ids)
+      AND (
+        (a.status = 'registered' AND (a.next_attempt_at IS NULL OR a.next_attempt_at <= now()))
+        OR (a.status = 'extracting' AND a.claimed_by = p_worker_id)
+      )
+    FOR UPDATE OF a SKIP LOCKED
+  )
+  UPDATE delivery.artifacts a
+  SET
+    status = 'extracting',
+    error = NULL,
+    updated_at = now(),
+    claimed_by = p_worker_id,
+    lease_expires_at = now() + make_interval(secs => p_lease_seconds),
+    attempts = attempts + 1
+  FROM picked p
+  WHERE a.artifact_id = p.artifact_id
+  RETURNING a.artifact_id, a.storage_uri, a.mime_type, a.file_name, a.artifact_type, a.sha256;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_claim_registered_artifacts(text, int4, text, int4);
+-- Replaces the (text, int4) signature. CREATE OR REPLACE adds an overload
+-- beside it, and calls that omit the new arguments then fail as "not
+-- unique"; drop it first:
+-- DROP FUNCTION IF EXISTS delivery.fn_claim_registered_artifacts(text, int4);
+
+CREATE OR REPLACE FUNCTION delivery.fn_claim_registered_artifacts(p_lane text, p_limit integer DEFAULT 50, p_worker_id text DEFAULT NULL::text, p_lease_seconds integer DEFAULT 300)
+ RETURNS TABLE(artifact_id uuid, storage_uri text, mime_type text, file_name text, artifact_type text, sha256 text)
+ LANGUAGE sql
+AS $function$
+  WITH picked AS (
+    SELECT a.artifact_id
+    FROM delivery.artifacts a
+    JOIN delivery.candidate_intakes i ON i.intake_id = a.intake_id
+    WHERE a.status = 'registered'
+      AND (a.next_attempt_at IS NULL OR a.next_attempt_at <= now())
+      AND CASE
+            WHEN p_lane = 'backfill' THEN i.source = 'import'
+            ELSE COALESCE(i.source,'') <> 'import'
+          END
+    ORDER BY a.created_at
+    LIMIT p_limit
+    FOR UPDATE OF a SKIP LOCKED
+  )
+  UPDATE delivery.artifacts a
+  SET
+    status = 'extracting',
+    error = NULL,
+    updated_at = now(),
+    claimed_by = p_worker_id,
+    lease_expires_at = now() + make_interval(secs => p_lease_seconds),
+    attempts = attempts + 1
+  FROM picked p
+  WHERE a.artifact_id = p.artifact_id
+  RETURNING a.artifact_id, a.storage_uri, a.mime_type, a.file_name, a.artifact_type, a.sha256;
+$function$
+;
+
 -- DROP FUNCTION delivery.fn_ensure_recruiter(text, text);
 
 CREATE OR REPLACE FUNCTION delivery.fn_ensure_recruiter(p_email text, p_full_name text DEFAULT NULL::text)
@@ -365,38 +554,206 @@ END;
 $function$
 ;
 
--- DROP FUNCTION delivery.fn_fail_artifact(uuid, text);
+-- DROP FUNCTION delivery.fn_fail_artifact(uuid, text, text);
+-- Replaces the (uuid, text) signature. CREATE OR REPLACE adds an overload
+-- beside it that skips the lease check; drop it first:
+-- DROP FUNCTION IF EXISTS delivery.fn_fail_artifact(uuid, text);
 
-CREATE OR REPLACE FUNCTION delivery.fn_fail_artifact(p_artifact_id uuid, p_error text)
- RETURNS void
+CREATE OR REPLACE FUNCTION delivery.fn_fail_artifact(p_artifact_id uuid, p_error text, p_worker_id text)
+ RETURNS boolean
  LANGUAGE plpgsql
 AS $function$
+DECLARE
+  v_updated int;
 BEGIN
+  -- Only the lease holder may fail its claim (claimed_by is NULL for claims
+  -- made without a worker id). False when the lease was reclaimed meanwhile.
   UPDATE delivery.artifacts
-  SET status = 'failed', error = p_error
-  WHERE artifact_id = p_artifact_id;
+  SET status = 'failed', error = p_error, claimed_by = NULL, lease_expires_at = NULL
+  WHERE artifact_id = p_artifact_id
+    AND status = 'extracting'
+    AND claimed_by IS NOT DISTINCT FROM p_worker_id;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN (v_updated = 1);
 END;
 $function$
 ;
 
--- DROP FUNCTION delivery.fn_finalize_artifact_extraction(uuid, text, jsonb);
+-- DROP FUNCTION delivery.fn_fail_artifacts_batch(_uuid, _text, text);
+-- Replaces the (_uuid, _text) signature. CREATE OR REPLACE adds an overload
+-- beside it that skips the lease check; drop it first:
+-- DROP FUNCTION IF EXISTS delivery.fn_fail_artifacts_batch(_uuid, _text);
 
-CREATE OR REPLACE FUNCTION delivery.fn_finalize_artifact_extraction(p_artifact_id uuid, p_extracted_text text, p_extracted_json jsonb)
- RETURNS void
+CREATE OR REPLACE FUNCTION delivery.fn_fail_artifacts_batch(p_artifact_ids uuid[], p_errors text[], p_worker_id text)
+ RETURNS integer
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  v_count int;
+BEGIN
+  -- Set-based fn_fail_artifact, with the same ownership rule; the last entry
+  -- wins when an artifact repeats. Returns rows updated; claims reclaimed by
+  -- another worker are left alone and not counted.
+  UPDATE delivery.artifacts a
+  SET status = 'failed', error = t.error, claimed_by = NULL, lease_expires_at = NULL
+  FROM (
+    SELECT DISTINCT ON (u.artifact_id) u.artifact_id, u.error
+    FROM unnest(p_artifact_ids, p_errors) WITH ORDINALITY AS u(artifact_id, error, ord)
+    ORDER BY u.artifact_id, u.ord DESC
+  ) t
+  WHERE a.artifact_id = t.artifact_id
+    AND a.status = 'extracting'
+    AND a.claimed_by IS NOT DISTINCT FROM p_worker_id;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_finalize_artifact_from_cache(uuid, text, text);
+-- Replaces the (uuid, text) signature. CREATE OR REPLACE adds an overload
+-- beside it that skips the lease check; drop it first:
+-- DROP FUNCTION IF EXISTS delivery.fn_finalize_artifact_from_cache(uuid, text);
+
+CREATE OR REPLACE FUNCTION delivery.fn_finalize_artifact_from_cache(p_artifact_id uuid, p_sha256 text, p_worker_id text)
+ RETURNS uuid
  LANGUAGE plpgsql
 AS $function$
+DECLARE
+  v_source_id uuid;
+  v_text text;
+  v_json jsonb;
+BEGIN
+  IF p_sha256 IS NULL OR p_sha256 = '' THEN
+    RETURN NULL;
+  END IF;
+
+  SELECT s.artifact_id, s.extracted_text, s.extracted_json
+  INTO v_source_id, v_text, v_json
+  FROM delivery.artifacts s
+  WHERE s.sha256 = p_sha256
+    AND s.status = 'extracted'
+    AND s.artifact_id <> p_artifact_id
+  ORDER BY s.updated_at DESC
+  LIMIT 1;
+
+  IF v_source_id IS NULL THEN
+    RETURN NULL;
+  END IF;
+
+  -- Same ownership rule as fn_finalize_artifact_extraction
+  UPDATE delivery.artifacts
+  SET
+    extracted_text = v_text,
+    extracted_json = COALESCE(v_json, '{}'::jsonb)
+      || jsonb_build_object('cache_hit', true, 'cache_source_artifact_id', v_source_id),
+    status = 'extracted',
+    error = NULL,
+    claimed_by = NULL,
+    lease_expires_at = NULL
+  WHERE artifact_id = p_artifact_id
+    AND status = 'extracting'
+    AND claimed_by IS NOT DISTINCT FROM p_worker_id;
+
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+  RETURN v_source_id;
+END;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_finalize_artifact_extraction(uuid, text, jsonb, text);
+-- Replaces the (uuid, text, jsonb) signature. CREATE OR REPLACE adds an
+-- overload beside it that skips the lease check; drop it first:
+-- DROP FUNCTION IF EXISTS delivery.fn_finalize_artifact_extraction(uuid, text, jsonb);
+
+CREATE OR REPLACE FUNCTION delivery.fn_finalize_artifact_extraction(p_artifact_id uuid, p_extracted_text text, p_extracted_json jsonb, p_worker_id text)
+ RETURNS boolean
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  v_updated int;
 BEGIN
+  -- Only the lease holder may finalize its claim (claimed_by is NULL for
+  -- claims made without a worker id). False when the lease was reclaimed
+  -- meanwhile: the row belongs to another worker and the result is dropped.
   UPDATE delivery.artifacts
   SET
     extracted_text = p_extracted_text,
     extracted_json = COALESCE(p_extracted_json, '{}'::jsonb),
     status = 'extracted',
-    error = NULL
-  WHERE artifact_id = p_artifact_id;
+    error = NULL,
+    claimed_by = NULL,
+    lease_expires_at = NULL
+  WHERE artifact_id = p_artifact_id
+    AND status = 'extracting'
+    AND claimed_by IS NOT DISTINCT FROM p_worker_id;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN (v_updated = 1);
 END;
 $function$
 ;
 
+-- DROP FUNCTION delivery.fn_finalize_artifacts_batch(_uuid, _text, _jsonb, text);
+-- Replaces the (_uuid, _text, _jsonb) signature. CREATE OR REPLACE adds an
+-- overload beside it that skips the lease check; drop it first:
+-- DROP FUNCTION IF EXISTS delivery.fn_finalize_artifacts_batch(_uuid, _text, _jsonb);
+
+CREATE OR REPLACE FUNCTION delivery.fn_finalize_artifacts_batch(p_artifact_ids uuid[], p_extracted_texts text[], p_extracted_jsons jsonb[], p_worker_id text)
+ RETURNS integer
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  v_count int;
+BEGIN
+  -- Set-based fn_finalize_artifact_extraction, with the same ownership rule;
+  -- the last entry wins when an artifact repeats. Returns rows updated;
+  -- claims reclaimed by another worker are left alone and not counted.
+  UPDATE delivery.artifacts a
+  SET
+    extracted_text = t.extracted_text,
+    extracted_json = COALESCE(t.extracted_json, '{}'::jsonb),
+    status = 'extracted',
+    error = NULL,
+    claimed_by = NULL,
+    lease_expires_at = NULL
+  FROM (
+    SELECT DISTINCT ON (u.artifact_id) u.artifact_id, u.extracted_text, u.extracted_json
+    FROM unnest(p_artifact_ids, p_extracted_texts, p_extracted_jsons)
+         WITH ORDINALITY AS u(artifact_id, extracted_text, extracted_json, ord)
+    ORDER BY u.artifact_id, u.ord DESC
+  ) t
+  WHERE a.artifact_id = t.artifact_id
+    AND a.status = 'extracting'
+    AND a.claimed_by IS NOT DISTINCT FROM p_worker_id;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_heartbeat_artifacts(text, _uuid, int4);
+
+CREATE OR REPLACE FUNCTION delivery.fn_heartbeat_artifacts(p_worker_id text, p_artifact_ids uuid[], p_lease_seconds integer DEFAULT 300)
+ RETURNS TABLE(artifact_id uuid)
+ LANGUAGE sql
+AS $function$
+  -- Extends the lease on the claims this worker still owns; ids missing from
+  -- the result were reclaimed (or finished) and are no longer ours.
+  UPDATE delivery.artifacts a
+  SET lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+  WHERE a.artifact_id = ANY(p_artifact_ids)
+    AND a.status = 'extracting'
+    AND a.claimed_by = p_worker_id
+  RETURNING a.artifact_id;
+$function$
+;
+
 -- DROP FUNCTION delivery.fn_ingest_intake(text, text, timestamptz, text, text, text, text, jsonb);
 
 CREATE OR REPLACE FUNCTION delivery.fn_ingest_intake(p_source text, p_source_message_id text, p_received_at timestamp with time zone, p_recruiter_email text, p_subject text, p_body_text text, p_body_html text, p_raw_payload jsonb)
@@ -425,6 +782,90 @@ END;
 $function$
 ;
 
+-- DROP FUNCTION delivery.fn_ingest_intakes_batch(_text, _text, _timestamptz, _text, _text, _text, _text, _jsonb);
+
+CREATE OR REPLACE FUNCTION delivery.fn_ingest_intakes_batch(p_sources text[], p_source_message_ids text[], p_received_ats timestamp with time zone[], p_recruiter_emails text[], p_subjects text[], p_body_texts text[], p_body_htmls text[], p_raw_payloads jsonb[])
+ RETURNS TABLE(ordinal integer, intake_id uuid)
+ LANGUAGE sql
+AS $function$
+  -- Set-based fn_ingest_intake: one row per input position (1-based ordinal).
+  -- Repeated (source, source_message_id) pairs resolve to the same intake.
+  WITH input AS (
+    SELECT
+      t.ord::int AS ord, t.source, t.source_message_id, t.received_at,
+      t.recruiter_email, t.subject, t.body_text, t.body_html,
+      COALESCE(t.raw_payload, '{}'::jsonb) AS raw_payload
+    FROM unnest(
+      p_sources, p_source_message_ids, p_received_ats, p_recruiter_emails,
+      p_subjects, p_body_texts, p_body_htmls, p_raw_payloads
+    ) WITH ORDINALITY AS t(
+      source, source_message_id, received_at, recruiter_email,
+      subject, body_text, body_html, raw_payload, ord
+    )
+  ),
+  upserted AS (
+    INSERT INTO delivery.candidate_intakes AS c (
+      source, source_message_id, received_at,
+      recruiter_email, subject, body_text, body_html, raw_payload,
+      status
+    )
+    SELECT DISTINCT ON (i.source, i.source_message_id)
+      i.source, i.source_message_id, i.received_at,
+      i.recruiter_email, i.subject, i.body_text, i.body_html, i.raw_payload,
+      'received'
+    FROM input i
+    ORDER BY i.source, i.source_message_id, i.ord
+    ON CONFLICT (source, source_message_id)
+    DO UPDATE SET updated_at = now()
+    RETURNING c.intake_id, c.source, c.source_message_id
+  )
+  SELECT i.ord, u.intake_id
+  FROM input i
+  JOIN upserted u ON u.source = i.source AND u.source_message_id = i.source_message_id
+  ORDER BY i.ord;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_ingest_intakes_with_artifacts_batch(_text, _text, _timestamptz, _text, _text, _text, _text, _jsonb, _int4, _text, _text, _text, _text, _text);
+
+CREATE OR REPLACE FUNCTION delivery.fn_ingest_intakes_with_artifacts_batch(p_sources text[], p_source_message_ids text[], p_received_ats timestamp with time zone[], p_recruiter_emails text[], p_subjects text[], p_body_texts text[], p_body_htmls text[], p_raw_payloads jsonb[], p_attachment_intake_ordinals integer[], p_artifact_types text[], p_file_names text[], p_mime_types text[], p_storage_uris text[], p_sha256s text[])
+ RETURNS TABLE(intake_ordinal integer, intake_id uuid, attachment_ordinal integer, artifact_id uuid)
+ LANGUAGE plpgsql
+AS $function$
+#variable_conflict use_column
+DECLARE
+  v_intake_ids uuid[];
+BEGIN
+  -- Intakes and their attachments in one call (and so one transaction).
+  -- Attachments point at their intake by 1-based position in the intake arrays.
+  SELECT array_agg(b.intake_id ORDER BY b.ordinal)
+  INTO v_intake_ids
+  FROM delivery.fn_ingest_intakes_batch(
+    p_sources, p_source_message_ids, p_received_ats, p_recruiter_emails,
+    p_subjects, p_body_texts, p_body_htmls, p_raw_payloads
+  ) b;
+
+  RETURN QUERY
+  WITH att AS (
+    SELECT t.ord::int AS ord, t.intake_ord
+    FROM unnest(p_attachment_intake_ordinals) WITH ORDINALITY AS t(intake_ord, ord)
+  ),
+  reg AS (
+    SELECT r.ordinal, r.artifact_id
+    FROM delivery.fn_register_artifacts_batch(
+      ARRAY(SELECT v_intake_ids[a.intake_ord] FROM att a ORDER BY a.ord),
+      p_artifact_types, p_file_names, p_mime_types, p_storage_uris, p_sha256s
+    ) r
+  )
+  SELECT n.ord::int, n.id, a.ord, reg.artifact_id
+  FROM unnest(v_intake_ids) WITH ORDINALITY AS n(id, ord)
+  LEFT JOIN att a ON a.intake_ord = n.ord
+  LEFT JOIN reg ON reg.ordinal = a.ord
+  ORDER BY n.ord, a.ord;
+END;
+$function$
+;
+
 -- DROP FUNCTION delivery.fn_link_intake_candidate(uuid, uuid, text, numeric);
 
 CREATE OR REPLACE FUNCTION delivery.fn_link_intake_candidate(p_intake_id uuid, p_candidate_id uuid, p_match_type text, p_confidence numeric)
@@ -443,6 +884,72 @@ END;
 $function$
 ;
 
+-- DROP FUNCTION delivery.fn_link_intake_candidates_batch(_uuid, _uuid, _text, _numeric);
+
+CREATE OR REPLACE FUNCTION delivery.fn_link_intake_candidates_batch(p_intake_ids uuid[], p_candidate_ids uuid[], p_match_types text[], p_confidences numeric[])
+ RETURNS integer
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  v_count int;
+BEGIN
+  -- Set-based fn_link_intake_candidate; the last entry wins when an intake
+  -- repeats. Returns rows written.
+  INSERT INTO delivery.intake_candidate_links(intake_id, candidate_id, match_type, confidence)
+  SELECT DISTINCT ON (t.intake_id)
+    t.intake_id, t.candidate_id, t.match_type, t.confidence
+  FROM unnest(p_intake_ids, p_candidate_ids, p_match_types, p_confidences)
+       WITH ORDINALITY AS t(intake_id, candidate_id, match_type, confidence, ord)
+  ORDER BY t.intake_id, t.ord DESC
+  ON CONFLICT (intake_id)
+  DO UPDATE SET
+    candidate_id = EXCLUDED.candidate_id,
+    match_type   = EXCLUDED.match_type,
+    confidence   = EXCLUDED.confidence;
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_list_artifacts_for_classification(uuid, int4, int4);
+
+CREATE OR REPLACE FUNCTION delivery.fn_list_artifacts_for_classification(p_after_artifact_id uuid DEFAULT NULL::uuid, p_limit integer DEFAULT 1000, p_max_chars integer DEFAULT 50000)
+ RETURNS TABLE(artifact_id uuid, extracted_text text)
+ LANGUAGE sql
+ STABLE
+AS $function$
+  -- Keyset page over extracted artifacts for reclassification; only the
+  -- first p_max_chars characters of the text are shipped, the classifier
+  -- does not read past them
+  SELECT a.artifact_id, left(COALESCE(a.extracted_text, ''), GREATEST(p_max_chars, 1))
+  FROM delivery.artifacts a
+  WHERE a.status = 'extracted'
+    AND (p_after_artifact_id IS NULL OR a.artifact_id > p_after_artifact_id)
+  ORDER BY a.artifact_id
+  LIMIT GREATEST(p_limit, 1);
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_list_candidates_for_embedding(uuid, int4, timestamptz);
+
+CREATE OR REPLACE FUNCTION delivery.fn_list_candidates_for_embedding(p_after_candidate_id uuid DEFAULT NULL::uuid, p_limit integer DEFAULT 500, p_updated_since timestamp with time zone DEFAULT NULL::timestamp with time zone)
+ RETURNS TABLE(candidate_id uuid, full_name text, facts jsonb, updated_at timestamp with time zone)
+ LANGUAGE sql
+ STABLE
+AS $function$
+  -- Keyset page over candidates for the embedding backfill; p_updated_since
+  -- limits it to candidates changed since the last run
+  SELECT c.candidate_id, c.full_name, c.facts, c.updated_at
+  FROM delivery.candidates c
+  WHERE (p_after_candidate_id IS NULL OR c.candidate_id > p_after_candidate_id)
+    AND (p_updated_since IS NULL OR c.updated_at >= p_updated_since)
+  ORDER BY c.candidate_id
+  LIMIT GREATEST(p_limit, 1);
+$function$
+;
+
 -- DROP FUNCTION delivery.fn_list_registered_artifacts_backfill(int4);
 
 CREATE OR REPLACE FUNCTION delivery.fn_list_registered_artifacts_backfill(p_limit integer DEFAULT 200)
@@ -453,6 +960,7 @@ AS $function$
   FROM delivery.artifacts a
   JOIN delivery.candidate_intakes i ON i.intake_id = a.intake_id
   WHERE a.status = 'registered'
+    AND (a.next_attempt_at IS NULL OR a.next_attempt_at <= now())
     AND i.source = 'import'
   ORDER BY a.created_at
   LIMIT p_limit;
@@ -469,12 +977,251 @@ AS $function$
   FROM delivery.artifacts a
   JOIN delivery.candidate_intakes i ON i.intake_id = a.intake_id
   WHERE a.status = 'registered'
+    AND (a.next_attempt_at IS NULL OR a.next_attempt_at <= now())
     AND COALESCE(i.source,'') <> 'import'
   ORDER BY a.created_at
   LIMIT p_limit;
 $function$
 ;
 
+-- DROP FUNCTION delivery.fn_match_candidates(text, int4, text, float8, float8, float8, _text, _text, int4, int4, int4);
+
+CREATE OR REPLACE FUNCTION delivery.fn_match_candidates(p_query_embedding text, p_limit integer DEFAULT 20, p_embedding_type text DEFAULT 'candidate_profile'::text, p_center_lat double precision DEFAULT NULL::double precision, p_center_lon double precision DEFAULT NULL::double precision, p_radius_m double precision DEFAULT NULL::double precision, p_statuses text[] DEFAULT NULL::text[], p_availability text[] DEFAULT NULL::text[], p_ef_search integer DEFAULT 100, p_overfetch integer DEFAULT 4, p_exact_max_rows integer DEFAULT 5000)
+ RETURNS TABLE(candidate_id uuid, full_name text, status text, availability_status text, timezone text, distance_m double precision, similarity double precision, search_method text)
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  v_limit int := LEAST(GREATEST(p_limit, 1), 1000);
+  v_center geography;
+  v_where text := '';
+  v_filtered boolean;
+  v_rows int;
+  v_fetch int;
+  v_ids uuid[];
+  v_method text;
+BEGIN
+  -- Top-k candidates by cosine similarity of their p_embedding_type
+  -- embedding to p_query_embedding (pgvector text form), restricted to
+  -- status / availability / within p_radius_m of the center.
+  --
+  -- 1. When the filters leave at most p_exact_max_rows candidates (found
+  --    through the status and gist indexes), those are ranked exactly.
+  -- 2. Otherwise the HNSW index is scanned with hnsw.ef_search =
+  --    p_ef_search: with pgvector >= 0.8 as an iterative scan, which keeps
+  --    going until enough rows pass the filters; before 0.8 by fetching
+  --    p_overfetch x p_limit nearest rows and widening (x4, up to the
+  --    ef_search maximum of 1000) while too few pass.
+  IF p_center_lat IS NOT NULL AND p_center_lon IS NOT NULL THEN
+    v_center := ST_SetSRID(ST_MakePoint(p_center_lon, p_center_lat), 4326)::geography;
+  END IF;
+
+  IF p_statuses IS NOT NULL THEN
+    v_where := v_where || ' AND c.status = ANY($3)';
+  END IF;
+  IF p_availability IS NOT NULL THEN
+    v_where := v_where || ' AND c.availability_status = ANY($4)';
+  END IF;
+  IF v_center IS NOT NULL AND p_radius_m IS NOT NULL THEN
+    v_where := v_where || ' AND ST_DWithin(c.home_geo, $5, $6)';
+  END IF;
+  v_filtered := v_where <> '';
+
+  IF v_filtered THEN
+    EXECUTE 'SELECT count(*) FROM (SELECT 1 FROM delivery.candidates c WHERE true' || v_where || ' LIMIT $7) x'
+      INTO v_rows
+      USING NULL::extensions.vector, p_embedding_type, p_statuses, p_availability, v_center, p_radius_m, p_exact_max_rows + 1;
+  END IF;
+
+  IF v_filtered AND v_rows <= p_exact_max_rows THEN
+    -- Distances computed in a materialized CTE, so the HNSW index is not used
+    v_method := 'exact';
+    EXECUTE
+      'WITH scored AS MATERIALIZED (
+         SELECT c.candidate_id, e.embedding <=> $1 AS dist
+         FROM delivery.candidates c
+         JOIN core.embeddings e
+           ON e.entity_type = ''candidate'' AND e.entity_id = c.candidate_id AND e.embedding_type = $2
+         WHERE true' || v_where || '
+       )
+       SELECT array_agg(s.candidate_id ORDER BY s.dist)
+       FROM (SELECT * FROM scored ORDER BY dist LIMIT $7) s'
+      INTO v_ids
+      USING p_query_embedding::extensions.vector, p_embedding_type, p_statuses, p_availability, v_center, p_radius_m, v_limit;
+
+  ELSIF (SELECT string_to_array(x.extversion, '.')::int[] >= ARRAY[0, 8, 0] FROM pg_extension x WHERE x.extname = 'vector') THEN
+    v_method := 'hnsw_iterative';
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(p_ef_search, v_limit), 1000)::text, true);
+    PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+    EXECUTE
+      'SELECT array_agg(h.candidate_id ORDER BY h.dist)
+       FROM (
+         SELECT c.candidate_id, e.embedding <=> $1 AS dist
+         FROM core.embeddings e
+         JOIN delivery.candidates c ON c.candidate_id = e.entity_id
+         WHERE e.entity_type = ''candidate'' AND e.embedding_type = $2' || v_where || '
+         ORDER BY e.embedding <=> $1
+         LIMIT $7
+       ) h'
+      INTO v_ids
+      USING p_query_embedding::extensions.vector, p_embedding_type, p_statuses, p_availability, v_center, p_radius_m, v_limit;
+
+  ELSE
+    v_method := 'hnsw_overfetch';
+    v_fetch := CASE WHEN v_filtered THEN LEAST(v_limit * GREATEST(p_overfetch, 1), 1000) ELSE v_limit END;
+    LOOP
+      -- An HNSW scan returns at most ef_search rows
+      PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(p_ef_search, v_fetch), 1000)::text, true);
+      EXECUTE
+        'SELECT array_agg(h.entity_id ORDER BY h.dist)
+         FROM (
+           SELECT n.entity_id, n.dist
+           FROM (
+             SELECT e.entity_id, e.embedding <=> $1 AS dist
+             FROM core.embeddings e
+             WHERE e.entity_type = ''candidate'' AND e.embedding_type = $2
+             ORDER BY e.embedding <=> $1
+             LIMIT $8
+           ) n
+           JOIN delivery.candidates c ON c.candidate_id = n.entity_id
+           WHERE true' || v_where || '
+           ORDER BY n.dist
+           LIMIT $7
+         ) h'
+        INTO v_ids
+        USING p_query_embedding::extensions.vector, p_embedding_type, p_statuses, p_availability, v_center, p_radius_m, v_limit, v_fetch;
+      EXIT WHEN NOT v_filtered OR COALESCE(cardinality(v_ids), 0) >= v_limit OR v_fetch >= 1000;
+      v_fetch := LEAST(v_fetch * 4, 1000);
+    END LOOP;
+  END IF;
+
+  RETURN QUERY
+  SELECT
+    c.candidate_id, c.full_name, c.status, c.availability_status, c.timezone,
+    CASE WHEN v_center IS NOT NULL THEN ST_Distance(c.home_geo, v_center) END,
+    1 - (e.embedding <=> p_query_embedding::extensions.vector),
+    v_method
+  FROM unnest(COALESCE(v_ids, '{}'::uuid[])) WITH ORDINALITY AS u(candidate_id, ord)
+  JOIN delivery.candidates c ON c.candidate_id = u.candidate_id
+  JOIN core.embeddings e
+    ON e.entity_type = 'candidate' AND e.entity_id = c.candidate_id AND e.embedding_type = p_embedding_type
+  ORDER BY u.ord;
+END;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_normalize_email(text);
+
+CREATE OR REPLACE FUNCTION delivery.fn_normalize_email(p_email text)
+ RETURNS text
+ LANGUAGE sql
+ IMMUTABLE
+AS $function$
+  -- Candidate identity form: trimmed, lower case, NULL when empty.
+  -- Matches the idx_candidates_email_lower expression.
+  SELECT NULLIF(lower(trim(p_email)), '');
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_normalize_phone_e164(text);
+
+CREATE OR REPLACE FUNCTION delivery.fn_normalize_phone_e164(p_phone text)
+ RETURNS text
+ LANGUAGE sql
+ IMMUTABLE
+AS $function$
+  -- E.164 form of a phone number ('+' and 8-15 digits), NULL when it cannot
+  -- be read as one. Numbers without a country code are taken as NANP (+1).
+  SELECT CASE
+    WHEN d.digits IS NULL OR d.digits = '' THEN NULL
+    WHEN d.plus AND length(d.digits) BETWEEN 8 AND 15 THEN '+' || d.digits
+    WHEN d.plus THEN NULL
+    WHEN d.digits LIKE '00%' AND length(d.digits) BETWEEN 10 AND 17 THEN '+' || substr(d.digits, 3)
+    WHEN length(d.digits) = 10 THEN '+1' || d.digits
+    WHEN length(d.digits) = 11 AND d.digits LIKE '1%' THEN '+' || d.digits
+    ELSE NULL
+  END
+  FROM (
+    SELECT
+      ltrim(p_phone) LIKE '+%' AS plus,
+      regexp_replace(split_part(lower(p_phone), 'x', 1), '[^0-9]', '', 'g') AS digits
+  ) d;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_normalize_search_text(text);
+
+CREATE OR REPLACE FUNCTION delivery.fn_normalize_search_text(p_text text)
+ RETURNS text
+ LANGUAGE sql
+ IMMUTABLE
+AS $function$
+  -- Applied to extracted_text before to_tsvector and to search queries alike.
+  -- The default parser splits on '&', so A&P would be indexed as the single
+  -- letters 'a' and 'p' and match any text holding both. Single-letter
+  -- ampersand abbreviations (A&P, A & P, R&D) become one token ('ap'), and a
+  -- slash right after one is dropped so "A&P/IA" is 'ap' 'ia' rather than
+  -- one file-path token. Such a token also matches the plain word "AP".
+  SELECT regexp_replace(p_text, '\m([[:alpha:]])[[:space:]]*&[[:space:]]*([[:alpha:]])\M/?', '\1\2 ', 'g');
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_reclaim_expired_artifact_leases(int4, int4);
+-- Replaces the (int4) signature. CREATE OR REPLACE adds an overload beside
+-- it, and calls that omit the new arguments then fail as "not unique"; drop
+-- it first:
+-- DROP FUNCTION IF EXISTS delivery.fn_reclaim_expired_artifact_leases(int4);
+
+CREATE OR REPLACE FUNCTION delivery.fn_reclaim_expired_artifact_leases(p_limit integer DEFAULT 500, p_max_attempts integer DEFAULT 5)
+ RETURNS integer
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  v_count int;
+  v_lanes text[];
+  v_lane text;
+BEGIN
+  -- Claims whose worker died (lease ran out without a heartbeat) go back to
+  -- 'registered', or to 'failed' once they used up their attempts (a file
+  -- that keeps killing its worker). Claims made before leases existed have
+  -- no expiry; they are reclaimed once untouched for an hour.
+  WITH expired AS (
+    SELECT a.artifact_id
+    FROM delivery.artifacts a
+    WHERE a.status = 'extracting'
+      AND (
+        a.lease_expires_at < now()
+        OR (a.lease_expires_at IS NULL AND a.updated_at < now() - interval '1 hour')
+      )
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  ), reclaimed AS (
+    UPDATE delivery.artifacts a
+    SET
+      status = CASE WHEN a.attempts >= p_max_attempts THEN 'failed' ELSE 'registered' END,
+      error = 'lease expired, claimed_by ' || COALESCE(a.claimed_by, 'unknown'),
+      claimed_by = NULL,
+      lease_expires_at = NULL
+    FROM expired e
+    WHERE a.artifact_id = e.artifact_id
+    RETURNING a.intake_id, a.status
+  )
+  SELECT
+    count(*),
+    array_agg(DISTINCT CASE WHEN i.source = 'import' THEN 'backfill' ELSE 'live' END)
+      FILTER (WHERE r.status = 'registered')
+  INTO v_count, v_lanes
+  FROM reclaimed r
+  JOIN delivery.candidate_intakes i ON i.intake_id = r.intake_id;
+
+  FOREACH v_lane IN ARRAY COALESCE(v_lanes, '{}'::text[]) LOOP
+    PERFORM pg_notify('delivery_artifact_registered', v_lane);
+  END LOOP;
+
+  RETURN v_count;
+END;
+$function$
+;
+
 -- DROP FUNCTION delivery.fn_register_artifact(uuid, text, text, text, text, text);
 
 CREATE OR REPLACE FUNCTION delivery.fn_register_artifact(p_intake_id uuid, p_artifact_type text, p_file_name text, p_mime_type text, p_storage_uri text, p_sha256 text)
@@ -483,6 +1230,8 @@ CREATE OR REPLACE FUNCTION delivery.fn_register_artifact(p_intake_id uuid, p_art
 AS $function$
 DECLARE
   v_artifact_id uuid;
+  v_inserted boolean;
+  v_lane text;
 BEGIN
   INSERT INTO delivery.artifacts (
     intake_id, artifact_type, file_name, mime_type, storage_uri, sha256, status
@@ -494,13 +1243,228 @@ BEGIN
   DO UPDATE SET
     storage_uri = COALESCE(EXCLUDED.storage_uri, delivery.artifacts.storage_uri),
     updated_at = now()
-  RETURNING artifact_id INTO v_artifact_id;
+  RETURNING artifact_id, (xmax = 0) INTO v_artifact_id, v_inserted;
+
+  -- Wake listening workers for the lane on commit (payload is the lane name;
+  -- identical notifications in one transaction are collapsed by Postgres).
+  -- Only for a new row: a re-registered artifact keeps its status, so there
+  -- is nothing new to claim.
+  IF v_inserted THEN
+    SELECT CASE WHEN i.source = 'import' THEN 'backfill' ELSE 'live' END
+    INTO v_lane
+    FROM delivery.candidate_intakes i
+    WHERE i.intake_id = p_intake_id;
+
+    PERFORM pg_notify('delivery_artifact_registered', COALESCE(v_lane, 'live'));
+  END IF;
 
   RETURN v_artifact_id;
 END;
 $function$
 ;
 
+-- DROP FUNCTION delivery.fn_register_artifacts_batch(_uuid, _text, _text, _text, _text, _text);
+
+CREATE OR REPLACE FUNCTION delivery.fn_register_artifacts_batch(p_intake_ids uuid[], p_artifact_types text[], p_file_names text[], p_mime_types text[], p_storage_uris text[], p_sha256s text[])
+ RETURNS TABLE(ordinal integer, artifact_id uuid)
+ LANGUAGE plpgsql
+AS $function$
+#variable_conflict use_column
+DECLARE
+  v_ordinals int[];
+  v_artifact_ids uuid[];
+  v_lanes text[];
+  v_lane text;
+BEGIN
+  -- Set-based fn_register_artifact: one row per input position (1-based ordinal).
+  -- Repeated (intake_id, sha256) pairs resolve to the same artifact; rows
+  -- without a sha256 are matched back through their pre-generated id.
+  WITH input AS (
+    SELECT
+      t.ord::int AS ord, gen_random_uuid() AS new_id,
+      t.intake_id, t.artifact_type, t.file_name, t.mime_type, t.storage_uri, t.sha256
+    FROM unnest(
+      p_intake_ids, p_artifact_types, p_file_names, p_mime_types, p_storage_uris, p_sha256s
+    ) WITH ORDINALITY AS t(intake_id, artifact_type, file_name, mime_type, storage_uri, sha256, ord)
+  ),
+  upserted AS (
+    INSERT INTO delivery.artifacts AS a (
+      artifact_id, intake_id, artifact_type, file_name, mime_type, storage_uri, sha256, status
+    )
+    SELECT DISTINCT ON (i.intake_id, COALESCE(i.sha256, i.new_id::text))
+      i.new_id, i.intake_id, i.artifact_type, i.file_name, i.mime_type, i.storage_uri, i.sha256, 'registered'
+    FROM input i
+    ORDER BY i.intake_id, COALESCE(i.sha256, i.new_id::text), i.ord
+    ON CONFLICT (intake_id, sha256)
+    DO UPDATE SET
+      storage_uri = COALESCE(EXCLUDED.storage_uri, a.storage_uri),
+      updated_at = now()
+    RETURNING a.artifact_id, a.intake_id, a.sha256, (a.xmax = 0) AS inserted
+  ),
+  resolved AS (
+    SELECT i.ord, u.artifact_id
+    FROM input i
+    JOIN upserted u
+      ON u.intake_id = i.intake_id
+     AND (u.sha256 = i.sha256 OR u.artifact_id = i.new_id)
+  )
+  SELECT
+    (SELECT array_agg(r.ord ORDER BY r.ord) FROM resolved r),
+    (SELECT array_agg(r.artifact_id ORDER BY r.ord) FROM resolved r),
+    (SELECT array_agg(DISTINCT CASE WHEN ci.source = 'import' THEN 'backfill' ELSE 'live' END)
+     FROM upserted u
+     JOIN delivery.candidate_intakes ci ON ci.intake_id = u.intake_id
+     WHERE u.inserted)
+  INTO v_ordinals, v_artifact_ids, v_lanes;
+
+  RETURN QUERY
+  SELECT t.ord, t.artifact_id
+  FROM unnest(v_ordinals, v_artifact_ids) AS t(ord, artifact_id);
+
+  -- Wake listening workers once per lane that got a new artifact (see
+  -- fn_register_artifact)
+  FOREACH v_lane IN ARRAY COALESCE(v_lanes, '{}'::text[]) LOOP
+    PERFORM pg_notify('delivery_artifact_registered', v_lane);
+  END LOOP;
+END;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_retry_artifact(uuid, text, text, int4, int4, int4, int4);
+-- Replaces the (uuid, text, int4, int4, int4, int4) signature. CREATE OR
+-- REPLACE adds an overload beside it that skips the lease check; drop it
+-- first:
+-- DROP FUNCTION IF EXISTS delivery.fn_retry_artifact(uuid, text, int4, int4, int4, int4);
+
+CREATE OR REPLACE FUNCTION delivery.fn_retry_artifact(p_artifact_id uuid, p_error text, p_worker_id text, p_max_attempts integer DEFAULT 5, p_base_delay_seconds integer DEFAULT 30, p_max_delay_seconds integer DEFAULT 3600, p_min_delay_seconds integer DEFAULT NULL::integer)
+ RETURNS text
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  v_attempts int;
+  v_delay double precision;
+BEGIN
+  -- Transient failure: back to 'registered', invisible to claims until
+  -- next_attempt_at. Once attempts (counted at claim) reach the cap the
+  -- artifact fails for good. Returns the resulting status, or NULL when the
+  -- claim is no longer held by p_worker_id (lease reclaimed).
+  SELECT a.attempts INTO v_attempts
+  FROM delivery.artifacts a
+  WHERE a.artifact_id = p_artifact_id
+    AND a.status = 'extracting'
+    AND a.claimed_by IS NOT DISTINCT FROM p_worker_id
+  FOR UPDATE;
+
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  IF v_attempts >= p_max_attempts THEN
+    UPDATE delivery.artifacts
+    SET
+      status = 'failed',
+      error = p_error,
+      next_attempt_at = NULL,
+      claimed_by = NULL,
+      lease_expires_at = NULL
+    WHERE artifact_id = p_artifact_id;
+    RETURN 'failed';
+  END IF;
+
+  -- Exponential backoff with +/-20% jitter so a throttled burst does not
+  -- come back all at once; a server Retry-After is the floor
+  v_delay := LEAST(p_max_delay_seconds, p_base_delay_seconds * power(2, GREATEST(v_attempts - 1, 0)))
+             * (0.8 + random() * 0.4);
+  v_delay := GREATEST(v_delay, COALESCE(p_min_delay_seconds, 0));
+
+  UPDATE delivery.artifacts
+  SET
+    status = 'registered',
+    error = p_error,
+    next_attempt_at = now() + make_interval(secs => v_delay),
+    claimed_by = NULL,
+    lease_expires_at = NULL
+  WHERE artifact_id = p_artifact_id;
+  RETURN 'registered';
+END;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_search_artifacts(text, int4, int4, _text);
+
+CREATE OR REPLACE FUNCTION delivery.fn_search_artifacts(p_query text, p_limit integer DEFAULT 20, p_offset integer DEFAULT 0, p_artifact_types text[] DEFAULT NULL::text[])
+ RETURNS TABLE(artifact_id uuid, intake_id uuid, artifact_type text, file_name text, updated_at timestamp with time zone, rank real, headline text)
+ LANGUAGE sql
+ STABLE
+AS $function$
+  -- Full-text search over extracted artifacts (idx_artifacts_extracted_tsv).
+  -- p_query uses web search syntax: words, "quoted phrases", OR, -exclude.
+  -- The 'simple' configuration keeps tokens such as IA and G650 as written
+  -- (no stemming, no stop words); the query goes through
+  -- fn_normalize_search_text like the indexed text, so "A&P" is the single
+  -- token 'ap' on both sides. Ranked page first, then headlines only for the
+  -- rows on the page, built from the raw text and query.
+  -- Headlines are plain, unescaped text with each match between U+E000 and
+  -- U+E001 (private use, removed from the text first); callers escape the
+  -- text before turning the markers into markup.
+  WITH q AS (
+    SELECT websearch_to_tsquery('simple'::regconfig, delivery.fn_normalize_search_text(p_query)) AS q,
+           websearch_to_tsquery('simple'::regconfig, p_query) AS display
+  ),
+  page AS (
+    SELECT a.artifact_id, a.intake_id, a.artifact_type, a.file_name, a.updated_at,
+           ts_rank(a.extracted_tsv, q.q, 1) AS rank
+    FROM delivery.artifacts a, q
+    WHERE a.status = 'extracted'
+      AND a.extracted_tsv @@ q.q
+      AND (p_artifact_types IS NULL OR a.artifact_type = ANY(p_artifact_types))
+    ORDER BY rank DESC, a.artifact_id
+    LIMIT LEAST(GREATEST(p_limit, 1), 1000)
+    OFFSET GREATEST(p_offset, 0)
+  )
+  SELECT p.artifact_id, p.intake_id, p.artifact_type, p.file_name, p.updated_at, p.rank,
+         ts_headline(
+           'simple'::regconfig,
+           translate(left(a.extracted_text, 100000), U&'\E000\E001', ''),
+           q.display,
+           'StartSel=' || U&'\E000' || ', StopSel=' || U&'\E001'
+             || ', MaxFragments=3, MaxWords=20, MinWords=5, FragmentDelimiter=" … "'
+         )
+  FROM page p
+  JOIN delivery.artifacts a ON a.artifact_id = p.artifact_id
+  CROSS JOIN q
+  ORDER BY p.rank DESC, p.artifact_id;
+$function$
+;
+
+-- DROP FUNCTION delivery.fn_set_artifact_classifications_batch(_uuid, _jsonb);
+
+CREATE OR REPLACE FUNCTION delivery.fn_set_artifact_classifications_batch(p_artifact_ids uuid[], p_classifications jsonb[])
+ RETURNS integer
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  v_count int;
+BEGIN
+  -- Merges classification fields (detected_artifact_type, confidence, ...)
+  -- into extracted_json of extracted artifacts; other keys are kept. The
+  -- last entry wins when an artifact repeats. Returns rows updated.
+  UPDATE delivery.artifacts a
+  SET extracted_json = COALESCE(a.extracted_json, '{}'::jsonb) || t.classification
+  FROM (
+    SELECT DISTINCT ON (u.artifact_id) u.artifact_id, u.classification
+    FROM unnest(p_artifact_ids, p_classifications) WITH ORDINALITY AS u(artifact_id, classification, ord)
+    ORDER BY u.artifact_id, u.ord DESC
+  ) t
+  WHERE a.artifact_id = t.artifact_id
+    AND a.status = 'extracted';
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$function$
+;
+
 -- DROP FUNCTION delivery.fn_upsert_candidate(text, text, text, text, extensions.geography, jsonb);
 
 CREATE OR REPLACE FUNCTION delivery.fn_upsert_candidate(p_phone_e164 text, p_email text, p_full_name text, p_timezone text, p_home_geo geography, p_facts_patch jsonb)
@@ -509,27 +1473,38 @@ CREATE OR REPLACE FUNCTION delivery.fn_upsert_candidate(p_phone_e164 text, p_ema
 AS $function$
 DECLARE
   v_candidate_id uuid;
+  v_phone text := delivery.fn_normalize_phone_e164(p_phone_e164);
+  v_email text := delivery.fn_normalize_email(p_email);
 BEGIN
-  SELECT candidate_id INTO v_candidate_id
-  FROM delivery.candidates
-  WHERE (p_phone_e164 IS NOT NULL AND phone_e164 = p_phone_e164)
-     OR (p_email IS NOT NULL AND email = p_email)
-  ORDER BY created_at
-  LIMIT 1;
+  -- Phone first (unique), then the oldest candidate with the same email,
+  -- case-insensitively. Two separate lookups so each uses its own index.
+  IF v_phone IS NOT NULL THEN
+    SELECT candidate_id INTO v_candidate_id
+    FROM delivery.candidates
+    WHERE phone_e164 = v_phone;
+  END IF;
+
+  IF v_candidate_id IS NULL AND v_email IS NOT NULL THEN
+    SELECT candidate_id INTO v_candidate_id
+    FROM delivery.candidates
+    WHERE lower(email) = v_email
+    ORDER BY created_at
+    LIMIT 1;
+  END IF;
 
   IF v_candidate_id IS NULL THEN
     INSERT INTO delivery.candidates (
       phone_e164, email, full_name, timezone, home_geo, facts, last_inbound_at
     )
     VALUES (
-      p_phone_e164, p_email, p_full_name, p_timezone, p_home_geo, COALESCE(p_facts_patch,'{}'::jsonb), now()
+      v_phone, v_email, p_full_name, p_timezone, p_home_geo, COALESCE(p_facts_patch,'{}'::jsonb), now()
     )
     RETURNING candidate_id INTO v_candidate_id;
   ELSE
     UPDATE delivery.candidates
     SET
-      phone_e164      = COALESCE(phone_e164, p_phone_e164),
-      email           = COALESCE(email, p_email),
+      phone_e164      = COALESCE(phone_e164, v_phone),
+      email           = COALESCE(email, v_email),
       full_name       = COALESCE(p_full_name, full_name),
       timezone        = COALESCE(p_timezone, timezone),
       home_geo        = COALESCE(p_home_geo, home_geo),
@@ -541,4 +1516,244 @@ BEGIN
   RETURN v_candidate_id;
 END;
 $function$
+;
+
+-- DROP FUNCTION delivery.fn_upsert_candidates_batch(_text, _text, _text, _text, _float8, _float8, _jsonb);
+
+CREATE OR REPLACE FUNCTION delivery.fn_upsert_candidates_batch(p_phones text[], p_emails text[], p_full_names text[], p_timezones text[], p_home_lats double precision[], p_home_lons double precision[], p_facts_patches jsonb[])
+ RETURNS TABLE(ordinal integer, candidate_id uuid, created boolean)
+ LANGUAGE plpgsql
+AS $function$
+DECLARE
+  -- Every distinct input phone / email gets a key id (its index here)
+  k_phones text[];
+  k_emails text[];
+  v_pid int[];
+  v_eid int[];
+  -- Candidates in age order: existing ones first, then the ones this batch
+  -- creates. c_pid / c_eid: key id of the candidate's phone / email, 0 for
+  -- one no input uses, NULL for none.
+  c_ids uuid[];
+  c_pid int[];
+  c_eid int[];
+  c_existing int;
+  -- Key id -> candidate index: the phone's holder, the email's oldest holder
+  phone_holder int[];
+  email_holder int[];
+  v_pick int[];
+  v_n int;
+  v_i int;
+  v_c int;
+BEGIN
+  -- Set-based fn_upsert_candidate: the same candidates as calling it once
+  -- per input in order, one row per input position (1-based ordinal).
+  -- Identity is the normalized phone (unique), else the oldest candidate
+  -- with the same lower(email); a candidate matched by one takes the other
+  -- if it has none, which changes what later inputs match, so identities
+  -- are resolved by replaying those lookups in memory (array subscripts,
+  -- linear in the batch) over existing candidates read with one index
+  -- lookup per key. Writes are one INSERT and one UPDATE. Patches apply in
+  -- input order (later non-NULL name/timezone/geo and later fact keys win).
+  -- Home location comes as lat/lon (NULL = unknown).
+  SELECT
+    array_agg(x.pid ORDER BY x.ord),
+    array_agg(x.eid ORDER BY x.ord),
+    COALESCE(array_agg(DISTINCT x.phone) FILTER (WHERE x.phone IS NOT NULL), '{}'),
+    COALESCE(array_agg(DISTINCT x.email) FILTER (WHERE x.email IS NOT NULL), '{}'),
+    count(*)
+  INTO v_pid, v_eid, k_phones, k_emails, v_n
+  FROM (
+    SELECT
+      n.ord, n.phone, n.email,
+      -- NULLs sort last, so the ids of present keys are 1..count, in the
+      -- same order as array_agg(DISTINCT ...)
+      CASE WHEN n.phone IS NOT NULL THEN dense_rank() OVER (ORDER BY n.phone) END AS pid,
+      CASE WHEN n.email IS NOT NULL THEN dense_rank() OVER (ORDER BY n.email) END AS eid
+    FROM (
+      SELECT
+        t.ord,
+        delivery.fn_normalize_phone_e164(t.phone) AS phone,
+        delivery.fn_normalize_email(t.email) AS email
+      FROM unnest(
+        p_phones, p_emails, p_full_names, p_timezones, p_home_lats, p_home_lons, p_facts_patches
+      ) WITH ORDINALITY AS t(phone, email, full_name, timezone, lat, lon, facts, ord)
+    ) n
+  ) x;
+
+  -- Existing candidates an input can reach: the holder of each input phone
+  -- and the oldest holder of each input email, one index lookup per key.
+  -- Any phone/email a candidate gains in the batch comes from an input that
+  -- already matched it. A candidate that is neither holder for a key it has
+  -- gets key id 0: for it only NULL or not matters.
+  SELECT
+    COALESCE(array_agg(h.candidate_id ORDER BY h.created_at, h.candidate_id), '{}'),
+    COALESCE(array_agg(h.pid ORDER BY h.created_at, h.candidate_id), '{}'),
+    COALESCE(array_agg(h.eid ORDER BY h.created_at, h.candidate_id), '{}')
+  INTO c_ids, c_pid, c_eid
+  FROM (
+    SELECT
+      x.candidate_id, x.created_at,
+      CASE WHEN bool_or(x.has_phone) THEN COALESCE(max(x.pid), 0) END AS pid,
+      CASE WHEN bool_or(x.has_email) THEN COALESCE(max(x.eid), 0) END AS eid
+    FROM (
+      SELECT c.candidate_id, c.created_at, kp.id::int AS pid, NULL::int AS eid,
+             true AS has_phone, c.email IS NOT NULL AS has_email
+      FROM unnest(k_phones) WITH ORDINALITY AS kp(key, id)
+      JOIN delivery.candidates c ON c.phone_e164 = kp.key
+      UNION ALL
+      SELECT o.candidate_id, o.created_at, NULL, ke.id::int,
+             o.phone_e164 IS NOT NULL, true
+      FROM unnest(k_emails) WITH ORDINALITY AS ke(key, id)
+      CROSS JOIN LATERAL (
+        SELECT m.candidate_id, m.created_at, m.phone_e164
+        FROM delivery.candidates m
+        WHERE lower(m.email) = ke.key
+        ORDER BY m.created_at, m.candidate_id
+        LIMIT 1
+      ) o
+    ) x
+    GROUP BY x.candidate_id, x.created_at
+  ) h;
+  c_existing := COALESCE(array_length(c_ids, 1), 0);
+
+  phone_holder := array_fill(NULL::int, ARRAY[COALESCE(array_length(k_phones, 1), 0)]);
+  email_holder := array_fill(NULL::int, ARRAY[COALESCE(array_length(k_emails, 1), 0)]);
+  FOR v_c IN 1 .. c_existing LOOP
+    IF c_pid[v_c] > 0 THEN
+      phone_holder[c_pid[v_c]] := v_c;
+    END IF;
+    IF c_eid[v_c] > 0 AND email_holder[c_eid[v_c]] IS NULL THEN
+      email_holder[c_eid[v_c]] := v_c;
+    END IF;
+  END LOOP;
+
+  -- fn_upsert_candidate's lookups and COALESCEs, input by input
+  v_pick := array_fill(NULL::int, ARRAY[v_n]);
+  FOR v_i IN 1 .. v_n LOOP
+    v_c := NULL;
+    IF v_pid[v_i] IS NOT NULL THEN
+      v_c := phone_holder[v_pid[v_i]];
+    END IF;
+    IF v_c IS NULL AND v_eid[v_i] IS NOT NULL THEN
+      v_c := email_holder[v_eid[v_i]];
+    END IF;
+
+    IF v_c IS NULL THEN
+      c_ids := array_append(c_ids, gen_random_uuid());
+      c_pid := array_append(c_pid, v_pid[v_i]);
+      c_eid := array_append(c_eid, v_eid[v_i]);
+      v_c := array_length(c_ids, 1);
+      IF v_pid[v_i] IS NOT NULL THEN
+        phone_holder[v_pid[v_i]] := v_c;
+      END IF;
+      IF v_eid[v_i] IS NOT NULL AND email_holder[v_eid[v_i]] IS NULL THEN
+        email_holder[v_eid[v_i]] := v_c;
+      END IF;
+    ELSE
+      -- A phone only gets here unheld (the phone lookup missed)
+      IF c_pid[v_c] IS NULL AND v_pid[v_i] IS NOT NULL THEN
+        c_pid[v_c] := v_pid[v_i];
+        phone_holder[v_pid[v_i]] := v_c;
+      END IF;
+      IF c_eid[v_c] IS NULL AND v_eid[v_i] IS NOT NULL THEN
+        c_eid[v_c] := v_eid[v_i];
+        IF email_holder[v_eid[v_i]] IS NULL OR email_holder[v_eid[v_i]] > v_c THEN
+          email_holder[v_eid[v_i]] := v_c;
+        END IF;
+      END IF;
+    END IF;
+    v_pick[v_i] := v_c;
+  END LOOP;
+
+  RETURN QUERY
+  WITH input AS (
+    SELECT
+      t.ord::int AS ord,
+      NULLIF(trim(t.full_name), '') AS full_name,
+      t.timezone,
+      CASE WHEN t.lat IS NOT NULL AND t.lon IS NOT NULL
+        THEN ST_SetSRID(ST_MakePoint(t.lon, t.lat), 4326)::geography
+      END AS home_geo,
+      COALESCE(t.facts, '{}'::jsonb) AS facts
+    FROM unnest(
+      p_phones, p_emails, p_full_names, p_timezones, p_home_lats, p_home_lons, p_facts_patches
+    ) WITH ORDINALITY AS t(phone, email, full_name, timezone, lat, lon, facts, ord)
+  ),
+  resolved AS (
+    SELECT i.*, x.c, c_ids[x.c] AS cid, x.c > c_existing AS is_new
+    FROM input i
+    JOIN unnest(v_pick) WITH ORDINALITY AS x(c, ord) ON x.ord = i.ord
+  ),
+  merged_facts AS (
+    -- jsonb keeps the last value of a repeated key
+    SELECT r.c, jsonb_object_agg(kv.key, kv.value ORDER BY r.ord) AS facts
+    FROM resolved r, jsonb_each(r.facts) kv
+    GROUP BY r.c
+  ),
+  patches AS (
+    SELECT
+      r.c,
+      c_ids[r.c] AS cid,
+      r.c > c_existing AS is_new,
+      -- Phone/email the replay gave the candidate (existing values are kept)
+      CASE WHEN c_pid[r.c] > 0 THEN k_phones[c_pid[r.c]] END AS phone,
+      CASE WHEN c_eid[r.c] > 0 THEN k_emails[c_eid[r.c]] END AS email,
+      (array_agg(r.full_name ORDER BY r.ord DESC) FILTER (WHERE r.full_name IS NOT NULL))[1] AS full_name,
+      (array_agg(r.timezone ORDER BY r.ord DESC) FILTER (WHERE r.timezone IS NOT NULL))[1] AS timezone,
+      (array_agg(r.home_geo ORDER BY r.ord DESC) FILTER (WHERE r.home_geo IS NOT NULL))[1] AS home_geo,
+      COALESCE(f.facts, '{}'::jsonb) AS facts
+    FROM resolved r
+    LEFT JOIN merged_facts f ON f.c = r.c
+    GROUP BY r.c, f.facts
+  ),
+  inserted AS (
+    INSERT INTO delivery.candidates (
+      candidate_id, phone_e164, email, full_name, timezone, home_geo, facts, last_inbound_at
+    )
+    SELECT p.cid, p.phone, p.email, p.full_name, p.timezone, p.home_geo, p.facts, now()
+    FROM patches p
+    WHERE p.is_new
+    RETURNING 1
+  ),
+  updated AS (
+    UPDATE delivery.candidates c
+    SET
+      phone_e164      = COALESCE(c.phone_e164, p.phone),
+      email           = COALESCE(c.email, p.email),
+      full_name       = COALESCE(p.full_name, c.full_name),
+      timezone        = COALESCE(p.timezone, c.timezone),
+      home_geo        = COALESCE(p.home_geo, c.home_geo),
+      facts           = c.facts || p.facts,
+      last_inbound_at = now()
+    FROM patches p
+    WHERE c.candidate_id = p.cid
+      AND NOT p.is_new
+    RETURNING 1
+  )
+  SELECT r.ord, r.cid, r.is_new
+  FROM resolved r
+  ORDER BY r.ord;
+END;
+$function$
+;
+
+-- DROP FUNCTION delivery.set_extracted_tsv();
+
+CREATE OR REPLACE FUNCTION delivery.set_extracted_tsv()
+ RETURNS trigger
+ LANGUAGE plpgsql
+AS $function$
+BEGIN
+  -- extracted_tsv is kept up to date here rather than as a generated column.
+  -- Postgres recomputes a generated column on every UPDATE of the row, so
+  -- writes that only touch extracted_json or status would re-run to_tsvector.
+  IF TG_OP = 'INSERT' OR NEW.extracted_text IS DISTINCT FROM OLD.extracted_text THEN
+    NEW.extracted_tsv = to_tsvector(
+      'simple'::regconfig,
+      delivery.fn_normalize_search_text(left(COALESCE(NEW.extracted_text, ''::text), 100000))
+    );
+  END IF;
+  RETURN NEW;
+END;
+$function$
 ;
\ No newline at end of file
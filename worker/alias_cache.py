@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from app.db.functions import fn_list_concept_aliases_since, fn_resolve_concept_codes
+
+
+logger = logging.getLogger(__name__)
+
+# Rows committed by a transaction that started before our last load carry an
+# updated_at older than the watermark; re-reading a short overlap catches them
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+# extracted_json.structured field -> core.concepts.concept_type
+STRUCTURED_CONCEPTS = {"roles": "role", "certifications": "certification", "aircraft": "aircraft"}
+
+
+def alias_key(text: str) -> str:
+    # Same folding as core.fn_resolve_concept_code: lower(trim(raw_text))
+    return text.strip().lower()
+
+
+class AliasCache:
+    """
+    Worker-side copy of core.concept_aliases -> core.concepts.canonical_code.
+
+    Loaded in bulk with core.fn_list_concept_aliases_since, then refreshed
+    incrementally by updated_at every `refresh_seconds`; a full reload every
+    `full_reload_seconds` drops deleted aliases. Lookups are dict hits.
+
+    Values not in the cache are resolved together in one
+    core.fn_resolve_concept_codes call (an alias may have been added since
+    the last refresh); values still unknown are remembered as misses until
+    the next refresh so they do not cost a round trip each time.
+    """
+
+    def __init__(self, refresh_seconds: float = 60, full_reload_seconds: float = 3600) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.full_reload_seconds = full_reload_seconds
+
+        self._codes: dict[tuple[str, str], str] = {}
+        self._misses: set[tuple[str, str]] = set()
+        self._watermark: datetime | None = None
+        self._refreshed_at = 0.0
+        self._full_loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    async def refresh(self, force_full: bool = False) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            full = force_full or self._watermark is None or now - self._full_loaded_at >= self.full_reload_seconds
+            since = None if full else self._watermark - WATERMARK_OVERLAP
+            rows = await fn_list_concept_aliases_since(since)
+
+            codes = {} if full else self._codes
+            for r in rows:
+                codes[(r["concept_type"], alias_key(r["alias_text"]))] = r["canonical_code"]
+                if self._watermark is None or r["updated_at"] > self._watermark:
+                    self._watermark = r["updated_at"]
+            self._codes = codes
+            self._misses.clear()
+            self._refreshed_at = now
+            if full:
+                self._full_loaded_at = now
+            logger.info(f"alias_cache_refreshed full={full} rows={len(rows)} size={len(self._codes)}")
+
+    async def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+            try:
+                await self.refresh()
+            except Exception:
+                # Keep serving the aliases we have; try again next interval
+                self._refreshed_at = time.monotonic()
+                logger.exception(f"alias_cache_refresh_failed size={len(self._codes)}")
+
+    def lookup(self, concept_type: str, raw_text: str) -> str | None:
+        """Cache-only lookup, no I/O."""
+        return self._codes.get((concept_type, alias_key(raw_text)))
+
+    async def resolve_many(self, pairs: list[tuple[str, str]]) -> list[str | None]:
+        """canonical_code (or None) per (concept_type, raw_text), in input order."""
+        await self._maybe_refresh()
+
+        out: list[str | None] = []
+        leftovers: dict[tuple[str, str], str] = {}
+        for concept_type, raw in pairs:
+            key = (concept_type, alias_key(raw))
+            code = self._codes.get(key)
+            if code is None and key not in self._misses:
+                leftovers.setdefault(key, raw)
+            out.append(code)
+
+        if leftovers:
+            keys = list(leftovers)
+            try:
+                codes = await fn_resolve_concept_codes([(t, leftovers[(t, k)]) for t, k in keys])
+            except Exception:
+                logger.exception(f"alias_cache_resolve_failed count={len(keys)}")
+                return out
+            for key, code in zip(keys, codes):
+                if code is None:
+                    self._misses.add(key)
+                else:
+                    self._codes[key] = code
+            for i, (concept_type, raw) in enumerate(pairs):
+                if out[i] is None:
+                    out[i] = self._codes.get((concept_type, alias_key(raw)))
+        return out
+
+    async def normalize(self, values: dict[str, list[str]]) -> dict[str, dict[str, list[str]]]:
+        """
+        {concept_type: [raw values]} -> {"normalized": {type: [codes]},
+        "unresolved": {type: [raw values]}}, for extracted_json.
+        """
+        pairs = [(t, raw) for t, raws in values.items() for raw in raws if raw and raw.strip()]
+        codes = await self.resolve_many(pairs)
+
+        normalized: dict[str, list[str]] = {}
+        unresolved: dict[str, list[str]] = {}
+        for (concept_type, raw), code in zip(pairs, codes):
+            if code is None:
+                bucket = unresolved.setdefault(concept_type, [])
+                if raw not in bucket:
+                    bucket.append(raw)
+            else:
+                bucket = normalized.setdefault(concept_type, [])
+                if code not in bucket:
+                    bucket.append(code)
+        return {"normalized": normalized, "unresolved": unresolved}
+
+    async def normalize_structured(self, structured: dict | None) -> dict[str, dict[str, list[str]]]:
+        """normalize() over the roles, certifications and aircraft of extracted_json.structured."""
+        fields = (structured or {}).get("fields") or {}
+        values = {
+            concept_type: [v["value"] for v in fields[name]]
+            for name, concept_type in STRUCTURED_CONCEPTS.items()
+            if fields.get(name)
+        }
+        return await self.normalize(values)
@@ -0,0 +1,479 @@
+"""
+Offline bulk import: register, extract and finalize a local archive without
+going through /v1/intakes/ingest, /v1/artifacts/register and an HTTP
+download per file.
+
+SOURCE is a directory (every file with one of --extensions, walked in sorted
+order, one intake per file) or a JSONL manifest with one object per file:
+
+    {"path": "2019/jane_doe.pdf", "artifact_type": "resume",
+     "source_message_id": "crm-4411", "file_name": "Jane Doe.pdf",
+     "mime_type": "application/pdf", "received_at": "2019-03-02T10:00:00Z",
+     "recruiter_email": "r@example.com"}
+
+Only "path" is required (relative paths are resolved against the manifest's
+directory); lines sharing a source_message_id become one intake. Intakes are
+created with source 'import' (the backfill lane).
+
+Per batch, files are hashed into the blob store on a thread pool; intakes and
+artifacts are registered with one delivery.fn_ingest_intakes_with_artifacts_batch
+call, claimed with delivery.fn_claim_artifacts_by_ids, extracted on a process
+pool (identical files once), normalized through the alias cache
+(worker/alias_cache.py) and written with delivery.fn_finalize_artifacts_batch
+/ delivery.fn_fail_artifacts_batch. The next batch is hashed and registered
+while the current one is extracted.
+
+Only errors caused by the file fail it for good. Transient ones go back to
+'registered' with backoff (delivery.fn_retry_artifact) for the backfill lane
+to pick up. When a parser process dies, the files that were in flight with it
+are parsed again on a fresh pool, so one bad file does not fail its batch.
+
+The checkpoint file records how many inputs are done and the worker id that
+holds the claims; re-running the same command resumes after the last
+finished batch and picks up the claims of an interrupted one.
+
+    python -m worker.bulk_import /archive/resumes --processes 8
+    python -m worker.bulk_import manifest.jsonl --checkpoint manifest.checkpoint.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import mimetypes
+import os
+import socket
+import time
+import traceback
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterator
+from uuid import UUID
+
+from app.blob_store import StoredBlob, get_blob_store
+from app.db.client import db
+from app.db.functions import (
+    fn_claim_artifacts_by_ids,
+    fn_fail_artifacts_batch,
+    fn_finalize_artifact_extraction,
+    fn_finalize_artifacts_batch,
+    fn_ingest_intakes_with_artifacts_batch,
+    fn_retry_artifact,
+)
+from worker.alias_cache import AliasCache
+from worker.extractors.extract import extract_text_from_body, open_blob_body
+from worker.pipeline import analysis_meta
+from worker.utils.retry_policy import classify_error
+from worker.utils.spool import MAX_DOWNLOAD_BYTES
+
+
+SOURCE = "import"
+DEFAULT_EXTENSIONS = ".pdf,.docx,.txt"
+
+
+@dataclass
+class ImportEntry:
+    path: str
+    rel_path: str
+    artifact_type: str
+    file_name: str
+    mime_type: str | None
+    source_message_id: str
+    received_at: datetime | None = None
+    recruiter_email: str | None = None
+    subject: str | None = None
+
+
+def iter_directory(root: str, extensions: set[str], artifact_type: str) -> Iterator[ImportEntry]:
+    """Files under `root` in a stable (sorted) order, so a resumed run skips the same prefix."""
+    root = os.path.abspath(root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1].lower() not in extensions:
+                continue
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, root)
+            yield ImportEntry(
+                path=path,
+                rel_path=rel,
+                artifact_type=artifact_type,
+                file_name=name,
+                mime_type=mimetypes.guess_type(name)[0],
+                source_message_id=rel,
+            )
+
+
+def iter_manifest(manifest: str, artifact_type: str) -> Iterator[ImportEntry]:
+    base = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if not row.get("path"):
+                raise ValueError(f"{manifest}:{line_no}: missing path")
+            path = os.path.join(base, row["path"])
+            file_name = row.get("file_name") or os.path.basename(row["path"])
+            received_at = row.get("received_at")
+            yield ImportEntry(
+                path=path,
+                rel_path=row["path"],
+                artifact_type=row.get("artifact_type") or artifact_type,
+                file_name=file_name,
+                mime_type=row.get("mime_type") or mimetypes.guess_type(file_name)[0],
+                source_message_id=str(row.get("source_message_id") or row["path"]),
+                received_at=datetime.fromisoformat(received_at.replace("Z", "+00:00")) if received_at else None,
+                recruiter_email=row.get("recruiter_email"),
+                subject=row.get("subject"),
+            )
+
+
+def _store_file(path: str) -> tuple[StoredBlob, float]:
+    # Runs on the hashing thread pool
+    blob = get_blob_store().store_file(path, MAX_DOWNLOAD_BYTES)
+    return blob, os.stat(path).st_mtime
+
+
+def _extract_blob(storage_uri: str, file_name: str, mime_type: str | None) -> tuple[str, dict[str, Any]]:
+    # Runs in a pool process; same steps as the pipeline for a blob:// artifact
+    t0 = time.perf_counter()
+    body, headers = open_blob_body(storage_uri)
+    try:
+        text, meta = extract_text_from_body(body, headers, file_name, mime_type)
+    finally:
+        body.cleanup()
+    parse_ms = round((time.perf_counter() - t0) * 1000, 1)
+    meta.update(analysis_meta(text))
+    meta["timings"] = {"parse_ms": parse_ms, **meta.get("timings", {})}
+    return text, meta
+
+
+class Checkpoint:
+    """Progress file, rewritten atomically after every finished batch."""
+
+    def __init__(self, path: str, source: str) -> None:
+        self.path = path
+        self.source = source
+        self.done = 0
+        self.worker_id = f"bulk-import-{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.totals: Counter[str] = Counter()
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        if state.get("source") != self.source:
+            raise SystemExit(
+                f"checkpoint {self.path} belongs to {state.get('source')}; "
+                "pass another --checkpoint or --restart"
+            )
+        self.done = int(state["done"])
+        self.worker_id = state["worker_id"]
+        self.totals.update(state.get("totals") or {})
+        return True
+
+    def save(self) -> None:
+        state = {
+            "source": self.source,
+            "done": self.done,
+            "worker_id": self.worker_id,
+            "totals": dict(self.totals),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+@dataclass
+class PreparedBatch:
+    size: int
+    claimed: list[dict[str, Any]]
+    counts: Counter[str]
+
+
+@dataclass
+class ExtractedBatch:
+    finalized: list[dict[str, Any]]
+    errors: dict[UUID, str]  # permanent: fail
+    retries: dict[UUID, tuple[str, float | None]]  # transient: (error, retry_after)
+
+
+class BulkImporter:
+    def __init__(
+        self, checkpoint: Checkpoint, processes: int, hash_threads: int, lease_seconds: int, aliases: AliasCache
+    ) -> None:
+        self.checkpoint = checkpoint
+        self.aliases = aliases
+        self.processes = processes
+        self.lease_seconds = lease_seconds
+        self._hash_pool = ThreadPoolExecutor(max_workers=hash_threads, thread_name_prefix="import-hash")
+        self._parse_pool = ProcessPoolExecutor(max_workers=processes)
+
+    def close(self) -> None:
+        self._hash_pool.shutdown(wait=True, cancel_futures=True)
+        self._parse_pool.shutdown(wait=True, cancel_futures=True)
+
+    async def prepare(self, batch: list[ImportEntry]) -> PreparedBatch:
+        """Hash and store the files, register intakes + artifacts, claim them."""
+        loop = asyncio.get_running_loop()
+        counts: Counter[str] = Counter(files=len(batch))
+        stored = await asyncio.gather(
+            *(loop.run_in_executor(self._hash_pool, _store_file, e.path) for e in batch),
+            return_exceptions=True,
+        )
+
+        intakes: list[dict[str, Any]] = []
+        intake_ordinal: dict[str, int] = {}
+        attachments: list[dict[str, Any]] = []
+        for entry, result in zip(batch, stored):
+            if isinstance(result, BaseException):
+                counts["skipped"] += 1
+                print(f"[import] skipped path={entry.rel_path} error={result}")
+                continue
+            blob, mtime = result
+            counts["new_blobs" if not blob.existed else "known_blobs"] += 1
+
+            ordinal = intake_ordinal.get(entry.source_message_id)
+            if ordinal is None:
+                intakes.append({
+                    "source": SOURCE,
+                    "source_message_id": entry.source_message_id,
+                    "received_at": entry.received_at or datetime.fromtimestamp(mtime, timezone.utc),
+                    "recruiter_email": entry.recruiter_email,
+                    "subject": entry.subject,
+                    "raw_payload": {"path": entry.rel_path, "bytes": blob.size},
+                })
+                ordinal = intake_ordinal[entry.source_message_id] = len(intakes)
+            attachments.append({
+                "intake_ordinal": ordinal,
+                "artifact_type": entry.artifact_type,
+                "file_name": entry.file_name,
+                "mime_type": entry.mime_type,
+                "storage_uri": blob.uri,
+                "sha256": blob.sha256,
+            })
+
+        if not attachments:
+            return PreparedBatch(size=len(batch), claimed=[], counts=counts)
+
+        rows = await fn_ingest_intakes_with_artifacts_batch(intakes, attachments)
+        artifact_ids = list(dict.fromkeys(r["artifact_id"] for r in rows if r["artifact_id"] is not None))
+        claimed = await fn_claim_artifacts_by_ids(artifact_ids, self.checkpoint.worker_id, self.lease_seconds)
+        counts["intakes"] += len(intakes)
+        counts["artifacts"] += len(artifact_ids)
+        # Already extracted or failed by an earlier run, or taken by a worker
+        counts["not_claimed"] += len(artifact_ids) - len(claimed)
+        return PreparedBatch(size=len(batch), claimed=claimed, counts=counts)
+
+    async def extract(self, prepared: PreparedBatch) -> ExtractedBatch:
+        """Extract each distinct sha256 once; copies get the result as a cache hit."""
+        by_sha: dict[str, list[dict[str, Any]]] = {}
+        for item in prepared.claimed:
+            by_sha.setdefault(item["sha256"], []).append(item)
+
+        firsts = [items[0] for items in by_sha.values()]
+        results = await self._parse(firsts)
+
+        out = ExtractedBatch(finalized=[], errors={}, retries={})
+        for first, result in zip(firsts, results):
+            items = by_sha[first["sha256"]]
+            if isinstance(result, BaseException):
+                err = f"{result}\n{''.join(traceback.format_exception(result))}"
+                if isinstance(result, BrokenProcessPool):
+                    # Crashed a fresh pool on its own: the file is the cause
+                    err = f"parser process died on this file\n{err}"
+                    cls = None
+                else:
+                    cls = classify_error(result)
+                for item in items:
+                    if cls is not None and cls.transient:
+                        out.retries[item["artifact_id"]] = (err, cls.retry_after)
+                    else:
+                        out.errors[item["artifact_id"]] = err
+                continue
+            text, meta = result
+            meta.update(await self.aliases.normalize_structured(meta.get("structured")))
+            # Postgres text cannot hold NUL; one bad file must not fail the batch write
+            text = text.replace("\x00", "")
+            out.finalized.append({"artifact_id": first["artifact_id"], "extracted_text": text,
+                                  "extracted_json": {**meta, "cache_hit": False}})
+            for item in items[1:]:
+                out.finalized.append({
+                    "artifact_id": item["artifact_id"],
+                    "extracted_text": text,
+                    "extracted_json": {
+                        **meta,
+                        "cache_hit": True,
+                        "cache_source_artifact_id": str(first["artifact_id"]),
+                    },
+                })
+        return out
+
+    async def _parse(self, items: list[dict[str, Any]]) -> list[Any]:
+        """
+        _extract_blob for every item, results (or exceptions) in input order.
+
+        A dying parser process breaks the whole pool, so every file in flight
+        gets BrokenProcessPool, not only the one that killed it. Those are
+        parsed again on a fresh pool, first together, then one at a time for
+        any that break it again; only a file that breaks a pool on its own
+        keeps the BrokenProcessPool.
+        """
+        results = await self._parse_round(items)
+        victims = [i for i, r in enumerate(results) if isinstance(r, BrokenProcessPool)]
+        if victims:
+            print(f"[import] parser pool broke, parsing {len(victims)} files again")
+            again = await self._parse_round([items[i] for i in victims])
+            for i, r in zip(victims, again):
+                results[i] = r
+            victims = [i for i in victims if isinstance(results[i], BrokenProcessPool)]
+        if victims:
+            print(f"[import] parser pool broke again, isolating {len(victims)} files")
+            for i in victims:
+                results[i] = (await self._parse_round([items[i]]))[0]
+        return results
+
+    async def _parse_round(self, items: list[dict[str, Any]]) -> list[Any]:
+        loop = asyncio.get_running_loop()
+        pool = self._parse_pool
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, _extract_blob, i["storage_uri"], i["file_name"] or "", i["mime_type"])
+                for i in items
+            ),
+            return_exceptions=True,
+        )
+        if any(isinstance(r, BrokenProcessPool) for r in results) and self._parse_pool is pool:
+            # A parser process died (OOM, segfault in a native lib)
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.processes)
+        return results
+
+    async def finish(self, batch: ExtractedBatch) -> Counter[str]:
+        """
+        Write the batch; returns counts of extracted, failed and retried rows,
+        and lease_lost for claims another worker took over meanwhile (their
+        results are dropped).
+        """
+        worker_id = self.checkpoint.worker_id
+        total = len(batch.finalized) + len(batch.errors) + len(batch.retries)
+        outcome: Counter[str] = Counter()
+        try:
+            outcome["extracted"] = await fn_finalize_artifacts_batch(batch.finalized, worker_id)
+        except Exception as e:
+            # Isolate the rows the database rejects instead of losing the batch
+            print(f"[import] batch finalize failed, writing one by one error={e}")
+            for a in batch.finalized:
+                try:
+                    outcome["extracted"] += await fn_finalize_artifact_extraction(
+                        a["artifact_id"], a["extracted_text"], a["extracted_json"], worker_id
+                    )
+                except Exception as row_error:
+                    batch.errors[a["artifact_id"]] = f"finalize failed: {row_error}"
+        outcome["failed"] = await fn_fail_artifacts_batch(batch.errors, worker_id)
+        for artifact_id, (err, retry_after) in batch.retries.items():
+            status = await fn_retry_artifact(
+                artifact_id,
+                err,
+                worker_id,
+                min_delay_seconds=int(retry_after) if retry_after is not None else None,
+            )
+            if status is not None:
+                outcome["retried" if status == "registered" else "failed"] += 1
+        outcome["lease_lost"] = total - sum(outcome.values())
+        return outcome
+
+    async def run(self, entries: Iterator[ImportEntry], batch_size: int, limit: int | None) -> None:
+        cp = self.checkpoint
+        remaining = itertools.islice(entries, cp.done, None if limit is None else cp.done + limit)
+        batches = iter(lambda: list(itertools.islice(remaining, batch_size)), [])
+
+        t_start = time.perf_counter()
+        imported = 0
+        next_batch = next(batches, None)
+        pending = asyncio.create_task(self.prepare(next_batch)) if next_batch else None
+        try:
+            while pending is not None:
+                prepared = await pending
+                next_batch = next(batches, None)
+                # Hash and register the next batch while this one is extracted
+                pending = asyncio.create_task(self.prepare(next_batch)) if next_batch else None
+
+                outcome = await self.finish(await self.extract(prepared))
+
+                cp.done += prepared.size
+                cp.totals.update(prepared.counts)
+                cp.totals.update(claimed=len(prepared.claimed))
+                cp.totals.update(+outcome)
+                cp.save()
+
+                imported += prepared.size
+                rate = imported / (time.perf_counter() - t_start)
+                print(
+                    f"[import] batch files={prepared.size} claimed={len(prepared.claimed)} "
+                    f"extracted={outcome['extracted']} failed={outcome['failed']} retried={outcome['retried']} "
+                    f"lease_lost={outcome['lease_lost']} skipped={prepared.counts['skipped']} "
+                    f"done={cp.done} rate={rate:.1f} files/s"
+                )
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("source", help="directory or JSONL manifest")
+    ap.add_argument("--artifact-type", default="resume", help="for files without one in the manifest")
+    ap.add_argument("--extensions", default=DEFAULT_EXTENSIONS, help="directory mode file extensions")
+    ap.add_argument("--checkpoint", help="progress file (default: bulk_import.<source name>.checkpoint.json)")
+    ap.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    ap.add_argument("--batch-size", type=int, default=256)
+    ap.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--hash-threads", type=int, default=8)
+    ap.add_argument("--lease-seconds", type=int, default=3600)
+    ap.add_argument("--limit", type=int, default=None, help="stop after this many more inputs")
+    args = ap.parse_args()
+
+    source = os.path.abspath(args.source)
+    if os.path.isdir(source):
+        extensions = {e.strip().lower() if e.strip().startswith(".") else f".{e.strip().lower()}"
+                      for e in args.extensions.split(",") if e.strip()}
+        entries = iter_directory(source, extensions, args.artifact_type)
+    else:
+        entries = iter_manifest(source, args.artifact_type)
+
+    checkpoint = Checkpoint(
+        args.checkpoint or f"bulk_import.{os.path.basename(source.rstrip(os.sep))}.checkpoint.json",
+        source,
+    )
+    if not args.restart and checkpoint.load():
+        print(f"[import] resuming from {checkpoint.path} done={checkpoint.done} worker_id={checkpoint.worker_id}")
+
+    await db.start()
+    aliases = AliasCache()
+    await aliases.refresh()
+    importer = BulkImporter(
+        checkpoint, max(1, args.processes), max(1, args.hash_threads), args.lease_seconds, aliases
+    )
+    try:
+        t0 = time.perf_counter()
+        await importer.run(entries, max(1, args.batch_size), args.limit)
+        seconds = time.perf_counter() - t0
+        totals = " ".join(f"{k}={v}" for k, v in sorted(checkpoint.totals.items()))
+        print(f"[import] done inputs={checkpoint.done} {totals} seconds={seconds:.1f}")
+    finally:
+        importer.close()
+        await db.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Embed candidate profiles into core.embeddings.
+
+Pages through delivery.fn_list_candidates_for_embedding and runs each page
+through the EmbeddingStage; candidates whose canonical text is unchanged
+cost a hash lookup and nothing else, so re-running is cheap.
+
+    python -m worker.embed_backfill
+    python -m worker.embed_backfill --updated-since 2026-01-01T00:00:00Z
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from app.db.client import db
+from app.db.functions import fn_list_candidates_for_embedding
+from app.settings import settings
+from worker.embedding_stage import CANDIDATE_PROFILE, EmbeddingItem, EmbeddingStage, candidate_profile_text
+
+
+async def backfill(page_size: int, updated_since: datetime | None) -> dict[str, int]:
+    stage = EmbeddingStage(batch_size=settings.EMBEDDING_BATCH_SIZE)
+    totals = {"total": 0, "unchanged": 0, "embedded": 0, "written": 0}
+    after = None
+    try:
+        while True:
+            rows = await fn_list_candidates_for_embedding(after, page_size, updated_since)
+            if not rows:
+                break
+            items = [
+                EmbeddingItem("candidate", r["candidate_id"], CANDIDATE_PROFILE, candidate_profile_text(r["facts"]))
+                for r in rows
+            ]
+            stats = await stage.run(items, lane="backfill")
+            for k in totals:
+                totals[k] += stats[k]
+            after = rows[-1]["candidate_id"]
+            print(f"[embed] page candidates={len(rows)} embedded={stats['embedded']} total={totals['total']}")
+    finally:
+        stage.close()
+    return totals
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--page-size", type=int, default=500)
+    ap.add_argument(
+        "--updated-since",
+        type=datetime.fromisoformat,
+        default=None,
+        help="only candidates updated at or after this ISO timestamp",
+    )
+    args = ap.parse_args()
+
+    await db.start()
+    try:
+        t0 = time.perf_counter()
+        totals = await backfill(args.page_size, args.updated_since)
+        print(
+            f"[embed] done candidates={totals['total']} unchanged={totals['unchanged']} "
+            f"embedded={totals['embedded']} written={totals['written']} "
+            f"seconds={time.perf_counter() - t0:.1f}"
+        )
+    finally:
+        await db.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
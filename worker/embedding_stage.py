@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from app.db.functions import fn_get_embedding_hashes, fn_upsert_embeddings_batch
+from app.embeddings import EmbeddingBackend, content_hash, get_backend, vector_literal
+from app.metrics import EMBEDDINGS_TOTAL, observe_stage
+
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_PROFILE = "candidate_profile"
+
+# Facts that make up a candidate's canonical text (ARCHITECTURE_STATE 15)
+PROFILE_FACTS = ("roles", "certifications", "aircraft", "location")
+
+# Ids per core.fn_get_embedding_hashes call
+HASH_LOOKUP_CHUNK = 1000
+
+
+@dataclass(frozen=True)
+class EmbeddingItem:
+    entity_type: str
+    entity_id: UUID
+    embedding_type: str
+    text: str
+
+
+def candidate_profile_text(facts: dict[str, Any]) -> str:
+    """
+    Canonical text for a candidate's profile embedding. Values are deduped
+    and sorted so reordering facts does not change the content hash.
+    """
+    lines = []
+    for key in PROFILE_FACTS:
+        value = facts.get(key)
+        values = value if isinstance(value, list) else [value]
+        cleaned = sorted({str(v).strip() for v in values if v is not None and str(v).strip()})
+        if cleaned:
+            lines.append(f"{key}: {', '.join(cleaned)}")
+    return "\n".join(lines)
+
+
+class EmbeddingStage:
+    """
+    Embeds canonical texts and writes them to core.embeddings, skipping
+    entities whose text has not changed.
+
+    Per (entity_type, embedding_type):
+
+    1. existing content hashes are read in bulk (core.fn_get_embedding_hashes)
+       and items with a matching hash are dropped before the model runs
+    2. the remaining texts go through the backend `batch_size` at a time, on
+       one dedicated thread so the event loop stays free
+    3. each embedded batch is written with one core.fn_upsert_embeddings_batch
+       call while the next batch is being embedded
+
+    Re-running over unchanged entities costs one hash lookup per
+    HASH_LOOKUP_CHUNK ids and no model calls.
+    """
+
+    def __init__(self, backend: EmbeddingBackend | None = None, batch_size: int = 64) -> None:
+        self.backend = backend or get_backend()
+        self.batch_size = max(1, batch_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def run(self, items: list[EmbeddingItem], lane: str = "backfill") -> dict[str, int]:
+        """Returns counts: total, unchanged, embedded, written."""
+        stats = {"total": len(items), "unchanged": 0, "embedded": 0, "written": 0}
+        groups: dict[tuple[str, str], dict[UUID, EmbeddingItem]] = {}
+        for it in items:
+            if it.text.strip():
+                # Last text wins when an entity repeats in the batch
+                groups.setdefault((it.entity_type, it.embedding_type), {})[it.entity_id] = it
+            else:
+                stats["unchanged"] += 1
+
+        for (entity_type, embedding_type), by_id in groups.items():
+            pending = await self._changed(entity_type, embedding_type, by_id)
+            unchanged = len(by_id) - len(pending)
+            stats["unchanged"] += unchanged
+            EMBEDDINGS_TOTAL.labels(embedding_type=embedding_type, outcome="unchanged").inc(unchanged)
+            if pending:
+                embedded, written = await self._embed_and_write(entity_type, embedding_type, pending, lane)
+                stats["embedded"] += embedded
+                stats["written"] += written
+
+        logger.info(
+            f"embedding_stage_done lane={lane} backend={self.backend.name} total={stats['total']} "
+            f"unchanged={stats['unchanged']} embedded={stats['embedded']} written={stats['written']}"
+        )
+        return stats
+
+    async def _changed(
+        self, entity_type: str, embedding_type: str, by_id: dict[UUID, EmbeddingItem]
+    ) -> list[tuple[EmbeddingItem, str]]:
+        ids = list(by_id)
+        existing: dict[UUID, str] = {}
+        for i in range(0, len(ids), HASH_LOOKUP_CHUNK):
+            existing.update(await fn_get_embedding_hashes(entity_type, ids[i : i + HASH_LOOKUP_CHUNK], embedding_type))
+
+        pending = []
+        for entity_id, it in by_id.items():
+            h = content_hash(self.backend, it.text)
+            if existing.get(entity_id) != h:
+                pending.append((it, h))
+        return pending
+
+    async def _embed_and_write(
+        self,
+        entity_type: str,
+        embedding_type: str,
+        pending: list[tuple[EmbeddingItem, str]],
+        lane: str,
+    ) -> tuple[int, int]:
+        loop = asyncio.get_running_loop()
+        embedded = 0
+        written = 0
+        write_task: asyncio.Task | None = None
+        try:
+            for i in range(0, len(pending), self.batch_size):
+                batch = pending[i : i + self.batch_size]
+                with observe_stage("embed", lane):
+                    vectors = await loop.run_in_executor(
+                        self._executor, self.backend.embed, [it.text for it, _ in batch]
+                    )
+                embedded += len(batch)
+                EMBEDDINGS_TOTAL.labels(embedding_type=embedding_type, outcome="embedded").inc(len(batch))
+
+                rows = [
+                    {
+                        "entity_id": it.entity_id,
+                        "content_hash": h,
+                        "source_text": it.text,
+                        "embedding": vector_literal(vec),
+                    }
+                    for (it, h), vec in zip(batch, vectors)
+                ]
+                if write_task is not None:
+                    written += await write_task
+                write_task = asyncio.create_task(self._write(entity_type, embedding_type, rows, lane))
+            if write_task is not None:
+                written += await write_task
+                write_task = None
+        finally:
+            if write_task is not None:
+                write_task.cancel()
+        return embedded, written
+
+    async def _write(self, entity_type: str, embedding_type: str, rows: list[dict[str, Any]], lane: str) -> int:
+        with observe_stage("embed_write", lane):
+            return await fn_upsert_embeddings_batch(entity_type, embedding_type, rows)
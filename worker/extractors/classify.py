@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+
+# Only the start of the text is scanned; document type shows up in the first
+# pages, and it bounds the cost of very long extractions
+CLASSIFY_MAX_CHARS = int(os.getenv("WORKER_CLASSIFY_MAX_CHARS", "50000"))
+# Below this winning score the document is "other"
+MIN_SCORE = float(os.getenv("WORKER_CLASSIFY_MIN_SCORE", "3.0"))
+# A type only wins with at least one rule this strong; weak terms alone
+# ("FAA", "A&P" in any aviation text) are not enough
+STRONG_WEIGHT = 2.0
+# Results under this confidence are flagged for review / the LLM fallback
+REVIEW_THRESHOLD = float(os.getenv("WORKER_CLASSIFY_REVIEW_THRESHOLD", "0.6"))
+
+METHOD = "rules"
+ARTIFACT_TYPES = ("resume", "drivers_license", "faa_certificate", "intake_form")
+OTHER = "other"
+
+# A rule that matches again adds half its weight, up to this many matches
+MAX_COUNTED_MATCHES = 3
+EVIDENCE_LIMIT = 5
+EVIDENCE_MATCH_CHARS = 60
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    `phrases` are literal (whitespace matches any run of whitespace) and must
+    stand as whole words. `patterns` are (literal head, regex tail) pairs for
+    values such as dates; the tail is only tried after the head matched.
+    Rules with word_start=False may begin inside a word (email addresses).
+    """
+
+    artifact_type: str
+    name: str
+    weight: float
+    phrases: tuple[str, ...] = ()
+    patterns: tuple[tuple[str, str], ...] = ()
+    word_start: bool = True
+
+
+_DATE = r"\s*:?\s*\d{1,2}[/-]\d{1,2}[/-]\d{2,4}"
+_NUMBER = r"\.?\s*(?:no\b\.?|#|number)"
+_YEAR_RANGE = r"\d\d\s*(?:-|–|to)\s*(?:present|current|(?:19|20)\d\d)(?!\w)"
+
+# Terms that are just as common in the other types (e.g. "FAA" or "A&P" in a
+# mechanic's resume) carry low weight.
+RULES: tuple[Rule, ...] = (
+    Rule("resume", "resume_title", 2.5, phrases=("resume", "résumé", "curriculum vitae")),
+    Rule("resume", "experience_heading", 3.0, phrases=(
+        "work experience", "professional experience", "relevant experience",
+        "employment history", "work history",
+    )),
+    Rule("resume", "summary_heading", 1.5, phrases=(
+        "summary", "professional summary", "summary of qualifications", "objective", "career objective",
+    )),
+    Rule("resume", "skills_heading", 1.5, phrases=(
+        "skills", "technical skills", "core skills", "core competencies", "qualifications",
+    )),
+    Rule("resume", "education_heading", 1.0, phrases=("education", "training")),
+    Rule("resume", "date_range", 2.0, patterns=(("19", _YEAR_RANGE), ("20", _YEAR_RANGE))),
+    Rule("resume", "responsibilities", 1.5, phrases=("responsibilities", "duties included", "responsible for")),
+    Rule("resume", "references", 1.5, phrases=("references", "references available upon request")),
+    Rule("resume", "email_address", 1.0, patterns=(("@", r"[\w-]+(?:\.[\w-]+)+"),), word_start=False),
+    Rule("drivers_license", "license_title", 4.0, phrases=(
+        "driver license", "drivers license", "driver's license", "driver licence", "driver's licence",
+        "operator license", "commercial driver license",
+    )),
+    Rule("drivers_license", "motor_vehicles", 2.0, phrases=(
+        "department of motor vehicles", "dmv", "department of public safety", "motor vehicle division",
+    )),
+    Rule("drivers_license", "license_number", 2.0, patterns=(("dl", _NUMBER), ("lic", _NUMBER), ("license", _NUMBER))),
+    Rule("drivers_license", "license_class", 1.5, patterns=(("class", r"\s*:?\s*[abcdm](?!\w)"),)),
+    Rule("drivers_license", "date_of_birth", 2.0, phrases=("dob", "date of birth")),
+    Rule("drivers_license", "expires", 2.0, patterns=(("exp", _DATE), ("expires", _DATE))),
+    Rule("drivers_license", "endorsements", 1.5, phrases=("rstr",), patterns=(
+        ("endorsement", r"s?\s*:"), ("restriction", r"s?\s*:"),
+    )),
+    Rule("drivers_license", "physical", 2.0, patterns=(
+        ("hgt", ""), ("wgt", ""), ("height", r"\s*:"), ("weight", r"\s*:"), ("eyes", r"\s*:"),
+        ("sex", r"\s*:?\s*[mf](?!\w)"),
+    )),
+    Rule("drivers_license", "organ_donor", 1.0, phrases=("organ donor", "donor")),
+    Rule("faa_certificate", "airman_certificate", 4.0, phrases=(
+        "airman certificate", "airman's certificate", "airmans certificate", "certificate of airman",
+    )),
+    Rule("faa_certificate", "this_certifies", 3.0, phrases=(
+        "this certifies that", "has been found to be properly qualified",
+    )),
+    Rule("faa_certificate", "faa_form", 3.0, phrases=("faa form 8060",), patterns=(("form 8060-", r"\d+"),)),
+    Rule("faa_certificate", "certificate_kind", 2.0, phrases=(
+        "mechanic certificate", "pilot certificate", "repairman certificate",
+        "medical certificate", "flight engineer certificate",
+    )),
+    Rule("faa_certificate", "certificate_number", 1.5, patterns=(("cert", _NUMBER), ("certificate", _NUMBER))),
+    Rule("faa_certificate", "faa", 1.0, phrases=("federal aviation administration", "faa")),
+    Rule("faa_certificate", "ratings", 1.5, phrases=("ratings and limitations",), patterns=(
+        ("rating", r"s?\s*:"),
+    )),
+    Rule("faa_certificate", "issue_date", 1.0, phrases=("date of issue", "date issued"), patterns=(
+        ("issued", r"\s*:"),
+    )),
+    Rule("faa_certificate", "administrator", 1.0, phrases=("administrator", "by direction of the administrator")),
+    Rule("faa_certificate", "a_and_p", 0.5, phrases=("airframe and powerplant", "a&p")),
+    Rule("intake_form", "form_title", 4.0, phrases=(
+        "intake form", "candidate intake", "application form", "employment application",
+        "application for employment",
+    )),
+    Rule("intake_form", "applicant", 1.5, phrases=(
+        "applicant", "applicant name", "applicant's name", "applicant signature", "applicant's signature",
+    )),
+    Rule("intake_form", "instructions", 2.0, phrases=(
+        "please print", "please complete", "please fill out", "please fill in", "please attach",
+    )),
+    Rule("intake_form", "form_fields", 2.0, phrases=(
+        "position applied for", "desired position", "desired pay", "desired salary",
+        "available start date", "emergency contact",
+    )),
+    Rule("intake_form", "signature_line", 1.5, patterns=(("signature", r"\s*(?::|_+)"), ("date", r"\s*:\s*_+"))),
+    Rule("intake_form", "checkbox", 1.0, patterns=(("☐", ""), ("☑", ""), ("☒", ""))),
+    Rule("intake_form", "ssn", 1.5, phrases=("ssn", "social security", "social security number")),
+    Rule("intake_form", "yes_no", 1.5, patterns=(("yes", r"\s*(?:/|_+)\s*no(?!\w)"),)),
+)
+
+
+def _trie_regex(entries: list[tuple[str, str]]) -> str:
+    """
+    Regex for (literal head, leaf regex) entries with shared head prefixes
+    factored out, so each position costs one walk down the trie instead of a
+    try per rule. Leaves under the same head are tried in the order given.
+    """
+    root: dict = {}
+    for head, leaf in entries:
+        node = root
+        for tok in re.findall(r"\s+|.", head):
+            node = node.setdefault(" " if tok.isspace() else tok, {})
+        node.setdefault("", []).append(leaf)
+
+    def emit(node: dict) -> str:
+        alts = [(r"\s+" if tok == " " else re.escape(tok)) + emit(child) for tok, child in node.items() if tok]
+        alts += node.get("", [])
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+    return emit(root)
+
+
+def _compile(rules: tuple[Rule, ...]) -> re.Pattern[str]:
+    """
+    One regex over every rule, so a single finditer scores all types. Each
+    leaf ends in an empty group named after its rule; `lastgroup` says which
+    rule matched. Text is lower-cased before matching, which is cheaper than
+    IGNORECASE.
+    """
+    word_start: list[tuple[str, str]] = []
+    anywhere: list[tuple[str, str]] = []
+    # Value patterns go first, so "dl no." is not taken as a bare "dl" phrase
+    for i, rule in enumerate(rules):
+        target = word_start if rule.word_start else anywhere
+        target.extend((head, f"{tail}(?P<r{i}_{j}>)") for j, (head, tail) in enumerate(rule.patterns))
+    for i, rule in enumerate(rules):
+        target = word_start if rule.word_start else anywhere
+        target.extend((phrase, rf"(?!\w)(?P<r{i}_p{j}>)") for j, phrase in enumerate(rule.phrases))
+
+    branches = [rf"(?<!\w){_trie_regex(word_start)}"]
+    if anywhere:
+        branches.append(_trie_regex(anywhere))
+    return re.compile("|".join(branches))
+
+
+_MATCHER = _compile(RULES)
+# Leaf group name -> index into RULES
+_GROUP_RULE = {name: int(name[1:].split("_", 1)[0]) for name in _MATCHER.groupindex}
+
+
+@dataclass(frozen=True)
+class Classification:
+    artifact_type: str
+    confidence: float
+    needs_review: bool
+    scores: dict[str, float]
+    evidence: list[dict[str, Any]] = field(default_factory=list)
+
+    def as_meta(self) -> dict[str, Any]:
+        """extracted_json fields, per ARCHITECTURE_STATE section 11."""
+        return {
+            "detected_artifact_type": self.artifact_type,
+            "confidence": self.confidence,
+            "method": METHOD,
+            "evidence": self.evidence,
+            "needs_review": self.needs_review,
+            "classification_scores": self.scores,
+        }
+
+
+def _confidence(top: float, second: float) -> float:
+    # Strength grows with the winning score; the margin over the runner-up
+    # decides how much of it is kept
+    strength = 1.0 - math.exp(-top / 6.0)
+    margin = (top - second) / top if top else 0.0
+    return strength * (0.4 + 0.6 * margin)
+
+
+def classify_text(text: str) -> Classification:
+    """Scan `text` once and score every artifact type."""
+    sample = (text or "")[:CLASSIFY_MAX_CHARS].lower()
+
+    counts: dict[int, int] = {}
+    first: dict[int, str] = {}
+    for m in _MATCHER.finditer(sample):
+        i = _GROUP_RULE[m.lastgroup]
+        n = counts.get(i, 0)
+        if n == 0:
+            first[i] = m.group()[:EVIDENCE_MATCH_CHARS]
+        counts[i] = n + 1
+
+    scores = dict.fromkeys(ARTIFACT_TYPES, 0.0)
+    strong: set[str] = set()
+    contributions: dict[int, float] = {}
+    for i, n in counts.items():
+        rule = RULES[i]
+        c = rule.weight * (1.0 + 0.5 * (min(n, MAX_COUNTED_MATCHES) - 1))
+        contributions[i] = c
+        scores[rule.artifact_type] += c
+        if rule.weight >= STRONG_WEIGHT:
+            strong.add(rule.artifact_type)
+
+    best, top = max(scores.items(), key=lambda kv: (kv[0] in strong, kv[1]))
+    second = max((s for t, s in scores.items() if t != best), default=0.0)
+    scores = {t: round(s, 2) for t, s in scores.items()}
+
+    if best not in strong or top < MIN_SCORE:
+        confidence = round(0.6 * (1.0 - min(top, MIN_SCORE) / MIN_SCORE), 3)
+        return Classification(
+            artifact_type=OTHER,
+            confidence=confidence,
+            needs_review=confidence < REVIEW_THRESHOLD or not sample.strip(),
+            scores=scores,
+        )
+
+    evidence = [
+        {"rule": RULES[i].name, "match": first[i], "count": counts[i]}
+        for i in sorted(
+            (i for i in counts if RULES[i].artifact_type == best),
+            key=lambda i: contributions[i],
+            reverse=True,
+        )[:EVIDENCE_LIMIT]
+    ]
+    confidence = round(_confidence(top, second), 3)
+    return Classification(
+        artifact_type=best,
+        confidence=confidence,
+        needs_review=confidence < REVIEW_THRESHOLD,
+        scores=scores,
+        evidence=evidence,
+    )
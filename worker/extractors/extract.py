@@ -4,14 +4,22 @@ import io
 import logging
 import os
 import re
-from typing import Any, Tuple
+import time
+from typing import Any, BinaryIO, Tuple
 from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse, urlunparse
 
 import httpx
 from docx import Document
 from pypdf import PdfReader
 
-from worker.utils.graph_download import download_sharepoint_bytes, is_sharepoint_url
+from app.blob_store import get_blob_store, is_blob_uri, sha_from_uri
+from worker.extractors.classify import classify_text
+from worker.extractors.structured import extract_structured
+from worker.utils.download_cache import conditional_headers, get_download_cache
+from worker.utils.graph_download import download_sharepoint_body, is_sharepoint_url
+from worker.utils.host_limiter import limited_request
+from worker.utils.http_session import get_client
+from worker.utils.spool import HtmlResponseError, SpooledBody, spool_response
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -19,6 +27,12 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Per-artifact PDF budgets: pages beyond the page budget, and pages not reached
+# before the wall-clock budget runs out, are skipped and the result is marked
+# truncated instead of failing. 0 disables a budget.
+PDF_MAX_PAGES = int(os.getenv("WORKER_PDF_MAX_PAGES", "300"))
+PDF_TIME_BUDGET_SECONDS = float(os.getenv("WORKER_PDF_TIME_BUDGET_SECONDS", "60"))
+
 
 
 def normalize_google_drive_url(url: str) -> str:
@@ -58,10 +72,6 @@ def _with_download_flag(url: str) -> str:
     q.setdefault("download", "1")
     return urlunparse((u.scheme, u.netloc, u.path, u.params, urlencode(q), u.fragment))
 
-def _looks_like_html(data: bytes) -> bool:
-    head = data[:300].lstrip().lower()
-    return head.startswith(b"<!doctype html") or head.startswith(b"<html") or b"<head" in head
-
 def sniff_format(data: bytes) -> str:
     """
     Best-effort file type sniffing using magic bytes.
@@ -96,14 +106,58 @@ def sniff_format(data: bytes) -> str:
     except Exception:
         return "unknown"
 
-def download_bytes(url: str, timeout_seconds: int = 60) -> tuple[bytes, dict[str, str]]:
+def open_blob_body(uri: str) -> tuple[SpooledBody, dict[str, str]]:
+    sha = sha_from_uri(uri)
+    path = get_blob_store().path_for(sha)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"blob not found in store: {uri}")
+    body = SpooledBody.from_file(path, sha)
+    logger.info(f"artifact_blob_opened sha256={sha} bytes={body.size}")
+    return body, {"x-download-source": "blob"}
+
+
+def download_body(url: str, timeout_seconds: int = 60) -> tuple[SpooledBody, dict[str, str]]:
+    """
+    Stream the artifact at `url` into a SpooledBody (size-capped, hashed while
+    streaming, spooled to disk when large). Caller owns body.cleanup().
+
+    blob://<sha256> URIs (POST /v1/artifacts/upload) are read in place from
+    the blob store; nothing is downloaded or copied.
+
+    Other URLs go through the worker download cache (worker/utils/
+    download_cache.py), keyed by the normalized URL: concurrent downloads of
+    the same URL share one request, and repeats are served from disk or
+    revalidated with ETag / Last-Modified.
+    """
+    if is_blob_uri(url):
+        return open_blob_body(url)
+
     original_url = url
     url = normalize_google_drive_url(url)
 
     if url != original_url:
         logger.info(f"artifact_url_normalized original={original_url} resolved={url}")
 
+    cache = get_download_cache()
+    if cache is None:
+        return _fetch_body(url, timeout_seconds)
+    return cache.get(url, lambda validators: _fetch_body(url, timeout_seconds, validators))
+
+
+def _fetch_body(
+    url: str,
+    timeout_seconds: int,
+    validators: dict[str, str] | None = None,
+) -> tuple[SpooledBody | None, dict[str, str]]:
+    """
+    One download of an already-normalized URL. With `validators` the request
+    is conditional and a 304 returns (None, headers).
+    """
+    conditional = conditional_headers(validators)
+
     if is_sharepoint_url(url):
+        graph_error: Exception | None = None
+
         # 1) If Graph creds exist, prefer Graph first
         if not _has_graph_creds():
             host = urlparse(url).netloc
@@ -111,14 +165,20 @@ def download_bytes(url: str, timeout_seconds: int = 60) -> tuple[bytes, dict[str
 
         if _has_graph_creds():
             try:
-                data, headers = download_sharepoint_bytes(url, timeout_seconds=max(timeout_seconds, 90))
+                body, headers = download_sharepoint_body(
+                    url, timeout_seconds=max(timeout_seconds, 90), validators=validators
+                )
                 headers["x-download-source"] = "graph"
                 host = urlparse(url).netloc
+                if body is None:
+                    logger.info(f"artifact_not_modified host={host} source=graph")
+                    return None, headers
                 ct = headers.get("content-type", "unknown")
-                logger.info(f"artifact_downloaded host={host} source=graph content_type={ct} bytes={len(data)}")
-                return data, headers
+                logger.info(f"artifact_downloaded host={host} source=graph content_type={ct} bytes={body.size}")
+                return body, headers
 
             except Exception as e:
+                graph_error = e
                 host = urlparse(url).netloc
                 logger.warning(f"sharepoint_graph_download_failed host={host} error={e}")
                 logger.info("sharepoint_http_fallback_due_to_graph_failure")
@@ -126,57 +186,144 @@ def download_bytes(url: str, timeout_seconds: int = 60) -> tuple[bytes, dict[str
         logger.info("sharepoint_http_fallback_attempt")
         # 2) HTTP fallback attempt using download=1
         url2 = _with_download_flag(url)
-        with httpx.Client(follow_redirects=True, timeout=timeout_seconds) as client:
-            r = client.get(url2)
-            r.raise_for_status()
+        with limited_request(url2) as slot, get_client(url2).stream(
+            "GET", url2, headers=conditional, timeout=timeout_seconds
+        ) as r:
+            slot.observe(r)
             headers = {k.lower(): v for k, v in r.headers.items()}
-            data = r.content
+            if r.status_code == 304 and conditional:
+                headers["x-download-source"] = "http"
+                logger.info(f"artifact_not_modified host={urlparse(url).netloc} source=http")
+                return None, headers
+            r.raise_for_status()
 
             ct = (headers.get("content-type") or "").lower()
-            if "text/html" not in ct and not _looks_like_html(data):
-                headers["x-download-source"] = "http"
-                logger.info(f"artifact_downloaded host={urlparse(url).netloc} source=http content_type={ct} bytes={len(data)}")
-                return data, headers
+            if "text/html" not in ct:
+                try:
+                    body = spool_response(r)
+                    headers["x-download-source"] = "http"
+                    logger.info(f"artifact_downloaded host={urlparse(url).netloc} source=http content_type={ct} bytes={body.size}")
+                    return body, headers
+                except HtmlResponseError:
+                    pass
 
         # 3) If we got here, HTTP returned HTML and Graph was not available or failed
+        # Chained so a throttled or timed-out Graph call is retried, not failed
         raise ValueError(
             "SharePoint download failed: direct HTTP returned HTML and Graph credentials are missing or Graph failed"
-        )
+        ) from graph_error
 
     # Non-SharePoint path
-    with httpx.Client(follow_redirects=True, timeout=timeout_seconds) as client:
-        r = client.get(url)
-        r.raise_for_status()
+    # Per-host rate/concurrency limit, adapted to 429/503 and Retry-After
+    with limited_request(url) as slot, get_client(url).stream(
+        "GET", url, headers=conditional, timeout=timeout_seconds
+    ) as r:
+        slot.observe(r)
         headers = {k.lower(): v for k, v in r.headers.items()}
-        data = r.content
+        if r.status_code == 304 and conditional:
+            headers["x-download-source"] = "http"
+            logger.info(f"artifact_not_modified host={urlparse(url).netloc} source=http")
+            return None, headers
+        r.raise_for_status()
 
+        # HTML is detected from the headers or the first chunk, before the
+        # rest of the body is downloaded
         ct = (headers.get("content-type") or "").lower()
-        if "text/html" in ct or _looks_like_html(data):
+        try:
+            if "text/html" in ct:
+                raise HtmlResponseError(ct)
+            body = spool_response(r)
+        except HtmlResponseError:
             raise ValueError(
                 "Download failed: server returned HTML instead of file bytes (often permissions or viewer page)"
             )
 
-        headers["x-download-source"] = "http"
-        host = urlparse(url).netloc
-        size = len(data)
-        logger.info(f"artifact_downloaded host={host} source=http content_type={ct or 'unknown'} bytes={size}")
+    headers["x-download-source"] = "http"
+    host = urlparse(url).netloc
+    logger.info(f"artifact_downloaded host={host} source=http content_type={ct or 'unknown'} bytes={body.size}")
+
+    return body, headers
+
+
+def download_bytes(url: str, timeout_seconds: int = 60) -> tuple[bytes, dict[str, str]]:
+    body, headers = download_body(url, timeout_seconds=timeout_seconds)
+    try:
+        return body.read_bytes(), headers
+    finally:
+        body.cleanup()
 
-        return data, headers
 
+def extract_pdf_pages(
+    data: bytes | BinaryIO,
+    start: int = 0,
+    stop: int | None = None,
+    deadline: float | None = None,
+) -> tuple[list[str], int, int, bool]:
+    """
+    Text of pages [start, stop), stopping early once time.time() passes
+    `deadline`. Returns (non-empty page texts, pages_total, pages_parsed,
+    timed_out).
+    """
+    reader = PdfReader(io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data)
+    total = len(reader.pages)
+    stop = total if stop is None else min(stop, total)
 
-def extract_pdf_text(data: bytes) -> str:
-    reader = PdfReader(io.BytesIO(data))
     parts: list[str] = []
-    for page in reader.pages:
-        t = page.extract_text() or ""
+    parsed = 0
+    timed_out = False
+    for i in range(start, stop):
+        if deadline is not None and time.time() >= deadline:
+            timed_out = True
+            break
+        t = reader.pages[i].extract_text() or ""
         t = t.strip()
+        parsed += 1
         if t:
             parts.append(t)
+    return parts, total, parsed, timed_out
+
+
+def extract_pdf_text(data: bytes | BinaryIO) -> str:
+    parts, _, _, _ = extract_pdf_pages(data)
     return "\n\n".join(parts).strip()
 
 
-def extract_docx_text(data: bytes) -> str:
-    doc = Document(io.BytesIO(data))
+def pdf_page_count(body: SpooledBody) -> int:
+    with body.open() as stream:
+        return len(PdfReader(stream).pages)
+
+
+def extract_pdf_range_from_body(
+    body: SpooledBody,
+    start: int,
+    stop: int,
+    deadline: float | None,
+) -> tuple[str, int, bool]:
+    """One page range of a larger PDF (process pool task). Returns (text, pages_parsed, timed_out)."""
+    with body.open() as stream:
+        parts, _, parsed, timed_out = extract_pdf_pages(stream, start, stop, deadline)
+    return "\n\n".join(parts).strip(), parsed, timed_out
+
+
+def pdf_deadline() -> float | None:
+    return time.time() + PDF_TIME_BUDGET_SECONDS if PDF_TIME_BUDGET_SECONDS > 0 else None
+
+
+def pdf_page_stats(pages_total: int, pages_parsed: int, timed_out: bool) -> dict[str, Any]:
+    skipped = max(0, pages_total - pages_parsed)
+    stats: dict[str, Any] = {
+        "pages_total": pages_total,
+        "pages_parsed": pages_parsed,
+        "pages_skipped": skipped,
+        "truncated": skipped > 0,
+    }
+    if skipped:
+        stats["truncated_reason"] = "time_budget" if timed_out else "page_budget"
+    return stats
+
+
+def extract_docx_text(data: bytes | BinaryIO) -> str:
+    doc = Document(io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data)
     parts: list[str] = []
     for p in doc.paragraphs:
         t = (p.text or "").strip()
@@ -186,30 +333,71 @@ def extract_docx_text(data: bytes) -> str:
 
 
 def extract_text_from_url(url: str, mime_type: str | None = None) -> Tuple[str, dict[str, Any]]:
-    data, headers = download_bytes(url)
+    """
+    Download, parse and classify (extracted_json classification fields and
+    `structured` in meta).
+    """
+    body, headers = download_body(url)
+    try:
+        text, meta = extract_text_from_body(body, headers, url, mime_type)
+    finally:
+        body.cleanup()
+    meta.update(classify_text(text).as_meta())
+    meta["structured"] = extract_structured(text, meta["detected_artifact_type"])
+    return text, meta
 
-    ct = (mime_type or headers.get("content-type") or "").lower()
-    ext = (urlparse(url).path or "").lower()
-    sig = sniff_format(data)
 
-    meta: dict[str, Any] = {
+def extract_text_from_bytes(
+    data: bytes,
+    headers: dict[str, str],
+    url: str,
+    mime_type: str | None = None,
+) -> Tuple[str, dict[str, Any]]:
+    return extract_text_from_body(SpooledBody.from_bytes(data), headers, url, mime_type)
+
+
+def body_meta(body: SpooledBody, headers: dict[str, str], mime_type: str | None = None) -> dict[str, Any]:
+    return {
         "source": headers.get("x-download-source", "http"),
-        "content_type": ct,
-        "bytes": len(data),
-        "sniffed_format": sig,
+        "content_type": (mime_type or headers.get("content-type") or "").lower(),
+        "bytes": body.size,
+        "sha256": body.sha256,
+        "sniffed_format": sniff_format(body.head),
     }
 
+
+def extract_text_from_body(
+    body: SpooledBody,
+    headers: dict[str, str],
+    url: str,
+    mime_type: str | None = None,
+) -> Tuple[str, dict[str, Any]]:
+    """
+    CPU-bound half of extraction: sniff and parse an already downloaded body.
+    Top-level and side-effect free so it can run in a process pool. Spooled
+    bodies are parsed through a memory map instead of being read into memory.
+    """
+    ct = (mime_type or headers.get("content-type") or "").lower()
+    ext = (urlparse(url).path or "").lower()
+    meta = body_meta(body, headers, mime_type)
+    sig = meta["sniffed_format"]
+
     # PDF: by signature, content-type, or extension
     if sig == "pdf" or "pdf" in ct or ext.endswith(".pdf"):
-        text = extract_pdf_text(data)
+        with body.open() as stream:
+            parts, total, parsed, timed_out = extract_pdf_pages(
+                stream, 0, PDF_MAX_PAGES or None, pdf_deadline()
+            )
         meta["parser"] = "pypdf"
-        return text, meta
+        meta.update(pdf_page_stats(total, parsed, timed_out))
+        return "\n\n".join(parts).strip(), meta
 
     # DOCX: zip signature plus word hints, or extension/content-type
     # Warning: zip could be other things, but in staffing intake, it is commonly docx.
     is_docx_hint = ("word" in ct) or ext.endswith(".docx")
     if sig == "zip" and is_docx_hint:
-        text = extract_docx_text(data)
+        with body.open() as stream:
+            text = extract_docx_text(stream)
         meta["parser"] = "python-docx"
         return text, meta
 
@@ -219,6 +407,7 @@ def extract_text_from_url(url: str, mime_type: str | None = None) -> Tuple[str,
 
     # Plain text: decode best effort
     if sig == "txt" or "text/plain" in ct or ext.endswith(".txt"):
+        data = body.read_bytes()
         try:
             text = data.decode("utf-8", errors="replace")
         except Exception:
@@ -0,0 +1,558 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Optional
+
+from worker.extractors.classify import _trie_regex
+
+
+# Contact details sit at the top and certificates / licenses are short; the
+# cap bounds the scan on very long extractions
+STRUCTURED_MAX_CHARS = int(os.getenv("WORKER_STRUCTURED_MAX_CHARS", "100000"))
+
+METHOD = "rules"
+
+US_STATES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "district of columbia": "DC",
+    "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID", "illinois": "IL",
+    "indiana": "IN", "iowa": "IA", "kansas": "KS", "kentucky": "KY", "louisiana": "LA",
+    "maine": "ME", "maryland": "MD", "massachusetts": "MA", "michigan": "MI", "minnesota": "MN",
+    "mississippi": "MS", "missouri": "MO", "montana": "MT", "nebraska": "NE", "nevada": "NV",
+    "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM", "new york": "NY",
+    "north carolina": "NC", "north dakota": "ND", "ohio": "OH", "oklahoma": "OK", "oregon": "OR",
+    "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC", "south dakota": "SD",
+    "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT", "virginia": "VA",
+    "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+}
+
+_MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+)}
+# Value after a date label: MM/DD/YYYY, M-D-YY or "Jan 5, 2020"
+_DATE = (
+    r"\s*[:.]?\s*(?P<v>\d{1,2}[/-]\d{1,2}[/-](?:\d{4}|\d{2})(?!\d)"
+    r"|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4})"
+)
+_PHONE_REST = r"[\s.-]?\d{3}[\s.-]?\d{4}(?!\d)(?:\s*(?:x|ext\.?)\s*\d{1,6})?"
+
+
+def normalize_phone_e164(raw: str | None) -> str | None:
+    """
+    Same rules as delivery.fn_normalize_phone_e164, so a value from here
+    matches what fn_upsert_candidate stores: '+' and 8-15 digits, numbers
+    without a country code taken as NANP (+1), anything after an 'x'
+    (extension) ignored.
+    """
+    if not raw:
+        return None
+    plus = raw.lstrip().startswith("+")
+    digits = re.sub(r"[^0-9]", "", raw.lower().split("x", 1)[0])
+    if not digits:
+        return None
+    if plus:
+        return "+" + digits if 8 <= len(digits) <= 15 else None
+    if digits.startswith("00") and 10 <= len(digits) <= 17:
+        return "+" + digits[2:]
+    if len(digits) == 10:
+        return "+1" + digits
+    if len(digits) == 11 and digits.startswith("1"):
+        return "+" + digits
+    return None
+
+
+def _parse_date(raw: str) -> str | None:
+    """ISO date for the _DATE forms; two-digit years pivot 20 years ahead."""
+    raw = raw.strip().lower()
+    try:
+        if raw[0].isdigit():
+            month, day, year = (int(p) for p in re.split(r"[/-]", raw))
+        else:
+            name, day_s, year_s = re.match(r"([a-z]+)\.?\s+(\d{1,2}),?\s+(\d{4})", raw).groups()
+            month, day, year = _MONTHS[name[:3]], int(day_s), int(year_s)
+        if year < 100:
+            pivot = date.today().year % 100 + 20
+            year += 2000 if year <= pivot else 1900
+        return date(year, month, day).isoformat()
+    except (ValueError, AttributeError, KeyError):
+        return None
+
+
+# expand(text, start, end) -> widened (start, end), or None to drop the match
+Expander = Callable[[str, int, int], Optional[tuple[int, int]]]
+
+
+@dataclass(frozen=True)
+class FieldPattern:
+    """
+    Same shape as classify.Rule: `phrases` are lower-case literals that must
+    stand as whole words, `patterns` are (literal head, regex tail) pairs.
+    A tail may hold a `v` group with the value, otherwise the value is the
+    whole match. `normalize` maps the raw value to the stored one, or None
+    to drop the match; `expand` widens a whole match whose start cannot be
+    a literal head (the local part of an email, the city before ", ST").
+
+    `multi` fields keep every distinct value, the rest the first one. Multi
+    values are canonical names, so their evidence is the whole match
+    ("Boeing 737-800", not "737").
+    """
+
+    field: str
+    phrases: tuple[str, ...] = ()
+    patterns: tuple[tuple[str, str], ...] = ()
+    normalize: Callable[[str], Any] | None = None
+    multi: bool = False
+    word_start: bool = True
+    expand: Expander | None = None
+
+
+def _upper(raw: str) -> str:
+    return re.sub(r"\s+", "", raw).upper()
+
+
+def _collapse(raw: str) -> str:
+    return re.sub(r"\s+", " ", raw).strip(" :.-,")
+
+
+def _canonical(value: str | tuple[str, ...]) -> Callable[[str], Any]:
+    return lambda raw: value
+
+
+def _fleet(prefix: str) -> Callable[[str], str]:
+    # "737" -> "B737"; "650 er" -> "G650ER"
+    return lambda raw: prefix + _upper(raw)
+
+
+def _embraer(raw: str) -> str:
+    model = re.search(r"1[4-9]\d", raw).group()
+    return ("ERJ" if "erj" in raw.lower() else "E") + model
+
+
+def _model(raw: str) -> str:
+    # "citation cj3" -> "Citation CJ3", "king air 350" -> "King Air 350"
+    first, *rest = _collapse(raw).split()
+    words = [w.upper() if len(w) <= 2 or any(c.isdigit() for c in w) else w.title() for w in rest]
+    return " ".join([first.title(), *words])
+
+
+def _name(raw: str) -> str | None:
+    name = _collapse(raw)
+    return name.title() if 2 <= len(name.split()) <= 5 else None
+
+
+_LOCAL_PART_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._+-")
+_CITY_RE = re.compile(r"(?<![\w.'-])[A-Z][a-zA-Z.'-]+(?:[ \t][A-Z][a-zA-Z.'-]+){0,2}$")
+
+
+def _email_local_part(text: str, start: int, end: int) -> tuple[int, int] | None:
+    s = start
+    while s > 0 and s > start - 64 and text[s - 1] in _LOCAL_PART_CHARS:
+        s -= 1
+    return (s, end) if s < start else None
+
+
+def _city_before(text: str, start: int, end: int) -> tuple[int, int] | None:
+    # The match is ", ST"; the code must be upper case and follow a
+    # capitalized city name of up to three words on the same line
+    if not text[end - 2 : end].isupper():
+        return None
+    m = _CITY_RE.search(text, max(0, start - 40), start)
+    return (m.start(), end) if m else None
+
+
+def _location(raw: str) -> str:
+    city, _, state = raw.partition(",")
+    return f"{_collapse(city)}, {state.strip()}"
+
+
+EMAIL = FieldPattern(
+    "email",
+    patterns=(("@", r"[\w-]+(?:\.[\w-]+)+"),),
+    normalize=str.lower,
+    word_start=False,
+    expand=_email_local_part,
+)
+PHONE = FieldPattern(
+    "phone",
+    patterns=(
+        ("+", r"\d{1,3}[\s.-]?\(?\d{3}\)?" + _PHONE_REST),
+        ("(", r"\d{3}\)" + _PHONE_REST),
+        ("1", r"(?:[\s.-]?\(?\d{3}\)?|\d{2})" + _PHONE_REST),
+        *((d, r"\d{2}" + _PHONE_REST) for d in "023456789"),
+    ),
+    normalize=normalize_phone_e164,
+)
+LOCATION = FieldPattern(
+    "location",
+    patterns=((",", r"[ \t]*(?:" + "|".join(sorted({c.lower() for c in US_STATES.values()})) + r")(?!\w)"),),
+    normalize=_location,
+    word_start=False,
+    expand=_city_before,
+)
+
+# End of a role word: not inside an email address or host name, so
+# "captain@airline.com" or "captain.example.com" is not a role
+_ROLE_END = r"(?![\w@]|\.\w)"
+
+ROLES = (
+    FieldPattern(
+        "roles",
+        patterns=tuple(
+            (head, r"\s+(?:maintenance\s+)?(?:mechanic|technician)" + _ROLE_END)
+            for head in ("a&p", "a & p", "aircraft", "aviation", "airframe", "powerplant", "line")
+        ),
+        normalize=_canonical("Aircraft Mechanic"),
+        multi=True,
+    ),
+    FieldPattern(
+        "roles",
+        patterns=(("avionics", r"\s+(?:technician|tech|installer|engineer)" + _ROLE_END),),
+        normalize=_canonical("Avionics Technician"),
+        multi=True,
+    ),
+    FieldPattern(
+        "roles",
+        patterns=tuple(
+            (head, r"\s+inspector" + _ROLE_END) for head in ("quality", "qc", "qa", "ia", "a&p", "a & p")
+        ),
+        normalize=_canonical("Quality Inspector"),
+        multi=True,
+    ),
+    FieldPattern(
+        "roles",
+        phrases=("director of maintenance",),
+        normalize=_canonical("Director of Maintenance"),
+        multi=True,
+    ),
+    FieldPattern(
+        "roles",
+        patterns=(("maintenance", r"\s+(?:controller|manager|supervisor)" + _ROLE_END),),
+        normalize=lambda raw: _collapse(raw).title(),
+        multi=True,
+    ),
+    FieldPattern(
+        "roles",
+        patterns=tuple(
+            (head, r"\s+(?:mechanic|technician)" + _ROLE_END) for head in ("sheet metal", "sheetmetal", "structures")
+        ),
+        normalize=_canonical("Structures Technician"),
+        multi=True,
+    ),
+    FieldPattern(
+        "roles",
+        phrases=("captain", "first officer", "flight engineer", "chief pilot", "flight instructor"),
+        normalize=lambda raw: _collapse(raw).title(),
+        multi=True,
+    ),
+)
+
+CERTIFICATIONS = (
+    FieldPattern(
+        "certifications",
+        patterns=tuple((head, r"\s*(?:/|-|,|&|and\s|with\s)?\s*ia(?!\w)") for head in ("a&p", "a & p")),
+        normalize=_canonical(("A&P", "IA")),
+        multi=True,
+    ),
+    FieldPattern(
+        "certifications",
+        phrases=("a&p", "a & p", "airframe and powerplant", "airframe & powerplant"),
+        normalize=_canonical("A&P"),
+        multi=True,
+    ),
+    FieldPattern(
+        "certifications",
+        phrases=("inspection authorization", "inspection authorisation"),
+        normalize=_canonical("IA"),
+        multi=True,
+    ),
+    FieldPattern("certifications", phrases=("airline transport pilot", "atp"), normalize=_canonical("ATP"), multi=True),
+    FieldPattern("certifications", phrases=("commercial pilot",), normalize=_canonical("Commercial Pilot"), multi=True),
+    FieldPattern("certifications", phrases=("private pilot",), normalize=_canonical("Private Pilot"), multi=True),
+    FieldPattern("certifications", phrases=("cfii",), normalize=_canonical("CFII"), multi=True),
+    FieldPattern(
+        "certifications",
+        phrases=("cfi", "certified flight instructor"),
+        normalize=_canonical("CFI"),
+        multi=True,
+    ),
+    FieldPattern(
+        "certifications",
+        patterns=(("fcc", r"\s*(?:grol|general\s+radiotelephone)(?!\w)"),),
+        normalize=_canonical("FCC GROL"),
+        multi=True,
+    ),
+    FieldPattern("certifications", phrases=("repairman certificate",), normalize=_canonical("Repairman"), multi=True),
+    FieldPattern(
+        "certifications",
+        patterns=(("ndt", r"\s*(?:level\s*)?(?P<v>iii|ii|i|[123])(?!\w)"),),
+        normalize=lambda raw: f"NDT Level {({'i': 1, 'ii': 2, 'iii': 3}.get(raw.lower()) or raw)}",
+        multi=True,
+    ),
+)
+
+
+def _type_sep(head: str) -> str:
+    # A bare letter head only counts glued to the number ("A320", "G-650"):
+    # with a space it also matches prose ("a 300-hour inspection", "e 150")
+    return "-?" if len(head) == 1 else r"[\s-]?"
+
+
+AIRCRAFT = (
+    FieldPattern(
+        "aircraft",
+        patterns=tuple((head, _type_sep(head) + r"(?P<v>7[0-8]7)(?:-\d{1,3})?(?!\w)") for head in ("boeing", "b")),
+        normalize=_fleet("B"),
+        multi=True,
+    ),
+    FieldPattern(
+        "aircraft",
+        patterns=tuple(
+            (head, _type_sep(head) + r"(?P<v>3[0-8]0|22[01])(?:-\d{3})?(?!\w)") for head in ("airbus a", "airbus", "a")
+        ),
+        normalize=_fleet("A"),
+        multi=True,
+    ),
+    FieldPattern(
+        "aircraft",
+        patterns=tuple(
+            (head, _type_sep(head) + r"(?P<v>280|450|500|550|600|650(?:\s*er)?|700|800|iv|v)(?!\w)")
+            for head in ("gulfstream g", "gulfstream", "g")
+        ),
+        normalize=_fleet("G"),
+        multi=True,
+    ),
+    FieldPattern(
+        "aircraft",
+        patterns=tuple((head, _type_sep(head) + r"1[4-9]\d(?!\w)") for head in ("embraer e", "embraer", "erj", "e")),
+        normalize=_embraer,
+        multi=True,
+    ),
+    FieldPattern(
+        "aircraft",
+        patterns=(("crj", r"[\s-]?(?P<v>\d{3,4})(?!\w)"),),
+        normalize=_fleet("CRJ"),
+        multi=True,
+    ),
+    FieldPattern(
+        "aircraft",
+        patterns=tuple((head, r"-?(?:8[0-8]|90|11|10|9)(?!\w)") for head in ("md", "dc")),
+        normalize=lambda raw: _upper(raw).replace("-", ""),
+        multi=True,
+    ),
+    FieldPattern(
+        "aircraft",
+        patterns=(
+            ("challenger", r"\s+\d{3,4}(?!\w)"),
+            ("global", r"\s+\d{4}(?!\w)"),
+            ("falcon", r"\s+\d{1,4}(?:ex|lx|dx|x)?(?!\w)"),
+            ("learjet", r"\s+\d{2}(?!\w)"),
+            ("king air", r"\s+\d{3}(?!\w)"),
+            ("citation", r"\s+(?:x|cj\d|[a-z]{0,2}\d+[a-z]*|sovereign|latitude|longitude|excel|encore|mustang)(?!\w)"),
+        ),
+        normalize=_model,
+        multi=True,
+    ),
+)
+
+CONTACT = (EMAIL, PHONE, LOCATION)
+
+# Fields looked for per detected_artifact_type
+PATTERN_SETS: dict[str, tuple[FieldPattern, ...]] = {
+    "resume": CONTACT + ROLES + CERTIFICATIONS + AIRCRAFT,
+    "intake_form": CONTACT + ROLES + CERTIFICATIONS + AIRCRAFT,
+    "faa_certificate": (
+        FieldPattern(
+            "certificate_number",
+            patterns=tuple(
+                (head, r"\.?\s*(?:no(?!\w)\.?|#|number)\s*[:.]?\s*(?P<v>[a-z]?\d{5,10})(?!\w)")
+                for head in ("certificate", "cert")
+            ),
+            normalize=_upper,
+        ),
+        FieldPattern("rating", patterns=(("rating", r"s?\s*[:.]\s*(?P<v>[^\n]{2,80})"),), normalize=_collapse),
+        FieldPattern(
+            "issue_date",
+            patterns=tuple((head, _DATE) for head in ("date of issue", "date issued", "issued on", "issued")),
+            normalize=_parse_date,
+        ),
+        FieldPattern(
+            "name",
+            patterns=((
+                "this certifies that",
+                r"\s+(?P<v>[a-z][a-z .,'-]{2,60}?)\s*(?:\n|has\s+been(?!\w)|of(?!\w))",
+            ),),
+            normalize=_name,
+        ),
+    ) + CERTIFICATIONS,
+    "drivers_license": (
+        FieldPattern(
+            "license_number",
+            # The value must hold a digit, so "license class c" is not a number
+            patterns=tuple(
+                (
+                    head,
+                    r"\s*(?:no(?!\w)\.?|#|number|num(?!\w))?\s*[:.]?\s*"
+                    r"(?P<v>(?=[a-z0-9-]{0,18}\d)[a-z0-9][a-z0-9-]{4,18})(?!\w)",
+                )
+                for head in ("dl", "lic", "license", "licence")
+            ),
+            normalize=_upper,
+        ),
+        FieldPattern("state", phrases=tuple(US_STATES), normalize=lambda raw: US_STATES.get(_collapse(raw).lower())),
+        FieldPattern(
+            "expiration",
+            patterns=tuple((head, _DATE) for head in ("expiration date", "expiration", "expires", "exp date", "exp")),
+            normalize=_parse_date,
+        ),
+        FieldPattern(
+            "dob",
+            patterns=tuple((head, _DATE) for head in ("dob", "date of birth", "birth date", "birthdate")),
+            normalize=_parse_date,
+        ),
+    ),
+    "other": CONTACT,
+}
+
+# Fields expected per type; the ones not found are listed in `missing` for
+# the LLM fallback
+EXPECTED_FIELDS: dict[str, tuple[str, ...]] = {
+    "resume": ("name", "email", "phone", "location", "roles", "certifications", "aircraft"),
+    "intake_form": ("email", "phone", "location"),
+    "faa_certificate": ("name", "certificate_number", "rating", "issue_date"),
+    "drivers_license": ("license_number", "state", "expiration", "dob"),
+    "other": (),
+}
+
+# Fields scanned in a pass of their own. One finditer only returns matches
+# that do not overlap, and role phrases share heads with certifications
+# ("A&P Mechanic" is a role and an A&P), so scanned together one of them
+# would be lost
+SEPARATE_FIELDS = ("roles",)
+
+
+class _Matcher:
+    """
+    One regex per pattern set, built like classify._compile: heads are
+    factored into a trie and every leaf ends in an empty group f<i>_<j>
+    (`lastgroup`), so a single finditer over the lower-cased text finds all
+    fields. The IGNORECASE twin scans the original text when lower() would
+    shift offsets (a few non-ASCII characters change length).
+    """
+
+    def __init__(self, patterns: tuple[FieldPattern, ...]) -> None:
+        self.patterns = patterns
+        word_start: list[tuple[str, str]] = []
+        anywhere: list[tuple[str, str]] = []
+        # Value patterns go first, so "a&p/ia" is not taken as a bare "a&p"
+        for i, p in enumerate(patterns):
+            target = word_start if p.word_start else anywhere
+            for j, (head, tail) in enumerate(p.patterns):
+                tail = tail.replace("(?P<v>", f"(?P<f{i}_{j}v>")
+                target.append((head, f"{tail}(?P<f{i}_{j}>)"))
+        for i, p in enumerate(patterns):
+            target = word_start if p.word_start else anywhere
+            end = _ROLE_END if p.field == "roles" else r"(?!\w)"
+            target.extend((phrase, rf"{end}(?P<f{i}_p{j}>)") for j, phrase in enumerate(p.phrases))
+
+        branches = []
+        if word_start:
+            branches.append(rf"(?<!\w){_trie_regex(word_start)}")
+        if anywhere:
+            branches.append(_trie_regex(anywhere))
+        source = "|".join(branches)
+        self.regex = re.compile(source)
+        self.regex_i = re.compile(source, re.IGNORECASE)
+        # Leaf group -> (index into patterns, value group or None)
+        self.leaves = {
+            name: (int(name[1:].split("_", 1)[0]), f"{name}v" if f"{name}v" in self.regex.groupindex else None)
+            for name in self.regex.groupindex
+            if not name.endswith("v")
+        }
+
+    def finditer(self, text: str, lowered: str | None = None):
+        if lowered is None:
+            lowered = text.lower()
+        if len(lowered) == len(text):
+            return self.regex.finditer(lowered)
+        return self.regex_i.finditer(text)
+
+
+def _matchers(patterns: tuple[FieldPattern, ...]) -> tuple[_Matcher, ...]:
+    layers = [tuple(p for p in patterns if p.field not in SEPARATE_FIELDS)]
+    layers.extend(tuple(p for p in patterns if p.field == field) for field in SEPARATE_FIELDS)
+    return tuple(_Matcher(layer) for layer in layers if layer)
+
+
+_MATCHERS = {artifact_type: _matchers(patterns) for artifact_type, patterns in PATTERN_SETS.items()}
+
+
+_NAME_LINE_RE = re.compile(r"[A-Z][a-zA-Z'.-]+(?:[ \t]+[A-Z][a-zA-Z'.-]*){1,3}")
+_NOT_A_NAME = re.compile(r"resume|curriculum|summary|objective|experience|profile|contact", re.IGNORECASE)
+
+
+def _resume_name(text: str) -> dict[str, Any] | None:
+    """First short line in the header that reads as a name."""
+    pos = 0
+    for line in text[:2000].split("\n")[:8]:
+        stripped = line.strip()
+        if stripped and _NAME_LINE_RE.fullmatch(stripped) and not _NOT_A_NAME.search(stripped):
+            start = pos + line.index(stripped)
+            return {"value": _collapse(stripped).title(), "raw": stripped, "span": [start, start + len(stripped)]}
+        pos += len(line) + 1
+    return None
+
+
+def extract_structured(text: str, artifact_type: str) -> dict[str, Any]:
+    """
+    extracted_json.structured for `text`, scanned with the pattern set of
+    `artifact_type` (detected_artifact_type): one pass, plus one per
+    SEPARATE_FIELDS field the set holds. Each field holds
+    {"value", "raw", "span"} (a list of them for roles, certifications and
+    aircraft); spans are character offsets into extracted_text.
+    """
+    artifact_type = artifact_type if artifact_type in PATTERN_SETS else "other"
+    sample = (text or "")[:STRUCTURED_MAX_CHARS]
+    fields: dict[str, Any] = {}
+    seen: dict[str, set[str]] = {}
+    lowered = sample.lower()
+    for matcher, m in ((mt, m) for mt in _MATCHERS[artifact_type] for m in mt.finditer(sample, lowered)):
+        i, value_group = matcher.leaves[m.lastgroup]
+        p = matcher.patterns[i]
+        if not p.multi and p.field in fields:
+            continue
+        # Values and evidence come from the original text; the match may be
+        # over its lower-cased copy
+        vstart, vend = m.span(value_group) if value_group else m.span()
+        start, end = (m.span() if p.multi else (vstart, vend))
+        if p.expand is not None:
+            span = p.expand(sample, start, end)
+            if span is None:
+                continue
+            start, end = vstart, vend = span
+        raw = sample[start:end]
+        value = p.normalize(sample[vstart:vend]) if p.normalize else raw
+        if not value:
+            continue
+        if not p.multi:
+            fields[p.field] = {"value": value, "raw": raw, "span": [start, end]}
+            continue
+        values = seen.setdefault(p.field, set())
+        for v in value if isinstance(value, tuple) else (value,):
+            if v not in values:
+                values.add(v)
+                fields.setdefault(p.field, []).append({"value": v, "raw": raw, "span": [start, end]})
+
+    if artifact_type == "resume":
+        name = _resume_name(sample)
+        if name is not None:
+            fields["name"] = name
+
+    return {
+        "method": METHOD,
+        "artifact_type": artifact_type,
+        "fields": fields,
+        "missing": [f for f in EXPECTED_FIELDS[artifact_type] if f not in fields],
+    }
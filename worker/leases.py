@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+from app.db.functions import fn_heartbeat_artifacts, fn_reclaim_expired_artifact_leases
+
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseKeeper:
+    """
+    Keeps this worker's claims alive and returns dead workers' claims.
+
+    Claims carry `claimed_by` and `lease_expires_at`. While an artifact is in
+    flight it is tracked here, and every `heartbeat_seconds` all tracked ids
+    are extended in one fn_heartbeat_artifacts call. Every `reclaim_seconds`
+    fn_reclaim_expired_artifact_leases puts claims whose lease ran out (the
+    worker was killed mid-download or OOMed) back to 'registered', or to
+    'failed' once they used up `max_attempts`.
+
+    An id the heartbeat could not extend was reclaimed by someone else (this
+    worker stalled past its lease); the task tracked with it is cancelled so
+    the work stops instead of racing the new owner.
+    """
+
+    def __init__(
+        self,
+        worker_id: str,
+        lease_seconds: int = 300,
+        heartbeat_seconds: float | None = None,
+        reclaim_seconds: float = 60,
+        max_attempts: int = 5,
+    ) -> None:
+        self.worker_id = worker_id
+        self.lease_seconds = max(10, lease_seconds)
+        self.heartbeat_seconds = heartbeat_seconds or self.lease_seconds / 3
+        self.reclaim_seconds = reclaim_seconds
+        self.max_attempts = max_attempts
+
+        self._ids: dict[UUID, asyncio.Task | None] = {}
+        self._task: asyncio.Task | None = None
+
+    def track(self, artifact_id: UUID, task: asyncio.Task | None = None) -> None:
+        self._ids[artifact_id] = task
+
+    def release(self, artifact_id: UUID) -> None:
+        self._ids.pop(artifact_id, None)
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(
+            f"leases_started worker_id={self.worker_id} lease_seconds={self.lease_seconds} "
+            f"heartbeat_seconds={self.heartbeat_seconds:g} reclaim_seconds={self.reclaim_seconds:g}"
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        tick = min(self.heartbeat_seconds, self.reclaim_seconds) if self.reclaim_seconds else self.heartbeat_seconds
+        last_heartbeat = last_reclaim = time.monotonic()
+        await self.reclaim()  # pick up whatever the previous deploy left behind
+        while True:
+            await asyncio.sleep(tick)
+            now = time.monotonic()
+            if now - last_heartbeat >= self.heartbeat_seconds:
+                last_heartbeat = now
+                await self.heartbeat()
+            if self.reclaim_seconds and now - last_reclaim >= self.reclaim_seconds:
+                last_reclaim = now
+                await self.reclaim()
+
+    async def heartbeat(self) -> None:
+        ids = list(self._ids)
+        if not ids:
+            return
+        try:
+            kept = set(await fn_heartbeat_artifacts(self.worker_id, ids, self.lease_seconds))
+        except Exception:
+            logger.exception(f"lease_heartbeat_failed worker_id={self.worker_id} count={len(ids)}")
+            return
+        for artifact_id in ids:
+            if artifact_id not in kept and artifact_id in self._ids:
+                # Reclaimed after a missed heartbeat (or finished between the
+                # snapshot and the call, in which case the cancel is a no-op)
+                task = self._ids.pop(artifact_id)
+                logger.warning(
+                    f"lease_lost artifact_id={artifact_id} worker_id={self.worker_id} "
+                    f"cancelled={task is not None and not task.done()}"
+                )
+                if task is not None:
+                    task.cancel()
+
+    async def reclaim(self) -> None:
+        try:
+            n = await fn_reclaim_expired_artifact_leases(max_attempts=self.max_attempts)
+        except Exception:
+            logger.exception("lease_reclaim_failed")
+            return
+        if n:
+            logger.warning(f"lease_reclaimed count={n}")
@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+from urllib.parse import urlparse
+from uuid import UUID
+
+from app.blob_store import is_blob_uri
+from app.db.functions import (
+    fn_fail_artifact,
+    fn_finalize_artifact_extraction,
+    fn_finalize_artifact_from_cache,
+    fn_retry_artifact,
+)
+from app.metrics import (
+    CLASSIFICATIONS_TOTAL,
+    DOWNLOAD_BYTES,
+    DOWNLOAD_SECONDS,
+    EXTRACTION_CACHE_TOTAL,
+    PARSE_SECONDS,
+    STRUCTURED_MISSING_TOTAL,
+    observe_stage,
+)
+from worker.alias_cache import AliasCache
+from worker.extractors.classify import classify_text
+from worker.extractors.extract import (
+    PDF_MAX_PAGES,
+    body_meta,
+    download_body,
+    extract_pdf_range_from_body,
+    extract_text_from_body,
+    pdf_deadline,
+    pdf_page_count,
+    pdf_page_stats,
+    sniff_format,
+)
+from worker.extractors.structured import extract_structured
+from worker.utils.download_cache import get_download_cache
+from worker.utils.http_session import close_clients
+from worker.utils.priority_semaphore import PrioritySemaphore
+from worker.utils.retry_policy import classify_error
+from worker.utils.spool import SpooledBody
+
+
+logger = logging.getLogger(__name__)
+
+# Lower value wins a free stage slot first
+LANE_PRIORITY = {"live": 0, "backfill": 1}
+
+
+def lane_priority(lane: str) -> int:
+    return LANE_PRIORITY.get(lane, 0)
+
+
+class ExtractionPipeline:
+    """
+    Staged extraction for claimed artifacts:
+
+    1. download: blocking httpx/Graph calls run on a dedicated thread pool,
+       at most `download_concurrency` at a time, so the event loop stays free
+    2. parse: pypdf / python-docx run in a process pool, one core per process
+    3. write: finalize / fail calls, at most `db_concurrency` at a time
+
+    With `aliases`, the roles, certifications and aircraft found by the
+    structured stage are resolved to canonical concept codes through that
+    AliasCache before the write (extracted_json.normalized / .unresolved).
+
+    Artifacts flow through the stages independently, so one slow download
+    no longer holds up the rest of the batch.
+
+    Before stage 1, an artifact whose sha256 was already extracted elsewhere
+    is finalized from that copy (content-addressed cache). Copies of the same
+    sha256 within a batch wait for the first one instead of downloading too;
+    if it ends without a result, one of them takes over and the rest wait on.
+
+    PDFs with at least `pdf_parallel_min_pages` pages are split into page
+    ranges parsed on several processes at once, all sharing one wall-clock
+    budget; see WORKER_PDF_MAX_PAGES / WORKER_PDF_TIME_BUDGET_SECONDS.
+
+    Failures are classified: transient ones (throttling, timeouts, 5xx) are
+    rescheduled with backoff through fn_retry_artifact, up to
+    `retry_max_attempts` claims; permanent ones go to fn_fail_artifact.
+
+    Every write carries `worker_id`, so it only lands while this worker still
+    holds the claim. If the lease was reclaimed and handed to another worker,
+    the write is a no-op and the result is dropped.
+
+    Stage slots are handed out by lane priority, so when one worker serves
+    both lanes a live artifact overtakes any backfill artifact queued at the
+    same stage.
+    """
+
+    def __init__(
+        self,
+        download_concurrency: int = 8,
+        parse_processes: int | None = None,
+        db_concurrency: int = 4,
+        retry_max_attempts: int = 5,
+        retry_base_seconds: int = 30,
+        retry_max_delay_seconds: int = 3600,
+        pdf_parallel_min_pages: int = 40,
+        pdf_pages_per_task: int = 20,
+        worker_id: str | None = None,
+        aliases: AliasCache | None = None,
+    ) -> None:
+        self.download_concurrency = max(1, download_concurrency)
+        self.parse_processes = max(1, parse_processes or os.cpu_count() or 1)
+        self.db_concurrency = max(1, db_concurrency)
+        self.retry_max_attempts = max(1, retry_max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_delay_seconds = retry_max_delay_seconds
+        self.pdf_parallel_min_pages = pdf_parallel_min_pages
+        self.pdf_pages_per_task = max(1, pdf_pages_per_task)
+        self.worker_id = worker_id
+        self.aliases = aliases
+
+        self._download_pool: ThreadPoolExecutor | None = None
+        self._parse_pool: ProcessPoolExecutor | None = None
+        self._download_sem = PrioritySemaphore(self.download_concurrency)
+        self._parse_sem = PrioritySemaphore(self.parse_processes)
+        self._db_sem = PrioritySemaphore(self.db_concurrency)
+        self._inflight_sha: dict[str, asyncio.Future] = {}
+
+        self.cache_lookups = 0
+        self.cache_hits = 0
+
+    def start(self) -> None:
+        # Opened up front so a worker whose cache directory is held by another
+        # process fails here instead of on its first download
+        get_download_cache()
+        self._download_pool = ThreadPoolExecutor(
+            max_workers=self.download_concurrency,
+            thread_name_prefix="download",
+        )
+        self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_processes)
+        logger.info(
+            f"pipeline_started downloads={self.download_concurrency} "
+            f"parse_processes={self.parse_processes} db={self.db_concurrency}"
+        )
+
+    def stop(self) -> None:
+        if self._download_pool:
+            self._download_pool.shutdown(wait=True, cancel_futures=True)
+            self._download_pool = None
+        close_clients()
+        if self._parse_pool:
+            self._parse_pool.shutdown(wait=True, cancel_futures=True)
+            self._parse_pool = None
+
+    async def run(self, items: list[dict[str, Any]], lane: str) -> int:
+        """Process a batch of claimed artifacts. Returns how many were finalized."""
+        if not self._download_pool or not self._parse_pool:
+            raise RuntimeError("pipeline not started")
+        results = await asyncio.gather(*(self.process(it, lane) for it in items))
+        self.log_cache_stats()
+        return sum(1 for ok in results if ok)
+
+    def log_cache_stats(self) -> None:
+        if self.cache_lookups:
+            logger.info(
+                f"extraction_cache hits={self.cache_hits} lookups={self.cache_lookups} "
+                f"hit_rate={self.cache_hits / self.cache_lookups:.3f}"
+            )
+
+    async def process(self, item: dict[str, Any], lane: str) -> bool:
+        artifact_id = UUID(str(item["artifact_id"]))
+        sha = (item.get("sha256") or "").strip() or None
+        if not sha:
+            return await self._extract_and_write(artifact_id, item, lane)
+
+        # One artifact per sha256 (the leader) works at a time; the others
+        # wait for it. If it finalized, they finalize from its copy at once;
+        # if it did not, the first follower to wake becomes the next leader
+        # and the rest keep waiting.
+        while (pending := self._inflight_sha.get(sha)) is not None:
+            # Shielded: a follower cancelled on a lost lease must not cancel
+            # the leader's future under the other followers
+            if await asyncio.shield(pending) and await self._finalize_from_cache(artifact_id, sha, lane):
+                return True
+
+        leader = asyncio.get_running_loop().create_future()
+        self._inflight_sha[sha] = leader
+        ok = False
+        try:
+            ok = await self._finalize_from_cache(artifact_id, sha, lane) or await self._extract_and_write(
+                artifact_id, item, lane
+            )
+            return ok
+        finally:
+            del self._inflight_sha[sha]
+            leader.set_result(ok)
+
+    async def _finalize_from_cache(self, artifact_id: UUID, sha: str, lane: str) -> bool:
+        self.cache_lookups += 1
+        try:
+            with observe_stage("cache", lane):
+                async with self._db_sem.slot(lane_priority(lane)):
+                    source_id = await fn_finalize_artifact_from_cache(artifact_id, sha, self.worker_id)
+        except Exception:
+            # The cache is an optimization; fall through to a normal extraction
+            logger.exception(f"[{lane}] cache lookup failed {artifact_id}")
+            return False
+
+        # None is also returned when the claim was lost; the extraction that
+        # follows then finds it lost too and drops its result
+        EXTRACTION_CACHE_TOTAL.labels(lane=lane, result="miss" if source_id is None else "hit").inc()
+        if source_id is None:
+            return False
+        self.cache_hits += 1
+        print(f"[{lane}] finalized {artifact_id} from cache source={source_id}")
+        return True
+
+    async def _extract_and_write(self, artifact_id: UUID, item: dict[str, Any], lane: str) -> bool:
+        try:
+            text, meta = await self._extract(item, lane)
+            if not isinstance(meta, dict):
+                meta = {"meta": str(meta)}
+            meta["cache_hit"] = False
+            if self.aliases is not None:
+                with observe_stage("normalize", lane):
+                    meta.update(await self.aliases.normalize_structured(meta.get("structured")))
+
+            with observe_stage("finalize", lane):
+                async with self._db_sem.slot(lane_priority(lane)):
+                    written = await fn_finalize_artifact_extraction(artifact_id, text, meta, self.worker_id)
+            if not written:
+                self._lease_lost(artifact_id, lane, "finalize")
+                return False
+            timings = meta.get("timings", {})
+            logger.info(
+                f"artifact_extracted artifact_id={artifact_id} lane={lane} source={meta.get('source')} "
+                f"parser={meta.get('parser')} download_ms={timings.get('download_ms')} parse_ms={timings.get('parse_ms')}"
+            )
+            print(f"[{lane}] finalized {artifact_id}")
+            return True
+
+        except Exception as e:
+            err = f"{e}\n{traceback.format_exc()}"
+            cls = classify_error(e)
+            if cls.transient:
+                with observe_stage("retry", lane):
+                    async with self._db_sem.slot(lane_priority(lane)):
+                        status = await fn_retry_artifact(
+                            artifact_id,
+                            err,
+                            self.worker_id,
+                            self.retry_max_attempts,
+                            self.retry_base_seconds,
+                            self.retry_max_delay_seconds,
+                            int(cls.retry_after) if cls.retry_after is not None else None,
+                        )
+                if status is None:
+                    self._lease_lost(artifact_id, lane, "retry")
+                    return False
+                logger.warning(
+                    f"artifact_retry artifact_id={artifact_id} lane={lane} reason={cls.reason} "
+                    f"retry_after={cls.retry_after} status={status} error={e}"
+                )
+                print(f"[{lane}] {'retry scheduled' if status == 'registered' else 'failed'} {artifact_id}")
+                return False
+
+            logging.exception(f"[{lane}] failed {artifact_id} reason={cls.reason}")
+            with observe_stage("fail", lane):
+                async with self._db_sem.slot(lane_priority(lane)):
+                    written = await fn_fail_artifact(artifact_id, err, self.worker_id)
+            if not written:
+                self._lease_lost(artifact_id, lane, "fail")
+                return False
+            print(f"[{lane}] failed {artifact_id}")
+            return False
+
+    def _lease_lost(self, artifact_id: UUID, lane: str, stage: str) -> None:
+        # The lease ran out and the artifact was reclaimed; whoever holds it
+        # now owns the outcome
+        logger.warning(
+            f"artifact_lease_lost artifact_id={artifact_id} lane={lane} stage={stage} "
+            f"worker_id={self.worker_id} result dropped"
+        )
+        print(f"[{lane}] lease lost {artifact_id}, result dropped")
+
+    async def _extract(self, item: dict[str, Any], lane: str) -> tuple[str, dict[str, Any]]:
+        storage_uri = item.get("storage_uri")
+        mime_type = item.get("mime_type")
+        if not storage_uri:
+            raise ValueError("missing storage_uri")
+
+        # blob://<sha256> has no host; keep the metric label bounded
+        host = "blob" if is_blob_uri(storage_uri) else (urlparse(storage_uri).netloc or "unknown").lower()
+
+        async with self._download_sem.slot(lane_priority(lane)):
+            t0 = time.perf_counter()
+            with observe_stage("download", lane):
+                body, headers = await self._download(storage_uri)
+            download_seconds = time.perf_counter() - t0
+        source = headers.get("x-download-source", "http")
+        DOWNLOAD_SECONDS.labels(source=source, host=host).observe(download_seconds)
+        if headers.get("x-download-cache") in (None, "miss"):
+            # Cache hits, 304s and coalesced waiters moved no body bytes
+            DOWNLOAD_BYTES.labels(source=source, host=host).inc(body.size)
+
+        try:
+            text, meta, parse_seconds = await self._parse(body, headers, storage_uri, mime_type, lane)
+        finally:
+            body.cleanup()
+
+        PARSE_SECONDS.labels(
+            parser=meta.get("parser", "unknown"),
+            format=meta.get("sniffed_format", "unknown"),
+        ).observe(parse_seconds)
+        meta["timings"] = {
+            "download_ms": round(download_seconds * 1000, 1),
+            "parse_ms": round(parse_seconds * 1000, 1),
+            **meta.get("timings", {}),
+        }
+        CLASSIFICATIONS_TOTAL.labels(
+            artifact_type=meta.get("detected_artifact_type", "unknown"),
+            needs_review=str(bool(meta.get("needs_review"))).lower(),
+        ).inc()
+        structured = meta.get("structured") or {}
+        for field in structured.get("missing", ()):
+            STRUCTURED_MISSING_TOTAL.labels(artifact_type=structured["artifact_type"], field=field).inc()
+
+        registered_sha = (item.get("sha256") or "").strip().lower()
+        if registered_sha:
+            meta["sha256_verified"] = registered_sha == body.sha256
+        return text, meta
+
+    async def _parse(
+        self,
+        body: SpooledBody,
+        headers: dict[str, str],
+        url: str,
+        mime_type: str | None,
+        lane: str,
+    ) -> tuple[str, dict[str, Any], float]:
+        if self.pdf_parallel_min_pages and self.parse_processes > 1 and sniff_format(body.head) == "pdf":
+            t0 = time.perf_counter()
+            deadline = pdf_deadline()
+            try:
+                pages = await self._in_parse_pool(lane, pdf_page_count, body)
+            except BrokenProcessPool:
+                raise
+            except Exception:
+                pages = 0  # let the regular path report the parse error
+            if pages >= self.pdf_parallel_min_pages:
+                return await self._parse_pdf_ranges(body, headers, mime_type, pages, deadline, lane, t0)
+
+        return await self._in_parse_pool(lane, _parse_timed, body, headers, url, mime_type)
+
+    async def _parse_pdf_ranges(
+        self,
+        body: SpooledBody,
+        headers: dict[str, str],
+        mime_type: str | None,
+        pages: int,
+        deadline: float | None,
+        lane: str,
+        t0: float,
+    ) -> tuple[str, dict[str, Any], float]:
+        limit = min(pages, PDF_MAX_PAGES) if PDF_MAX_PAGES else pages
+        per_task = max(self.pdf_pages_per_task, math.ceil(limit / self.parse_processes))
+        ranges = [(start, min(start + per_task, limit)) for start in range(0, limit, per_task)]
+
+        parts = await asyncio.gather(
+            *(self._in_parse_pool(lane, extract_pdf_range_from_body, body, a, b, deadline) for a, b in ranges)
+        )
+        text = "\n\n".join(t for t, _, _ in parts if t)
+        parsed = sum(n for _, n, _ in parts)
+        timed_out = any(to for _, _, to in parts)
+
+        meta = body_meta(body, headers, mime_type)
+        meta["parser"] = "pypdf"
+        meta.update(pdf_page_stats(pages, parsed, timed_out))
+        meta["pdf_page_tasks"] = len(ranges)
+        parse_seconds = time.perf_counter() - t0
+        meta.update(await self._in_parse_pool(lane, analysis_meta, text))
+        return text, meta, parse_seconds
+
+    async def _download(self, storage_uri: str) -> tuple[SpooledBody, dict[str, str]]:
+        fut = asyncio.get_running_loop().run_in_executor(self._download_pool, download_body, storage_uri)
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            # Cancelled on a lost lease while the thread was still downloading:
+            # nobody will read its body, so free the spool file / cache link
+            fut.add_done_callback(_discard_download)
+            raise
+
+    async def _in_parse_pool(self, lane: str, fn, *args):
+        # Gate submissions so the executor's FIFO queue stays empty and
+        # priority decides which task gets the next free process
+        loop = asyncio.get_running_loop()
+        async with self._parse_sem.slot(lane_priority(lane)):
+            pool = self._parse_pool
+            try:
+                with observe_stage("parse", lane):
+                    return await loop.run_in_executor(pool, fn, *args)
+            except BrokenProcessPool:
+                # A parser process died (OOM, segfault in a native lib). Replace
+                # the pool once so the rest of the batch can still be parsed.
+                if self._parse_pool is pool:
+                    logger.warning("parse_pool_broken recreating")
+                    self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_processes)
+                raise
+
+
+def _discard_download(fut: asyncio.Future) -> None:
+    if not fut.cancelled() and fut.exception() is None:
+        body, _ = fut.result()
+        body.cleanup()
+
+
+def _parse_timed(
+    body: SpooledBody,
+    headers: dict[str, str],
+    url: str,
+    mime_type: str | None,
+) -> tuple[str, dict[str, Any], float]:
+    # Runs in the parser process; timed there so pool queueing is excluded
+    t0 = time.perf_counter()
+    text, meta = extract_text_from_body(body, headers, url, mime_type)
+    parse_seconds = time.perf_counter() - t0
+    meta.update(analysis_meta(text))
+    return text, meta, parse_seconds
+
+
+def analysis_meta(text: str) -> dict[str, Any]:
+    """
+    Rule-based classification and structured fields for extracted_json; runs
+    in the parser process.
+    """
+    t0 = time.perf_counter()
+    meta = classify_text(text).as_meta()
+    t1 = time.perf_counter()
+    meta["structured"] = extract_structured(text, meta["detected_artifact_type"])
+    meta["timings"] = {
+        "classify_ms": round((t1 - t0) * 1000, 2),
+        "structured_ms": round((time.perf_counter() - t1) * 1000, 2),
+    }
+    return meta
@@ -0,0 +1,112 @@
+"""
+Reclassify extracted artifacts with the rule-based classifier
+(worker/extractors/classify.py), re-extract extracted_json.structured
+(worker/extractors/structured.py) for the detected type and normalize it again
+through the alias cache (worker/alias_cache.py).
+
+Pages through delivery.fn_list_artifacts_for_classification (text capped at
+the larger of WORKER_CLASSIFY_MAX_CHARS / WORKER_STRUCTURED_MAX_CHARS in the
+database), classifies each page across a process pool and merges the fields
+into extracted_json with one
+delivery.fn_set_artifact_classifications_batch call per page, written while
+the next page is read and classified.
+
+    python -m worker.reclassify
+    python -m worker.reclassify --processes 8 --page-size 5000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from app.db.client import db
+from app.db.functions import fn_list_artifacts_for_classification, fn_set_artifact_classifications_batch
+from worker.alias_cache import AliasCache
+from worker.extractors.classify import CLASSIFY_MAX_CHARS, classify_text
+from worker.extractors.structured import STRUCTURED_MAX_CHARS, extract_structured
+
+
+def _classify_many(texts: list[str]) -> list[dict[str, Any]]:
+    # Runs in a pool process
+    metas = []
+    for t in texts:
+        meta = classify_text(t).as_meta()
+        meta["structured"] = extract_structured(t, meta["detected_artifact_type"])
+        metas.append(meta)
+    return metas
+
+
+async def reclassify(page_size: int, processes: int) -> dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    aliases = AliasCache()
+    await aliases.refresh()
+    pool = ProcessPoolExecutor(max_workers=processes)
+    totals: dict[str, Any] = {"total": 0, "written": 0, "needs_review": 0, "types": Counter()}
+    after = None
+    write_task: asyncio.Task | None = None
+    try:
+        while True:
+            rows = await fn_list_artifacts_for_classification(
+                after, page_size, max(CLASSIFY_MAX_CHARS, STRUCTURED_MAX_CHARS)
+            )
+            if not rows:
+                break
+            texts = [r["extracted_text"] or "" for r in rows]
+            step = max(1, math.ceil(len(texts) / processes))
+            parts = await asyncio.gather(
+                *(loop.run_in_executor(pool, _classify_many, texts[i : i + step]) for i in range(0, len(texts), step))
+            )
+            metas = [m for part in parts for m in part]
+
+            for m in metas:
+                m.update(await aliases.normalize_structured(m["structured"]))
+                totals["types"][m["detected_artifact_type"]] += 1
+                totals["needs_review"] += int(m["needs_review"])
+            totals["total"] += len(rows)
+
+            if write_task is not None:
+                totals["written"] += await write_task
+            write_task = asyncio.create_task(
+                fn_set_artifact_classifications_batch({r["artifact_id"]: m for r, m in zip(rows, metas)})
+            )
+            after = rows[-1]["artifact_id"]
+            print(f"[reclassify] page artifacts={len(rows)} total={totals['total']}")
+
+        if write_task is not None:
+            totals["written"] += await write_task
+            write_task = None
+    finally:
+        if write_task is not None:
+            write_task.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+    return totals
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--page-size", type=int, default=2000)
+    ap.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    await db.start()
+    try:
+        t0 = time.perf_counter()
+        totals = await reclassify(max(1, args.page_size), max(1, args.processes))
+        seconds = time.perf_counter() - t0
+        types = " ".join(f"{t}={n}" for t, n in sorted(totals["types"].items()))
+        print(
+            f"[reclassify] done artifacts={totals['total']} written={totals['written']} "
+            f"needs_review={totals['needs_review']} {types} seconds={seconds:.1f}"
+        )
+    finally:
+        await db.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+from uuid import UUID
+
+from app.db.functions import fn_claim_registered_artifacts
+from app.metrics import WORKER_INFLIGHT, observe_stage
+from worker.leases import LeaseKeeper
+from worker.pipeline import ExtractionPipeline, lane_priority
+from worker.utils.wakeup import LaneWakeup
+
+
+logger = logging.getLogger(__name__)
+
+
+class LaneScheduler:
+    """
+    Continuous, work-conserving claim loop over one or more lanes.
+
+    Instead of claiming a batch and waiting for all of it, the scheduler keeps
+    up to `max_inflight` artifacts moving through the pipeline and claims more
+    as soon as any finishes. Lanes are served in priority order (live first):
+
+    - live may always claim up to its own cap; backfill work already in
+      flight never blocks it, and the pipeline's stage semaphores let live
+      artifacts overtake queued backfill ones
+    - backfill fills whatever capacity live leaves idle, up to its cap; while
+      live still has a backlog it is held to `backfill_share` of
+      `max_inflight`, so big imports keep moving without crowding out live
+
+    A lane whose last claim came back short is treated as empty until a
+    notification for it arrives or the safety poll interval passes, so idle
+    lanes cost no queries.
+
+    With a LeaseKeeper, claims are made under its worker id and lease, and
+    every artifact is heartbeated for as long as it is in flight; its task is
+    cancelled if the lease is lost.
+    """
+
+    def __init__(
+        self,
+        pipeline: ExtractionPipeline,
+        lanes: tuple[str, ...],
+        max_inflight: int,
+        lane_caps: dict[str, int] | None = None,
+        backfill_share: float = 0.25,
+        batch_limit: int = 50,
+        wakeup: LaneWakeup | None = None,
+        leases: LeaseKeeper | None = None,
+        poll_seconds: float = 15,
+        safety_poll_seconds: float = 60,
+    ) -> None:
+        self.pipeline = pipeline
+        self.lanes = tuple(sorted(lanes, key=lane_priority))
+        self.max_inflight = max(1, max_inflight)
+        self.lane_caps = {lane: max(0, (lane_caps or {}).get(lane, self.max_inflight)) for lane in self.lanes}
+        self.backfill_share = min(1.0, max(0.0, backfill_share))
+        self.batch_limit = max(1, batch_limit)
+        self.wakeup = wakeup
+        self.leases = leases
+        self.poll_seconds = poll_seconds
+        self.safety_poll_seconds = safety_poll_seconds
+
+        self._inflight = {lane: 0 for lane in self.lanes}
+        self._drained = {lane: False for lane in self.lanes}
+        self._tasks: set[asyncio.Task] = set()
+        self._slot_freed = asyncio.Event()
+        self._last_poll = time.monotonic()
+
+    @property
+    def inflight(self) -> int:
+        return sum(self._inflight.values())
+
+    async def run(self) -> None:
+        logger.info(
+            f"scheduler_started lanes={','.join(self.lanes)} max_inflight={self.max_inflight} "
+            f"caps={self.lane_caps} backfill_share={self.backfill_share}"
+        )
+        try:
+            while True:
+                await self._fill()
+                await self._wait()
+        finally:
+            if self._tasks:
+                await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def capacity(self, lane: str) -> int:
+        """How many more artifacts `lane` may claim right now."""
+        own = self.lane_caps[lane] - self._inflight[lane]
+        i = self.lanes.index(lane)
+        if i == 0:
+            # Top lane: bounded by its own cap and the slot budget only
+            free = self.max_inflight - self._inflight[lane]
+        else:
+            free = self.max_inflight - self.inflight
+            if any(not self._drained[hi] for hi in self.lanes[:i]):
+                # A higher lane still has a backlog: only the reserved share
+                free = min(free, int(self.max_inflight * self.backfill_share) - self._inflight[lane])
+        return max(0, min(own, free, self.batch_limit))
+
+    async def _fill(self) -> None:
+        # Afterwards every lane is either drained or out of capacity, so the
+        # loop only has to wait for a free slot or a notification
+        for lane in self.lanes:
+            while not self._drained[lane]:
+                want = self.capacity(lane)
+                if want <= 0:
+                    break
+
+                try:
+                    with observe_stage("claim", lane):
+                        if self.leases:
+                            items = await fn_claim_registered_artifacts(
+                                lane, want, self.leases.worker_id, self.leases.lease_seconds
+                            )
+                        else:
+                            items = await fn_claim_registered_artifacts(lane, want)
+                except Exception:
+                    # Back off until the next notification or poll
+                    logger.exception(f"[{lane}] claim failed")
+                    self._drained[lane] = True
+                    break
+
+                if items:
+                    print(f"[{lane}] claimed {len(items)} registered artifacts")
+                for item in items:
+                    self._start(item, lane)
+                if len(items) < want:
+                    self._drained[lane] = True
+                    self.pipeline.log_cache_stats()
+
+    def _start(self, item: dict[str, Any], lane: str) -> None:
+        self._inflight[lane] += 1
+        WORKER_INFLIGHT.labels(lane=lane).set(self._inflight[lane])
+        task = asyncio.get_running_loop().create_task(self._process(item, lane))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if self.leases:
+            self.leases.track(UUID(str(item["artifact_id"])), task)
+
+    async def _process(self, item: dict[str, Any], lane: str) -> None:
+        try:
+            await self.pipeline.process(item, lane)
+        except Exception:
+            logger.exception(f"[{lane}] pipeline error {item.get('artifact_id')}")
+        finally:
+            if self.leases:
+                self.leases.release(UUID(str(item["artifact_id"])))
+            self._inflight[lane] -= 1
+            WORKER_INFLIGHT.labels(lane=lane).set(self._inflight[lane])
+            self._slot_freed.set()
+
+    async def _wait(self) -> None:
+        listening = self.wakeup is not None and self.wakeup.connected
+        interval = self.safety_poll_seconds if listening else self.poll_seconds
+        timeout = max(0.0, self._last_poll + interval - time.monotonic())
+
+        if self.wakeup is not None:
+            woken = await self.wakeup.wait_any(self.lanes, timeout, extra=self._slot_freed)
+        else:
+            woken = set()
+            try:
+                await asyncio.wait_for(self._slot_freed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._slot_freed.clear()
+
+        for lane in woken:
+            if self._drained[lane]:
+                print(f"[{lane}] woken by notification")
+            self._drained[lane] = False
+        if time.monotonic() - self._last_poll >= interval:
+            # Safety poll: recheck every lane in case a notification was lost
+            self._last_poll = time.monotonic()
+            for lane in self.lanes:
+                self._drained[lane] = False
@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+from app.metrics import DOWNLOAD_CACHE_TOTAL
+from worker.utils.spool import SPOOL_MEMORY_BYTES, SpooledBody
+
+
+logger = logging.getLogger(__name__)
+
+# Unset: the first free <tmp>/cbl-download-cache[-N] slot, so several workers
+# on one host each get their own directory and keep it across restarts
+CACHE_DIR = os.getenv("WORKER_DOWNLOAD_CACHE_DIR")
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "cbl-download-cache")
+DEFAULT_CACHE_SLOTS = 64
+# 0 disables the cache and download coalescing
+CACHE_MAX_BYTES = int(os.getenv("WORKER_DOWNLOAD_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Entries validated this recently are served without asking the server again
+CACHE_FRESH_SECONDS = float(os.getenv("WORKER_DOWNLOAD_CACHE_FRESH_SECONDS", "60"))
+
+VALIDATOR_HEADERS = ("etag", "last-modified")
+
+# fetch(validators) -> (body, headers); body is None when the server answered
+# 304 Not Modified to the conditional request built from `validators`
+Fetcher = Callable[[dict[str, str]], tuple[Optional[SpooledBody], dict[str, str]]]
+
+
+class DownloadCacheLockedError(RuntimeError):
+    pass
+
+
+def conditional_headers(validators: dict[str, str] | None) -> dict[str, str]:
+    out: dict[str, str] = {}
+    if validators:
+        if validators.get("etag"):
+            out["If-None-Match"] = validators["etag"]
+        if validators.get("last-modified"):
+            out["If-Modified-Since"] = validators["last-modified"]
+    return out
+
+
+@dataclass
+class _Entry:
+    url: str
+    sha256: str
+    size: int
+    headers: dict[str, str]
+    validated_at: float  # wall clock, so freshness survives a restart
+
+    @property
+    def validators(self) -> dict[str, str]:
+        return {k: self.headers[k] for k in VALIDATOR_HEADERS if self.headers.get(k)}
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.waiters = 0
+        self.bodies: list[SpooledBody] = []
+        self.headers: dict[str, str] = {}
+        self.error: BaseException | None = None
+
+
+class DownloadCache:
+    """
+    Single-flight downloads over a bounded on-disk LRU cache, keyed by the
+    normalized URL.
+
+    Concurrent download_body calls for the same URL share one request: the
+    first caller fetches, the others wait and each get their own SpooledBody
+    (in memory when small, otherwise a hard link to the cached file, so every
+    caller's cleanup() stays independent).
+
+    Cached entries are served as-is for `fresh_seconds` after they were last
+    validated; after that the next request is sent with If-None-Match /
+    If-Modified-Since and a 304 reuses the cached bytes. Responses marked
+    no-store or larger than the cache are passed through uncached. Least
+    recently used entries are evicted once the cache exceeds `max_bytes`.
+
+    The index lives in memory and is rebuilt from the <key>.json sidecars on
+    start, so a directory belongs to one process: it is held with an exclusive
+    lock on <root>/.lock for the life of the cache, and opening a directory
+    another process holds raises DownloadCacheLockedError.
+    """
+
+    def __init__(self, root: str, max_bytes: int, fresh_seconds: float = CACHE_FRESH_SECONDS) -> None:
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self._tmp_dir = os.path.join(self.root, ".tmp")
+        self._out_dir = os.path.join(self.root, ".out")
+        self._lock_fd = _lock_dir(self.root)
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._total = 0
+        self._flights: dict[str, _Flight] = {}
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def _load(self) -> None:
+        for d in (self._tmp_dir, self._out_dir):
+            shutil.rmtree(d, ignore_errors=True)
+            os.makedirs(d, exist_ok=True)
+
+        found = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            key = name[: -len(".json")]
+            try:
+                with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                    entry = _Entry(**json.load(f))
+                st = os.stat(self._body_path(key))
+            except (OSError, ValueError, TypeError):
+                self._remove_files(key)
+                continue
+            if st.st_size != entry.size:
+                self._remove_files(key)
+                continue
+            found.append((st.st_mtime, key, entry))
+
+        # Body mtime is touched on every hit, so it orders the LRU
+        for _, key, entry in sorted(found, key=lambda x: x[0]):
+            self._entries[key] = entry
+            self._total += entry.size
+        with self._lock:
+            self._evict()
+        logger.info(f"download_cache_loaded dir={self.root} entries={len(self._entries)} bytes={self._total}")
+
+    def get(self, url: str, fetch: Fetcher) -> tuple[SpooledBody, dict[str, str]]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            flight.done.wait()
+            DOWNLOAD_CACHE_TOTAL.labels(result="coalesced").inc()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                body = flight.bodies.pop()
+            return body, dict(flight.headers, **{"x-download-cache": "coalesced"})
+
+        try:
+            body, headers, result = self._resolve(key, url, fetch)
+        except BaseException as e:
+            with self._lock:
+                del self._flights[key]
+            flight.error = e
+            flight.done.set()
+            raise
+
+        with self._lock:
+            # No new waiters can join once the flight is gone
+            del self._flights[key]
+            waiters = flight.waiters
+        try:
+            flight.bodies = self._copies(body, waiters)
+            flight.headers = headers
+        except BaseException as e:
+            flight.error = e
+            body.cleanup()
+            raise
+        finally:
+            flight.done.set()
+
+        if waiters:
+            logger.info(f"download_coalesced url={url} waiters={waiters}")
+        DOWNLOAD_CACHE_TOTAL.labels(result=result).inc()
+        return body, dict(headers, **{"x-download-cache": result})
+
+    def _resolve(self, key: str, url: str, fetch: Fetcher) -> tuple[SpooledBody, dict[str, str], str]:
+        """Returns an owned body, its headers and the cache result."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None and time.time() - entry.validated_at < self.fresh_seconds:
+            body = self._open_entry(key, entry)
+            if body is not None:
+                return body, entry.headers, "hit"
+
+        validators = entry.validators if entry is not None else {}
+        body, headers = fetch(validators)
+
+        if body is None and entry is not None:
+            entry.headers.update({k: v for k, v in headers.items() if k in VALIDATOR_HEADERS})
+            entry.validated_at = time.time()
+            body = self._open_entry(key, entry)
+            if body is not None:
+                self._write_meta(key, entry)
+                logger.info(f"download_cache_revalidated url={url} bytes={entry.size}")
+                return body, entry.headers, "revalidated"
+
+        if body is None:
+            # 304 for an entry evicted while the request was out: fetch in full
+            body, headers = fetch({})
+            if body is None:
+                raise RuntimeError(f"304 Not Modified for an uncached download: {url}")
+
+        self._store(key, url, body, headers)
+        return body, headers, "miss"
+
+    def _open_entry(self, key: str, entry: _Entry) -> SpooledBody | None:
+        """Owned copy of a cached body, so a later eviction cannot pull it away."""
+        path = self._body_path(key)
+        try:
+            os.utime(path)
+            return self._copies(SpooledBody.from_file(path, entry.sha256), 1)[0]
+        except FileNotFoundError:
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self._total -= entry.size
+            return None
+
+    def _store(self, key: str, url: str, body: SpooledBody, headers: dict[str, str]) -> None:
+        cache_control = (headers.get("cache-control") or "").lower()
+        if "no-store" in cache_control or body.size > self.max_bytes:
+            return
+
+        tmp = os.path.join(self._tmp_dir, uuid.uuid4().hex)
+        try:
+            if body.data is not None:
+                with open(tmp, "wb") as f:
+                    f.write(body.data)
+            else:
+                _link_or_copy(body.path, tmp)
+        except OSError as e:
+            _unlink(tmp)
+            logger.warning(f"download_cache_store_failed url={url} error={e}")
+            return
+
+        entry = _Entry(url=url, sha256=body.sha256, size=body.size, headers=headers, validated_at=time.time())
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= old.size
+            os.replace(tmp, self._body_path(key))
+            self._write_meta(key, entry)
+            self._entries[key] = entry
+            self._total += entry.size
+            self._evict()
+
+    def _write_meta(self, key: str, entry: _Entry) -> None:
+        tmp = os.path.join(self._tmp_dir, f"{key}.{uuid.uuid4().hex}.json")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(entry), f)
+        os.replace(tmp, self._meta_path(key))
+
+    def _evict(self) -> None:
+        # Caller holds _lock. Entries with a download in flight are skipped.
+        for key in list(self._entries):
+            if self._total <= self.max_bytes:
+                break
+            if key in self._flights:
+                continue
+            entry = self._entries.pop(key)
+            self._total -= entry.size
+            self._remove_files(key)
+            logger.info(f"download_cache_evicted url={entry.url} bytes={entry.size}")
+
+    def _remove_files(self, key: str) -> None:
+        _unlink(self._meta_path(key))
+        _unlink(self._body_path(key))
+
+    def _copies(self, src: SpooledBody, count: int) -> list[SpooledBody]:
+        """`count` independent, owned bodies with the bytes of `src`."""
+        if count <= 0:
+            return []
+        if src.data is not None or src.size <= SPOOL_MEMORY_BYTES:
+            data = src.read_bytes()
+            return [SpooledBody(size=src.size, sha256=src.sha256, head=src.head, data=data) for _ in range(count)]
+
+        out = []
+        try:
+            for _ in range(count):
+                path = os.path.join(self._out_dir, uuid.uuid4().hex)
+                _link_or_copy(src.path, path)
+                out.append(SpooledBody(size=src.size, sha256=src.sha256, head=src.head, path=path))
+        except BaseException:
+            for body in out:
+                body.cleanup()
+            raise
+        return out
+
+
+def _lock_dir(root: str) -> int:
+    """Exclusive lock on `root`, held until the returned fd is closed (or the process exits)."""
+    os.makedirs(root, exist_ok=True)
+    fd = os.open(os.path.join(root, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise DownloadCacheLockedError(f"download cache {root} is in use by another process") from None
+    return fd
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Different filesystem (or no hard links): fall back to a copy
+        shutil.copyfile(src, dst)
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+_cache: DownloadCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_download_cache() -> DownloadCache | None:
+    """
+    Process-wide cache, or None when WORKER_DOWNLOAD_CACHE_MAX_BYTES is 0.
+
+    Raises DownloadCacheLockedError when WORKER_DOWNLOAD_CACHE_DIR is held by
+    another process, or every default slot is.
+    """
+    global _cache
+    if CACHE_MAX_BYTES <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _open_cache()
+    return _cache
+
+
+def _open_cache() -> DownloadCache:
+    if CACHE_DIR:
+        return DownloadCache(CACHE_DIR, CACHE_MAX_BYTES)
+    for slot in range(DEFAULT_CACHE_SLOTS):
+        root = DEFAULT_CACHE_DIR if slot == 0 else f"{DEFAULT_CACHE_DIR}-{slot}"
+        try:
+            return DownloadCache(root, CACHE_MAX_BYTES)
+        except DownloadCacheLockedError:
+            continue
+    raise DownloadCacheLockedError(f"all {DEFAULT_CACHE_SLOTS} download cache slots under {DEFAULT_CACHE_DIR} are in use")
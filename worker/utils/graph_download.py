@@ -1,16 +1,29 @@
 from __future__ import annotations
 
 import base64
+import logging
 import os
+import threading
+import time
 from typing import Optional
 
 import httpx
 import msal
 
+from worker.utils.download_cache import conditional_headers
+from worker.utils.host_limiter import limited_request
+from worker.utils.http_session import get_client
+from worker.utils.spool import SpooledBody, spool_response
+
+
+logger = logging.getLogger(__name__)
 
 GRAPH_SCOPE = ["https://graph.microsoft.com/.default"]
 GRAPH_BASE = "https://graph.microsoft.com/v1.0"
 
+# Refresh this long before the token actually expires
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
 
 def _get_env(name: str) -> str:
     v = os.getenv(name)
@@ -19,24 +32,61 @@ def _get_env(name: str) -> str:
     return v
 
 
-def get_graph_access_token() -> str:
-    tenant_id = _get_env("MS_TENANT_ID")
-    client_id = _get_env("MS_CLIENT_ID")
-    client_secret = _get_env("MS_CLIENT_SECRET")
+class GraphTokenCache:
+    """
+    Process-wide app-only Graph token.
+
+    Keeps one msal.ConfidentialClientApplication and the current token, and
+    only goes back to AAD when the token is within the refresh margin of its
+    expiry (or was rejected). Thread-safe, since downloads run on threads.
+    """
+
+    def __init__(self, refresh_margin_seconds: int = TOKEN_REFRESH_MARGIN_SECONDS) -> None:
+        self._refresh_margin = refresh_margin_seconds
+        self._lock = threading.Lock()
+        self._app: Optional[msal.ConfidentialClientApplication] = None
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+
+    def _get_app(self) -> msal.ConfidentialClientApplication:
+        if self._app is None:
+            tenant_id = _get_env("MS_TENANT_ID")
+            client_id = _get_env("MS_CLIENT_ID")
+            client_secret = _get_env("MS_CLIENT_SECRET")
+
+            self._app = msal.ConfidentialClientApplication(
+                client_id=client_id,
+                authority=f"https://login.microsoftonline.com/{tenant_id}",
+                client_credential=client_secret,
+            )
+        return self._app
+
+    def get_token(self) -> str:
+        with self._lock:
+            if self._token and time.monotonic() < self._expires_at - self._refresh_margin:
+                return self._token
 
-    authority = f"https://login.microsoftonline.com/{tenant_id}"
+            result = self._get_app().acquire_token_for_client(scopes=GRAPH_SCOPE)
+            token = result.get("access_token")
+            if not token:
+                raise RuntimeError(f"Graph token error: {result}")
 
-    app = msal.ConfidentialClientApplication(
-        client_id=client_id,
-        authority=authority,
-        client_credential=client_secret,
-    )
+            self._token = token
+            self._expires_at = time.monotonic() + int(result.get("expires_in", 3599))
+            logger.info(f"graph_token_refreshed expires_in={result.get('expires_in')}")
+            return token
 
-    result = app.acquire_token_for_client(scopes=GRAPH_SCOPE)
-    token = result.get("access_token")
-    if not token:
-        raise RuntimeError(f"Graph token error: {result}")
-    return token
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+
+_token_cache = GraphTokenCache()
+
+
+def get_graph_access_token() -> str:
+    return _token_cache.get_token()
 
 
 def _to_share_id(share_url: str) -> str:
@@ -46,20 +96,46 @@ def _to_share_id(share_url: str) -> str:
     return f"u!{encoded}"
 
 
-def download_sharepoint_bytes(url: str, timeout_seconds: int = 90) -> tuple[bytes, dict[str, str]]:
-    token = get_graph_access_token()
+def download_sharepoint_body(
+    url: str,
+    timeout_seconds: int = 90,
+    validators: dict[str, str] | None = None,
+) -> tuple[Optional[SpooledBody], dict[str, str]]:
+    """
+    Download a shared file through Graph. With `validators` (cached ETag /
+    Last-Modified) the request is conditional and a 304 returns (None, headers).
+    """
     share_id = _to_share_id(url)
 
     endpoint = f"{GRAPH_BASE}/shares/{share_id}/driveItem/content"
 
-    headers = {"Authorization": f"Bearer {token}"}
+    client = get_client(endpoint)
+    for attempt in range(2):
+        headers = {"Authorization": f"Bearer {get_graph_access_token()}", **conditional_headers(validators)}
+        with limited_request(endpoint) as slot, client.stream(
+            "GET", endpoint, headers=headers, timeout=timeout_seconds
+        ) as r:
+            slot.observe(r)
+            if r.status_code == 401 and attempt == 0:
+                # Token revoked or rotated early: refresh once and retry
+                _token_cache.invalidate()
+                continue
+            out_headers = {k.lower(): v for k, v in r.headers.items()}
+            out_headers["x-download-source"] = "graph"
+            if r.status_code == 304 and validators:
+                return None, out_headers
+            r.raise_for_status()
+            return spool_response(r, reject_html=False), out_headers
+
+    raise RuntimeError("unreachable")
 
-    with httpx.Client(follow_redirects=True, timeout=timeout_seconds) as client:
-        r = client.get(endpoint, headers=headers)
-        r.raise_for_status()
-        out_headers = {k.lower(): v for k, v in r.headers.items()}
-        out_headers["x-download-source"] = "graph"
-        return r.content, out_headers
+
+def download_sharepoint_bytes(url: str, timeout_seconds: int = 90) -> tuple[bytes, dict[str, str]]:
+    body, headers = download_sharepoint_body(url, timeout_seconds=timeout_seconds)
+    try:
+        return body.read_bytes(), headers
+    finally:
+        body.cleanup()
 
 
 def is_sharepoint_url(url: str) -> bool:
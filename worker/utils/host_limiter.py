@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app.metrics import HOST_CONCURRENCY_LIMIT, HOST_LIMITER_WAIT_SECONDS, HOST_THROTTLED_TOTAL
+from worker.utils.http_session import MAX_CONNECTIONS_PER_HOST
+from worker.utils.retry_policy import HostThrottledError, parse_retry_after
+
+
+logger = logging.getLogger(__name__)
+
+# Requests/second per host, e.g. "graph.microsoft.com=20,drive.google.com=10";
+# hosts not listed get WORKER_HOST_DEFAULT_RATE (0 = no rate limit)
+DEFAULT_RATE = float(os.getenv("WORKER_HOST_DEFAULT_RATE", "0"))
+RATE_OVERRIDES = os.getenv("WORKER_HOST_RATE_LIMITS", "")
+INITIAL_CONCURRENCY = int(os.getenv("WORKER_HOST_INITIAL_CONCURRENCY", "4"))
+# A cooldown longer than this is not waited out on a download thread; the
+# artifact is rescheduled instead (transient failure, Retry-After as floor)
+MAX_WAIT_SECONDS = float(os.getenv("WORKER_HOST_MAX_WAIT_SECONDS", "30"))
+# Cooldown after a 429/503 without Retry-After
+DEFAULT_COOLDOWN_SECONDS = float(os.getenv("WORKER_HOST_DEFAULT_COOLDOWN_SECONDS", "5"))
+
+THROTTLE_STATUS = {429, 503}
+
+
+def _parse_rates(spec: str) -> dict[str, float]:
+    rates: dict[str, float] = {}
+    for part in spec.split(","):
+        host, _, rate = part.partition("=")
+        if host.strip() and rate.strip():
+            rates[host.strip().lower()] = float(rate)
+    return rates
+
+
+class HostLimiter:
+    """
+    Rate and concurrency limit for one host, shared by all download threads.
+
+    - token bucket: at most `rate` requests/second (bursts up to max(1, rate))
+    - adaptive concurrency (AIMD): the in-flight limit grows by 1/limit per
+      success up to `max_concurrency` and halves on a 429/503, at most once
+      per round of requests that were already in flight
+    - cooldown: after a 429/503, no new request starts until Retry-After
+      (or a default cooldown) has passed
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float = 0.0,
+        initial_concurrency: int = 4,
+        max_concurrency: int = 16,
+    ) -> None:
+        self.host = host
+        self.rate = rate
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(min(max(1, initial_concurrency), self.max_concurrency))
+
+        self._cond = threading.Condition()
+        self._burst = max(1.0, rate)
+        self._tokens = self._burst
+        self._refilled_at = time.monotonic()
+        self._inflight = 0
+        self._cooldown_until = 0.0
+        self._decreased_at = 0.0
+        HOST_CONCURRENCY_LIMIT.labels(host=host).set(int(self.limit))
+
+    def acquire(self) -> float:
+        """Block until a request may start. Returns the start time (monotonic)."""
+        t0 = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._cooldown_until > now:
+                    remaining = self._cooldown_until - now
+                    if remaining > MAX_WAIT_SECONDS:
+                        raise HostThrottledError(self.host, remaining)
+                    self._cond.wait(remaining)
+                    continue
+                if self._inflight >= int(self.limit):
+                    self._cond.wait()
+                    continue
+                if self.rate > 0:
+                    self._tokens = min(self._burst, self._tokens + (now - self._refilled_at) * self.rate)
+                    self._refilled_at = now
+                    if self._tokens < 1:
+                        self._cond.wait((1 - self._tokens) / self.rate)
+                        continue
+                    self._tokens -= 1
+                self._inflight += 1
+                break
+        started = time.monotonic()
+        HOST_LIMITER_WAIT_SECONDS.labels(host=self.host).observe(started - t0)
+        return started
+
+    def release(self, started: float, status: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        with self._cond:
+            self._inflight -= 1
+            if status in THROTTLE_STATUS:
+                now = time.monotonic()
+                cooldown = retry_after if retry_after is not None else DEFAULT_COOLDOWN_SECONDS
+                self._cooldown_until = max(self._cooldown_until, now + cooldown)
+                # Requests started before the last decrease were sent at the
+                # old limit; their 429s must not halve it again
+                if started >= self._decreased_at:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._decreased_at = now
+                HOST_THROTTLED_TOTAL.labels(host=self.host, status=str(status)).inc()
+                logger.warning(
+                    f"host_throttled host={self.host} status={status} retry_after={retry_after} "
+                    f"cooldown={cooldown:.1f}s limit={int(self.limit)} inflight={self._inflight}"
+                )
+            elif status is not None and status < 500:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            HOST_CONCURRENCY_LIMIT.labels(host=self.host).set(int(self.limit))
+            self._cond.notify_all()
+
+
+class RequestSlot:
+    """Handle for one limited request; report the response via observe()."""
+
+    def __init__(self) -> None:
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def observe(self, response: httpx.Response) -> None:
+        self.status = response.status_code
+        if self.status in THROTTLE_STATUS:
+            self.retry_after = parse_retry_after(response.headers.get("retry-after"))
+
+
+_limiters: dict[str, HostLimiter] = {}
+_lock = threading.Lock()
+_rates = _parse_rates(RATE_OVERRIDES)
+
+
+def get_limiter(url: str) -> HostLimiter:
+    host = (urlparse(url).netloc or "").lower()
+    limiter = _limiters.get(host)
+    if limiter is not None:
+        return limiter
+    with _lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = HostLimiter(
+                host,
+                rate=_rates.get(host, DEFAULT_RATE),
+                initial_concurrency=INITIAL_CONCURRENCY,
+                max_concurrency=MAX_CONNECTIONS_PER_HOST,
+            )
+            _limiters[host] = limiter
+    return limiter
+
+
+@contextmanager
+def limited_request(url: str) -> Iterator[RequestSlot]:
+    """
+    Wrap one request (including streaming its body) to `url`'s host:
+
+        with limited_request(url) as slot, client.stream("GET", url) as r:
+            slot.observe(r)
+            r.raise_for_status()
+    """
+    limiter = get_limiter(url)
+    started = limiter.acquire()
+    slot = RequestSlot()
+    try:
+        yield slot
+    finally:
+        limiter.release(started, slot.status, slot.retry_after)
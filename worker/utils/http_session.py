@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from urllib.parse import urlparse
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+HTTP2 = os.getenv("WORKER_HTTP2", "1") == "1"
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("WORKER_HTTP_MAX_CONNECTIONS_PER_HOST", "16"))
+KEEPALIVE_SECONDS = float(os.getenv("WORKER_HTTP_KEEPALIVE_SECONDS", "60"))
+
+_clients: dict[str, httpx.Client] = {}
+_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return (urlparse(url).netloc or "").lower()
+
+
+def get_client(url: str) -> httpx.Client:
+    """
+    Shared, thread-safe httpx client for the URL's host.
+
+    One long-lived client per host keeps TLS sessions and keep-alive (or
+    HTTP/2) connections warm across artifacts, instead of paying the
+    handshake on every download. Timeouts are passed per request.
+    """
+    host = _host(url)
+    client = _clients.get(host)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(host)
+        if client is None:
+            client = httpx.Client(
+                http2=HTTP2,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=MAX_CONNECTIONS_PER_HOST,
+                    keepalive_expiry=KEEPALIVE_SECONDS,
+                ),
+            )
+            _clients[host] = client
+            logger.info(f"http_client_created host={host} http2={HTTP2}")
+    return client
+
+
+def close_clients() -> None:
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+
+# Worth retrying later: throttling, timeouts, and server-side trouble
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class HostThrottledError(RuntimeError):
+    """A host asked us to back off for longer than a download thread should block."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        super().__init__(f"host {host} throttled, retry after {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class ErrorClass:
+    transient: bool
+    reason: str
+    retry_after: Optional[float] = None  # seconds, from the server's Retry-After
+
+
+def parse_retry_after(value: str | None) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _classify_one(exc: BaseException) -> Optional[ErrorClass]:
+    if isinstance(exc, HostThrottledError):
+        return ErrorClass(True, "host_throttled", exc.retry_after)
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        if status in TRANSIENT_STATUS:
+            return ErrorClass(True, f"http_{status}", parse_retry_after(exc.response.headers.get("retry-after")))
+        return ErrorClass(False, f"http_{status}")
+    if isinstance(exc, httpx.TimeoutException):
+        return ErrorClass(True, "timeout")
+    if isinstance(exc, httpx.TransportError):
+        # Connect/read errors, dropped connections, protocol errors
+        return ErrorClass(True, "transport")
+    if isinstance(exc, BrokenProcessPool):
+        return ErrorClass(True, "parser_crashed")
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return ErrorClass(True, type(exc).__name__)
+    return None
+
+
+def classify_error(exc: BaseException) -> ErrorClass:
+    """
+    Transient or permanent, for the retry decision.
+
+    Walks the cause/context chain, so a wrapped error (e.g. the SharePoint
+    path raising ValueError after a throttled Graph call) is classified by
+    what actually went wrong. Anything unrecognised (corrupt PDF, HTML
+    instead of a file, unsupported format) is permanent.
+    """
+    seen: set[int] = set()
+    e: BaseException | None = exc
+    while e is not None and id(e) not in seen:
+        seen.add(id(e))
+        found = _classify_one(e)
+        if found is not None:
+            return found
+        e = e.__cause__ or e.__context__
+    return ErrorClass(False, type(exc).__name__)
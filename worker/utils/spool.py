@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+import httpx
+
+
+# Hard cap on a single artifact body
+MAX_DOWNLOAD_BYTES = int(os.getenv("WORKER_MAX_DOWNLOAD_BYTES", str(100 * 1024 * 1024)))
+# Bodies up to this size stay in memory; larger ones are spooled to disk
+SPOOL_MEMORY_BYTES = int(os.getenv("WORKER_SPOOL_MEMORY_BYTES", str(8 * 1024 * 1024)))
+SPOOL_DIR = os.getenv("WORKER_SPOOL_DIR") or None
+
+# Bytes kept in memory for sniffing and HTML detection
+HEAD_BYTES = 4096
+
+
+class HtmlResponseError(ValueError):
+    pass
+
+
+class DownloadTooLargeError(ValueError):
+    pass
+
+
+def looks_like_html(head: bytes) -> bool:
+    head = head[:300].lstrip().lower()
+    return head.startswith(b"<!doctype html") or head.startswith(b"<html") or b"<head" in head
+
+
+class _MmapReader(io.RawIOBase):
+    """Seekable file-like view over an mmap (mmap itself lacks seekable())."""
+
+    def __init__(self, mm: mmap.mmap) -> None:
+        self._mm = mm
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = self._mm.read(len(b))
+        b[: len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._mm.seek(offset, whence)
+        return self._mm.tell()
+
+    def tell(self) -> int:
+        return self._mm.tell()
+
+
+@dataclass
+class SpooledBody:
+    """
+    A downloaded artifact body, either held in memory (`data`) or spooled to
+    a temp file (`path`). Picklable, so it can be handed to a parser process;
+    for spooled bodies only the path crosses the process boundary.
+
+    `owned` is False when `path` belongs to someone else (a blob store file):
+    cleanup() then leaves the file in place.
+    """
+
+    size: int
+    sha256: str
+    head: bytes
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+    owned: bool = True
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SpooledBody":
+        return cls(
+            size=len(data),
+            sha256=hashlib.sha256(data).hexdigest(),
+            head=data[:HEAD_BYTES],
+            data=data,
+        )
+
+    @classmethod
+    def from_file(cls, path: str, sha256: str) -> "SpooledBody":
+        """Borrow an existing file whose sha256 is already known (not owned)."""
+        with open(path, "rb") as f:
+            head = f.read(HEAD_BYTES)
+            size = os.fstat(f.fileno()).st_size
+        return cls(size=size, sha256=sha256, head=head, path=path, owned=False)
+
+    @contextmanager
+    def open(self) -> Iterator[BinaryIO]:
+        """Seekable read-only stream; spooled bodies are memory-mapped, not read."""
+        if self.data is not None or not self.path:
+            yield io.BytesIO(self.data or b"")
+            return
+
+        with open(self.path, "rb") as f:
+            if self.size == 0:
+                yield io.BytesIO(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield _MmapReader(mm)
+
+    def read_bytes(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        if not self.path:
+            return b""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def cleanup(self) -> None:
+        if self.path and self.owned:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+def spool_chunks(
+    chunks: Iterable[bytes],
+    max_bytes: int = MAX_DOWNLOAD_BYTES,
+    memory_bytes: int = SPOOL_MEMORY_BYTES,
+    reject_html: bool = True,
+) -> SpooledBody:
+    """
+    Consume a byte stream once: hash it, cap its size, reject HTML as soon as
+    the first bytes arrive, and switch from memory to a temp file once it
+    grows past `memory_bytes`.
+    """
+    hasher = hashlib.sha256()
+    head = bytearray()
+    buf = bytearray()
+    tmp = None
+    size = 0
+    checked_html = False
+
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > max_bytes:
+                raise DownloadTooLargeError(f"Download exceeds max size of {max_bytes} bytes")
+
+            hasher.update(chunk)
+            if len(head) < HEAD_BYTES:
+                head += chunk[: HEAD_BYTES - len(head)]
+            if not checked_html and len(head) >= 512:
+                checked_html = True
+                if reject_html and looks_like_html(bytes(head)):
+                    raise HtmlResponseError("server returned HTML instead of file bytes")
+
+            if tmp is None:
+                buf += chunk
+                if len(buf) > memory_bytes:
+                    tmp = tempfile.NamedTemporaryFile(prefix="artifact-", dir=SPOOL_DIR, delete=False)
+                    tmp.write(buf)
+                    buf = bytearray()
+            else:
+                tmp.write(chunk)
+
+        if not checked_html and reject_html and looks_like_html(bytes(head)):
+            raise HtmlResponseError("server returned HTML instead of file bytes")
+
+    except BaseException:
+        if tmp is not None:
+            tmp.close()
+            os.unlink(tmp.name)
+        raise
+
+    if tmp is not None:
+        tmp.close()
+        return SpooledBody(size=size, sha256=hasher.hexdigest(), head=bytes(head), path=tmp.name)
+    return SpooledBody(size=size, sha256=hasher.hexdigest(), head=bytes(head), data=bytes(buf))
+
+
+def spool_response(
+    r: httpx.Response,
+    max_bytes: int = MAX_DOWNLOAD_BYTES,
+    reject_html: bool = True,
+) -> SpooledBody:
+    """Stream an httpx response (opened with client.stream) into a SpooledBody."""
+    declared = r.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise DownloadTooLargeError(f"Download of {declared} bytes exceeds max size of {max_bytes} bytes")
+    return spool_chunks(r.iter_bytes(), max_bytes=max_bytes, reject_html=reject_html)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+
+import asyncpg
+
+from app.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "delivery_artifact_registered"
+
+# After a failed LISTEN connect, waits only fall back to their poll timeout
+# until the next attempt; the delay doubles per failure up to the max
+RECONNECT_MIN_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 60.0
+
+
+class LaneWakeup:
+    """
+    Holds one dedicated asyncpg connection LISTENing on CHANNEL.
+
+    delivery.fn_register_artifact notifies with the lane name as payload, which
+    sets that lane's event. An idle worker waits on the event with a timeout,
+    so polling remains as a safety net if the listener is down or a
+    notification is lost. While it is down, waits try to reconnect with
+    exponential backoff (RECONNECT_MIN_SECONDS .. RECONNECT_MAX_SECONDS)
+    rather than on every call.
+    """
+
+    def __init__(self, dsn: str | None = None) -> None:
+        self._dsn = dsn or settings.DATABASE_LISTEN_URL or settings.DATABASE_URL
+        self._conn: asyncpg.Connection | None = None
+        self._events: dict[str, asyncio.Event] = {}
+        self._reconnect_delay = RECONNECT_MIN_SECONDS
+        self._reconnect_at = 0.0  # event loop time of the next connect attempt
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    def event(self, lane: str) -> asyncio.Event:
+        ev = self._events.get(lane)
+        if ev is None:
+            ev = self._events[lane] = asyncio.Event()
+        return ev
+
+    async def start(self) -> None:
+        try:
+            conn = await asyncpg.connect(dsn=self._dsn)
+            await conn.add_listener(CHANNEL, self._on_notify)
+            conn.add_termination_listener(self._on_terminate)
+            self._conn = conn
+            self._reconnect_delay = RECONNECT_MIN_SECONDS
+            logger.info(f"wakeup_listening channel={CHANNEL}")
+        except Exception as e:
+            self._conn = None
+            delay = self._reconnect_delay * random.uniform(0.5, 1.0)
+            self._reconnect_at = asyncio.get_running_loop().time() + delay
+            self._reconnect_delay = min(self._reconnect_delay * 2, RECONNECT_MAX_SECONDS)
+            logger.warning(
+                f"wakeup_listen_failed error={e} falling_back_to_polling retry_in={delay:.1f}s"
+            )
+
+    async def _maybe_reconnect(self) -> None:
+        if not self.connected and asyncio.get_running_loop().time() >= self._reconnect_at:
+            await self.start()
+
+    async def stop(self) -> None:
+        if self._conn and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    async def wait(self, lane: str, timeout: float) -> bool:
+        """
+        Wait until a notification for `lane` arrives or `timeout` elapses.
+        Returns True when woken by a notification.
+        """
+        await self._maybe_reconnect()
+
+        ev = self.event(lane)
+        try:
+            await asyncio.wait_for(ev.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            ev.clear()
+
+    async def wait_any(
+        self,
+        lanes: tuple[str, ...],
+        timeout: float,
+        extra: asyncio.Event | None = None,
+    ) -> set[str]:
+        """
+        Wait until any of `lanes` is notified, `extra` is set (if given) or
+        `timeout` elapses. Returns the lanes that were notified (and clears
+        their events); empty when woken by `extra` or the timeout.
+        """
+        await self._maybe_reconnect()
+
+        events = [self.event(lane) for lane in lanes]
+        if extra is not None:
+            events.append(extra)
+        if not any(ev.is_set() for ev in events):
+            waiters = [asyncio.ensure_future(ev.wait()) for ev in events]
+            try:
+                await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for w in waiters:
+                    w.cancel()
+
+        woken = {lane for lane in lanes if self.event(lane).is_set()}
+        for lane in woken:
+            self.event(lane).clear()
+        return woken
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        lane = (payload or "").strip() or "live"
+        self.event(lane).set()
+
+    def _on_terminate(self, conn) -> None:
+        logger.warning("wakeup_listener_connection_lost reconnecting_on_next_wait")
+        self._conn = None
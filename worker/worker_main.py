@@ -1,17 +1,15 @@
 import os
 import asyncio
-import traceback
-from uuid import UUID
-from worker.extractors.extract import extract_text_from_url
+import socket
+
+from prometheus_client import start_http_server
 
 from app.db.client import db
-from app.db.functions import (
-    fn_list_registered_artifacts_live,
-    fn_list_registered_artifacts_backfill,
-    fn_claim_artifact_for_extraction,
-    fn_finalize_artifact_extraction,
-    fn_fail_artifact,
-)
+from worker.alias_cache import AliasCache
+from worker.leases import LeaseKeeper
+from worker.pipeline import ExtractionPipeline
+from worker.scheduler import LaneScheduler
+from worker.utils.wakeup import LaneWakeup
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -19,58 +17,98 @@ load_dotenv()
 import logging
 logging.basicConfig(level=logging.INFO)
 
-LANE = os.getenv("WORKER_LANE", "live")  # live or backfill
+LANE = os.getenv("WORKER_LANE", "live")  # live, backfill, or all (both, live first)
+LANES = ("live", "backfill") if LANE == "all" else (LANE,)
 POLL_SECONDS = int(os.getenv("WORKER_POLL_SECONDS", "15"))
+# LISTEN/NOTIFY wakes the worker as soon as an artifact is registered; polling
+# is then only a safety net and can run much less often.
+LISTEN = os.getenv("WORKER_LISTEN", "1") == "1"
+SAFETY_POLL_SECONDS = int(os.getenv("WORKER_SAFETY_POLL_SECONDS", "60"))
 BATCH_LIMIT = int(os.getenv("WORKER_BATCH_LIMIT", "50"))
 
-
-def extract_text(storage_uri: str | None, mime_type: str | None) -> tuple[str, dict]:
-    if not storage_uri:
-        raise ValueError("missing storage_uri")
-    return extract_text_from_url(storage_uri, mime_type)
-
-
-
-async def run_once() -> int:
-    if LANE == "backfill":
-        items = await fn_list_registered_artifacts_backfill(BATCH_LIMIT)
-    else:
-        items = await fn_list_registered_artifacts_live(BATCH_LIMIT)
-    print(f"[{LANE}] found {len(items)} registered artifacts")
-
-    claimed = 0
-    for it in items:
-        artifact_id = UUID(str(it["artifact_id"]))
-        ok = await fn_claim_artifact_for_extraction(artifact_id)
-        if not ok:
-            continue
-        print(f"[{LANE}] claimed {artifact_id}")
-        claimed += 1
-        try:
-            text, meta = extract_text(it.get("storage_uri"), it.get("mime_type"))
-            if not isinstance(meta, dict):
-                meta = {"meta": str(meta)}
-
-            await fn_finalize_artifact_extraction(artifact_id, text, meta)
-            print(f"[{LANE}] finalized {artifact_id}")
-
-        except Exception as e:
-            err = f"{e}\n{traceback.format_exc()}"
-            logging.exception(f"[{LANE}] failed {artifact_id}")
-            await fn_fail_artifact(artifact_id, err)
-            print(f"[{LANE}] failed {artifact_id}")
-
-    return claimed
+# Per-stage concurrency for the extraction pipeline
+DOWNLOAD_CONCURRENCY = int(os.getenv("WORKER_DOWNLOAD_CONCURRENCY", "8"))
+PARSE_PROCESSES = int(os.getenv("WORKER_PARSE_PROCESSES", "0")) or None  # 0 = one per CPU
+DB_CONCURRENCY = int(os.getenv("WORKER_DB_CONCURRENCY", "4"))
+# PDFs with at least this many pages are parsed as page ranges on several
+# processes (0 disables); page/time budgets: WORKER_PDF_MAX_PAGES,
+# WORKER_PDF_TIME_BUDGET_SECONDS
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("WORKER_PDF_PARALLEL_MIN_PAGES", "40"))
+PDF_PAGES_PER_TASK = int(os.getenv("WORKER_PDF_PAGES_PER_TASK", "20"))
+
+# Scheduler: artifacts in flight at once, per-lane caps, and the share of
+# slots backfill keeps while live has a backlog (0 = strict live priority)
+MAX_INFLIGHT = int(os.getenv("WORKER_MAX_INFLIGHT", str(BATCH_LIMIT)))
+LIVE_MAX_INFLIGHT = int(os.getenv("WORKER_LIVE_MAX_INFLIGHT", str(MAX_INFLIGHT)))
+BACKFILL_MAX_INFLIGHT = int(os.getenv("WORKER_BACKFILL_MAX_INFLIGHT", str(MAX_INFLIGHT)))
+BACKFILL_SHARE = float(os.getenv("WORKER_BACKFILL_SHARE", "0.25"))
+
+# Transient failures (429/5xx, timeouts) are retried with exponential backoff;
+# attempts are counted per claim, and the artifact fails for good at the cap.
+RETRY_MAX_ATTEMPTS = int(os.getenv("WORKER_RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = int(os.getenv("WORKER_RETRY_BASE_SECONDS", "30"))
+RETRY_MAX_DELAY_SECONDS = int(os.getenv("WORKER_RETRY_MAX_DELAY_SECONDS", "3600"))
+
+# Claims are leased to this worker and heartbeated while in flight; leases of
+# crashed workers are reclaimed back to 'registered' by any running worker.
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+LEASE_SECONDS = int(os.getenv("WORKER_LEASE_SECONDS", "300"))
+HEARTBEAT_SECONDS = float(os.getenv("WORKER_HEARTBEAT_SECONDS", "0")) or None  # 0 = a third of the lease
+LEASE_RECLAIM_SECONDS = float(os.getenv("WORKER_LEASE_RECLAIM_SECONDS", "60"))  # 0 disables
+
+# Concept aliases are cached in the worker: changed aliases are pulled every
+# refresh interval, and a full reload drops deleted ones
+ALIAS_REFRESH_SECONDS = float(os.getenv("WORKER_ALIAS_REFRESH_SECONDS", "60"))
+ALIAS_FULL_RELOAD_SECONDS = float(os.getenv("WORKER_ALIAS_FULL_RELOAD_SECONDS", "3600"))
+
+METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))  # 0 disables
 
 
 async def main():
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
     await db.start()
+    aliases = AliasCache(ALIAS_REFRESH_SECONDS, ALIAS_FULL_RELOAD_SECONDS)
+    await aliases.refresh()
+    pipeline = ExtractionPipeline(
+        download_concurrency=DOWNLOAD_CONCURRENCY,
+        parse_processes=PARSE_PROCESSES,
+        db_concurrency=DB_CONCURRENCY,
+        retry_max_attempts=RETRY_MAX_ATTEMPTS,
+        retry_base_seconds=RETRY_BASE_SECONDS,
+        retry_max_delay_seconds=RETRY_MAX_DELAY_SECONDS,
+        pdf_parallel_min_pages=PDF_PARALLEL_MIN_PAGES,
+        pdf_pages_per_task=PDF_PAGES_PER_TASK,
+        worker_id=WORKER_ID,
+        aliases=aliases,
+    )
+    pipeline.start()
+    wakeup = LaneWakeup() if LISTEN else None
+    if wakeup:
+        await wakeup.start()
+    leases = LeaseKeeper(WORKER_ID, LEASE_SECONDS, HEARTBEAT_SECONDS, LEASE_RECLAIM_SECONDS, RETRY_MAX_ATTEMPTS)
+    leases.start()
+    # Claims go through delivery.fn_claim_registered_artifacts: rows locked by
+    # other workers are skipped, so every row returned is already ours.
+    scheduler = LaneScheduler(
+        pipeline,
+        LANES,
+        max_inflight=MAX_INFLIGHT,
+        lane_caps={"live": LIVE_MAX_INFLIGHT, "backfill": BACKFILL_MAX_INFLIGHT},
+        backfill_share=BACKFILL_SHARE,
+        batch_limit=BATCH_LIMIT,
+        wakeup=wakeup,
+        leases=leases,
+        poll_seconds=POLL_SECONDS,
+        safety_poll_seconds=SAFETY_POLL_SECONDS,
+    )
     try:
-        while True:
-            n = await run_once()
-            if n == 0:
-                await asyncio.sleep(POLL_SECONDS)
+        await scheduler.run()
     finally:
+        await leases.stop()
+        if wakeup:
+            await wakeup.stop()
+        pipeline.stop()
         await db.stop()
 
 